@@ -0,0 +1,77 @@
+import sys
+import json
+import asyncio
+import argparse
+
+from agentbox.bench.benchmarks import SCENARIOS, BenchmarkRunner, compare, missing_assets
+from agentbox.box.pyodide.pyodide_assets import PyodideAssetCache
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m agentbox.bench",
+        description="Benchmark sandbox startup, execution, messaging and MemFS throughput "
+                    "against locally cached Pyodide assets."
+    )
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"comma-separated scenarios to run (default: {','.join(SCENARIOS)})")
+    parser.add_argument("--repeat", type=int, default=5, help="samples per metric (default: 5)")
+    parser.add_argument("--worker", action="store_true", help="host Pyodide in a Web Worker")
+    parser.add_argument("--cache-dir", default=None, help="Pyodide asset cache directory")
+    parser.add_argument("--output", default=None, help="write results as JSON to this file")
+    parser.add_argument("--baseline", default=None, help="compare results with this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="fractional change counted as a regression (default: 0.2)")
+    return parser.parse_args(argv)
+
+
+def print_results(results):
+    for metric, summary in sorted(results["results"].items()):
+        print(f"{metric:45} {summary['value']:12.3f} {summary['unit']:8} "
+              f"(min {summary['min']:.3f}, p95 {summary['p95']:.3f}, n={summary['n']})")
+
+
+def print_comparison(rows, threshold):
+    for row in rows:
+        flag = "REGRESSION" if row["regressed"] else ""
+        print(f"{row['metric']:45} {row['baseline']:12.3f} -> {row['value']:12.3f} {row['change']:+8.1%} {flag}")
+    regressions = [row for row in rows if row["regressed"]]
+    print(f"{len(regressions)} regression(s) beyond {threshold:.0%} across {len(rows)} metric(s).")
+    return regressions
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        print(f"Unknown scenario(s): {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    # Benchmarks never touch the network: every asset must already be cached.
+    assets = PyodideAssetCache(cache_dir=args.cache_dir, offline=True)
+    missing = missing_assets(assets)
+    if missing:
+        print(f"Pyodide assets missing from {assets.cache_dir}: {', '.join(missing)}\n"
+              "Fill the cache first with: python -m agentbox.box.pyodide.pyodide_assets", file=sys.stderr)
+        return 2
+
+    runner = BenchmarkRunner(assets, repeat=args.repeat, worker=args.worker)
+    results = asyncio.run(runner.run(scenarios))
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if print_comparison(compare(results, baseline, args.threshold), args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
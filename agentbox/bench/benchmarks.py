@@ -0,0 +1,251 @@
+import os
+import sys
+import json
+import time
+import platform
+import statistics
+
+from playwright.async_api import async_playwright
+
+from agentbox.box.pyodide.pyodide_assets import PYODIDE_CORE_FILES
+from agentbox.box.pyodide.pyodide_instance import PyodideInstance
+
+
+SCENARIOS = ("cold_start", "warm_exec", "messaging", "memfs")
+
+# MemFS scenarios run for every (file count, file size) pair.
+MEMFS_FILE_COUNTS = (10, 100)
+MEMFS_FILE_SIZES = (1024, 64 * 1024, 1024 * 1024)
+
+WARM_SNIPPETS = {
+    "noop": "pass",
+    "print": "print('hello')",
+    "compute": "print(sum(i * i for i in range(100000)))",
+}
+
+MESSAGING_CODE = """
+import time, json
+start = time.perf_counter()
+for i in range({count}):
+    await messaging.send({{"i": i}})
+sequential = time.perf_counter() - start
+print(json.dumps({{"sequential_ms": sequential * 1000 / {count}}}))
+"""
+
+
+def summarize(samples, unit, better="lower"):
+    """
+    Summarize a list of samples. 'value' (the median) is what baselines compare.
+    """
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return {
+        "value": statistics.median(ordered),
+        "min": ordered[0],
+        "p95": p95,
+        "max": ordered[-1],
+        "mean": statistics.fmean(ordered),
+        "n": len(ordered),
+        "unit": unit,
+        "better": better,
+    }
+
+
+def missing_assets(assets):
+    """
+    Return the core Pyodide files missing from the asset cache.
+    """
+    return [name for name in PYODIDE_CORE_FILES if not assets.is_cached(name)]
+
+
+class BenchmarkRunner:
+    """
+    Runs the benchmark scenarios against Pyodide served from a local asset
+    cache, so results do not depend on the network.
+
+    Each scenario returns a dict of metric name to summary (see summarize()).
+    """
+
+    def __init__(self, assets, repeat=5, worker=False, file_counts=MEMFS_FILE_COUNTS, file_sizes=MEMFS_FILE_SIZES,
+                 launch_options=None):
+        self.assets = assets
+        self.repeat = repeat
+        self.worker = worker
+        self.file_counts = file_counts
+        self.file_sizes = file_sizes
+        self.launch_options = launch_options or {}
+        self._playwright = None
+        self.browser = None
+
+    async def _launch(self):
+        self._playwright = await async_playwright().start()
+        self.browser = await self._playwright.chromium.launch(headless=True, **self.launch_options)
+
+    async def _shutdown(self):
+        if self.browser is not None:
+            await self.browser.close()
+            self.browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def _instance(self):
+        return await PyodideInstance.create(self.browser, assets=self.assets, worker=self.worker)
+
+    async def run(self, scenarios=SCENARIOS):
+        """
+        Run the named scenarios and return {'meta': ..., 'results': ...}.
+        """
+        results = {}
+        started = time.time()
+        try:
+            if "cold_start" in scenarios:
+                launches = []
+                for _ in range(self.repeat):
+                    start = time.perf_counter()
+                    await self._launch()
+                    launches.append((time.perf_counter() - start) * 1000)
+                    await self._shutdown()
+                results["cold_start.browser_launch_ms"] = summarize(launches, "ms")
+
+            await self._launch()
+            for name in scenarios:
+                if name not in SCENARIOS:
+                    raise ValueError(f"Unknown scenario: {name}")
+                results.update(await getattr(self, name)())
+        finally:
+            await self._shutdown()
+
+        return {
+            "meta": {
+                "timestamp": started,
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "pyodide": self.assets.version,
+                "repeat": self.repeat,
+                "worker": self.worker,
+                "scenarios": list(scenarios),
+            },
+            "results": results,
+        }
+
+    # --- scenarios ---
+
+    async def cold_start(self):
+        boots = []
+        phases = {}
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            instance = await self._instance()
+            boots.append((time.perf_counter() - start) * 1000)
+            for phase, elapsed_ms in instance.boot_timings.items():
+                phases.setdefault(phase, []).append(elapsed_ms)
+            await instance.close()
+        results = {"cold_start.instance_boot_ms": summarize(boots, "ms")}
+        for phase, samples in phases.items():
+            results[f"cold_start.boot_{phase}_ms"] = summarize(samples, "ms")
+        return results
+
+    async def warm_exec(self):
+        results = {}
+        instance = await self._instance()
+        try:
+            for name, code in WARM_SNIPPETS.items():
+                # One untimed run warms the code path.
+                await instance.run(code)
+                samples = []
+                for _ in range(self.repeat):
+                    start = time.perf_counter()
+                    await instance.run(code)
+                    samples.append((time.perf_counter() - start) * 1000)
+                results[f"warm_exec.{name}_ms"] = summarize(samples, "ms")
+
+            samples = []
+            for _ in range(self.repeat):
+                await instance.run("x = [bytearray(1024) for _ in range(1000)]")
+                start = time.perf_counter()
+                await instance.reset()
+                samples.append((time.perf_counter() - start) * 1000)
+            results["warm_exec.reset_ms"] = summarize(samples, "ms")
+        finally:
+            await instance.close()
+        return results
+
+    async def messaging(self, count=50):
+        round_trips = []
+        instance = await self._instance()
+        try:
+            for _ in range(self.repeat):
+                result = await instance.run(MESSAGING_CODE.format(count=count))
+                if not result.get("success"):
+                    raise RuntimeError(f"Messaging benchmark failed: {result.get('error')}")
+                round_trips.append(json.loads(result["output"].strip().splitlines()[-1])["sequential_ms"])
+        finally:
+            await instance.close()
+        return {"messaging.round_trip_ms": summarize(round_trips, "ms")}
+
+    async def memfs(self):
+        results = {}
+        instance = await self._instance()
+        memfs = instance.memfs
+        try:
+            for count in self.file_counts:
+                for size in self.file_sizes:
+                    label = f"{count}x{size // 1024}k"
+                    data = os.urandom(size)
+                    total_mb = count * size / (1024 * 1024)
+                    samples = {"write": [], "read": [], "copy": [], "list": []}
+                    for run in range(self.repeat):
+                        root = f"/tmp/bench_{label}_{run}"
+                        await memfs.mkdir(root)
+                        paths = [f"{root}/f{i}.bin" for i in range(count)]
+
+                        start = time.perf_counter()
+                        for path in paths:
+                            await memfs.write_bytes(path, data)
+                        samples["write"].append(total_mb / (time.perf_counter() - start))
+
+                        start = time.perf_counter()
+                        for path in paths:
+                            await memfs.read_bytes(path)
+                        samples["read"].append(total_mb / (time.perf_counter() - start))
+
+                        start = time.perf_counter()
+                        await memfs.copy(root, root + "_copy")
+                        samples["copy"].append(total_mb / (time.perf_counter() - start))
+
+                        start = time.perf_counter()
+                        await memfs.list_dir(root, recursive=True, info=True)
+                        samples["list"].append(count / (time.perf_counter() - start))
+
+                        await instance.reset()
+                    for op in ("write", "read", "copy"):
+                        results[f"memfs.{op}_{label}_mb_s"] = summarize(samples[op], "MB/s", better="higher")
+                    results[f"memfs.list_{label}_files_s"] = summarize(samples["list"], "files/s", better="higher")
+        finally:
+            await instance.close()
+        return results
+
+
+def compare(results, baseline, threshold=0.2):
+    """
+    Compare each metric's value with the baseline. A metric regresses when
+    it is worse than the baseline by more than threshold (a fraction).
+    Returns a list of row dicts with 'metric', 'value', 'baseline',
+    'change' and 'regressed'.
+    """
+    rows = []
+    current = results.get("results", results)
+    previous = baseline.get("results", baseline)
+    for metric in sorted(current):
+        if metric not in previous:
+            continue
+        value = current[metric]["value"]
+        base = previous[metric]["value"]
+        change = (value - base) / base if base else 0.0
+        if current[metric].get("better", "lower") == "higher":
+            regressed = change < -threshold
+        else:
+            regressed = change > threshold
+        rows.append({"metric": metric, "value": value, "baseline": base, "change": change, "regressed": regressed})
+    return rows
@@ -0,0 +1,89 @@
+import asyncio
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when the admission queue is full and a request is turned away.
+    """
+    pass
+
+
+class AdmissionController:
+    """
+    Bounded admission for concurrent executions.
+
+    At most max_in_flight requests run at once. Further requests wait in a
+    queue of at most max_queue entries; beyond that they are rejected
+    immediately with AdmissionRejected. Waiting requests are queued per
+    caller and freed slots are handed out round-robin across callers, so one
+    busy caller cannot starve the others.
+    """
+
+    def __init__(self, max_in_flight=4, max_queue=64):
+        if max_in_flight < 1 or max_queue < 0:
+            raise ValueError("AdmissionController requires max_in_flight >= 1 and max_queue >= 0")
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.queued = 0
+        self.rejected = 0
+        # caller -> deque of futures waiting for a slot, in round-robin order.
+        self._waiters = OrderedDict()
+
+    async def acquire(self, caller=None):
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            return
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected(
+                f"admission queue is full ({self.queued} waiting, {self.in_flight} in flight)"
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(caller, deque()).append(future)
+        self.queued += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we were cancelled.
+                self.release()
+            else:
+                self._remove_waiter(caller, future)
+            raise
+
+    def _remove_waiter(self, caller, future):
+        waiters = self._waiters.get(caller)
+        if waiters is not None and future in waiters:
+            waiters.remove(future)
+            self.queued -= 1
+            if not waiters:
+                del self._waiters[caller]
+
+    def release(self):
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < self.max_in_flight:
+            caller, waiters = self._waiters.popitem(last=False)
+            future = waiters.popleft()
+            self.queued -= 1
+            if waiters:
+                # Move the caller to the back of the rotation.
+                self._waiters[caller] = waiters
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+
+    @asynccontextmanager
+    async def admit(self, caller=None):
+        """
+        Async context manager holding an execution slot for its duration.
+        Raises AdmissionRejected if the queue is full.
+        """
+        await self.acquire(caller)
+        try:
+            yield
+        finally:
+            self.release()
@@ -1,114 +1,474 @@
+import time
 import uuid
 import asyncio
-from playwright.async_api import async_playwright
-from black import format_str, FileMode
+import hashlib
+import inspect
+import posixpath
 
 from agentbox.box.box import Box
-from agentbox.box.memfs.memfs import MemFS
+from agentbox.box.admission import AdmissionController, AdmissionRejected
+from agentbox.box.code_format import CodeFormatter
+from agentbox.box.message_handlers import MessageHandlerRegistry
+from agentbox.box.metrics import ExecutionTimer, MetricsHook
+from agentbox.box.code_exec_session import CodeExecSession
+from agentbox.box.output_stream import ExecutionStream
+from agentbox.box.pyodide.pyodide_assets import PYODIDE_VERSION
+from agentbox.box.pyodide.pyodide_instance import ARTIFACT_CWD, RESET_PATHS
+from agentbox.box.pyodide.pyodide_pool import PyodidePool
 
 
 class CodeExecutorBox(Box):
 
-    def handle_code_exec(self, code_string: str) -> str:
+    def __init__(self, pool=None, timeout=30, assets=None, session_ttl=600, pool_size=4,
+                 max_in_flight=4, max_queue=64, formatter=None, format_mode="black",
+                 result_cache=None, worker=False, metrics=None, message_handlers=None, packages=(),
+                 capture_figures=True, max_artifact_bytes=64 * 1024 * 1024, manager=None):
+        """
+        pool: an optional started PyodidePool. When given, executions lease a
+        warm Pyodide page from it instead of launching a browser per call.
+        timeout: seconds allowed for each execution.
+        assets: an optional PyodideAssetCache used when no pool is given.
+        session_ttl: seconds a session may stay idle before it is closed.
+        pool_size: size of the pool the box creates for itself when no pool is given.
+        max_in_flight: executions allowed to run at once through execute().
+        max_queue: executions allowed to wait for a slot before new ones are rejected.
+        formatter: an optional CodeFormatter, e.g. one shared between boxes.
+        format_mode: default formatting applied before execution: "black",
+        "ast" (syntax check only) or "none". Can be overridden per call.
+        result_cache: an optional ExecutionResultCache. When given, successful
+        executions are stored and identical ones (same code, inputs, outputs
+        and Pyodide version) are answered from it without running.
+        worker: run Pyodide in a Web Worker in pools the box creates, so a
+        timed-out snippet is interrupted rather than costing a cold restart.
+        metrics: an optional MetricsHook receiving execution counters and
+        phase-timing and byte-count histograms. Results also carry 'timings'
+        (milliseconds per phase) and 'bytes' dicts.
+        message_handlers: an optional MessageHandlerRegistry answering
+        messaging.send() calls from sandbox code. Messages without a
+        registered type get the box's default reply.
+        packages: requirements (e.g. "numpy", "pandas") loaded and imported
+        as each instance of pools the box creates boots. Pyodide packages
+        are served from the asset cache; others are installed with micropip.
+        Pyodide packages imported by a snippet but not declared are found
+        statically and loaded before it runs.
+        capture_figures: return the matplotlib figures left open by a snippet
+        as PNG artifacts (and close them).
+        max_artifact_bytes: total artifact data returned per execution;
+        further files are listed without their data.
+        manager: an optional BoxManager whose browser fleet hosts the pools
+        the box creates, instead of a browser per pool. It may also evict
+        idle sessions to stay within its memory budget.
+        """
+        self.pool = pool
+        self.timeout = timeout
+        self.assets = assets
+        self.session_ttl = session_ttl
+        self.pool_size = pool_size
+        self.admission = AdmissionController(max_in_flight=max_in_flight, max_queue=max_queue)
+        self.formatter = formatter if formatter is not None else CodeFormatter(mode=format_mode)
+        self._owns_formatter = formatter is None
+        self.result_cache = result_cache
+        self.worker = worker
+        self.packages = tuple(packages)
+        self.capture_figures = capture_figures
+        self.max_artifact_bytes = max_artifact_bytes
+        self.manager = manager
+        self.metrics = metrics if metrics is not None else MetricsHook()
+        if message_handlers is None:
+            message_handlers = MessageHandlerRegistry()
+        if message_handlers.default_handler is None:
+            message_handlers.default_handler = self._default_message
+        self.message_handlers = message_handlers
+        self.sessions = {}
+        self._owned_pool = None
+        self._pool_lock = asyncio.Lock()
+        self._reaper = None
 
+    @staticmethod
+    def strip_markdown(code_string: str) -> str:
         # Remove markdown formatting if present
-        code_string = "\n".join(
+        return "\n".join(
             line for line in code_string.splitlines() if "```python" not in line and "```" not in line
         )
 
+    @staticmethod
+    def _answer_string(answer_dict) -> str:
+        if isinstance(answer_dict, dict) and answer_dict.get("artifacts"):
+            # Describe artifacts rather than inlining their bytes.
+            answer_dict = dict(answer_dict)
+            answer_dict["artifacts"] = [{k: v for k, v in artifact.items() if k != "data"}
+                                        for artifact in answer_dict["artifacts"]]
+        random_guid = uuid.uuid4()
+        return f"{answer_dict}\nCode Execution Confirmation: {random_guid}.\n"
+
+    def handle_code_exec(self, code_string: str, format_mode=None) -> str:
+
+        code_string = self.strip_markdown(code_string)
+
         # Run the Python code using Pyodide in Playwright
-        answer_dict = asyncio.run(self.run_python_with_pyodide(code_string))
+        answer_dict = asyncio.run(self.run_python_with_pyodide(code_string, format_mode=format_mode))
 
-        random_guid = uuid.uuid4()
-        answer_string = f"{answer_dict}\nCode Execution Confirmation: {random_guid}.\n"
-        return answer_string
+        return self._answer_string(answer_dict)
+
+    async def handle_code_exec_async(self, code_string: str, caller=None, format_mode=None) -> str:
+        """
+        Async counterpart of handle_code_exec for callers already running an
+        event loop. Executions share the box's pool and admission queue.
+        """
+        answer_dict = await self.execute(self.strip_markdown(code_string), caller=caller, format_mode=format_mode)
+        return self._answer_string(answer_dict)
+
+    async def execute(self, code_string, caller=None, on_output=None, format_mode=None,
+                      input_files=None, output_files=None, use_cache=True, output_globs=None):
+        """
+        Run code on a pooled Pyodide instance, subject to admission control.
+        caller identifies the requester for fair queueing. If the admission
+        queue is full the request is rejected immediately.
+        on_output, if given, receives (stream, text) chunks as the code runs.
+        format_mode overrides the box's formatting for this call.
+        input_files maps MemFS paths to str or bytes content written before
+        the code runs, creating parent directories as needed. Relative paths
+        are under the working directory; paths outside the instance's reset
+        paths are rejected, as they would outlive the run in the pooled
+        page. output_files lists MemFS paths whose contents are
+        returned as bytes in the result's 'files' dict.
+        output_globs ("*.png", "out/**") select files returned, together
+        with any captured figures, as the result's 'artifacts': dicts with
+        'path', 'size', 'sha256', 'data' (bytes) and 'kind'.
+        With a result cache, a previous identical execution is returned
+        (with 'cached' set) without running; use_cache=False bypasses it.
+        Executions declaring output_globs are not cached.
+        Returns a result dict; failures (unparseable code, a full admission
+        queue, ...) have 'success' False and an 'error' message.
+        """
+        timer = ExecutionTimer()
+        inputs = {path: data.encode("utf-8") if isinstance(data, str) else data
+                  for path, data in (input_files or {}).items()}
+        for path in inputs:
+            if not self._in_reset_paths(path):
+                return self._publish(timer, {
+                    "success": False,
+                    "error": f"ValueError: input file {path} is outside {', '.join(RESET_PATHS)}",
+                })
+        key = None
+        if use_cache and self.result_cache is not None and not output_globs:
+            with timer.phase("cache_lookup"):
+                digests = {path: hashlib.sha256(data).hexdigest() for path, data in inputs.items()}
+                key = self._result_key(code_string, digests, output_files)
+                cached = await self._cached_result(key, on_output)
+            if cached is not None:
+                return self._publish(timer, cached)
 
-    async def run_python_with_pyodide(self, code_string):
-        # Format the code using Black
         try:
-            formatted_code = format_str(code_string, mode=FileMode())
-        except Exception as e:
-            return f"{type(e).__name__}: {e}\nBe sure your indentation is correct."
+            waiting = time.perf_counter()
+            async with self.admission.admit(caller):
+                timer.record("admission", (time.perf_counter() - waiting) * 1000)
+                with timer.phase("format"):
+                    try:
+                        code_string = await self.format_code(code_string, format_mode)
+                    except Exception as e:
+                        self._publish(timer, status="format_error")
+                        return self._format_failure(e)
+
+                with timer.phase("pool_start"):
+                    pool = await self._ensure_pool()
+                result = await self._run_timed(pool, code_string, timer, on_output=on_output, inputs=inputs,
+                                               key=key, output_files=output_files, output_globs=output_globs)
+        except AdmissionRejected as e:
+            self._publish(timer, status="rejected")
+            return {"success": False, "error": f"AdmissionRejected: {e}"}
+        return self._publish(timer, result, code_string=code_string, inputs=inputs)
+
+    def stream(self, code_string, caller=None, format_mode=None, output_globs=None):
+        """
+        Start an execution and return an ExecutionStream yielding its
+        stdout/stderr chunks as they are written; await stream.result()
+        for the final result dict.
+        """
+        stream = ExecutionStream()
+        return stream.start(self.execute(code_string, caller=caller, on_output=stream.on_output,
+                                         format_mode=format_mode, output_globs=output_globs))
+
+    async def send_message(self, message):
+        # This function is invoked from the Pyodide context.
+        return await self.message_handlers.handle(message)
+
+    async def _default_message(self, message):
+        # Reply to messages no registered handler claims.
+        print("Host received message from Pyodide:", message)
+
+        # Build a reply dictionary.
+        response = {"reply": "Message received", "original": message}
+        return response
+
+    @staticmethod
+    def _format_failure(e):
+        # Result for code the formatter could not parse.
+        return {"success": False, "error": f"{type(e).__name__}: {e}\nBe sure your indentation is correct."}
+
+    async def format_code(self, code_string, format_mode=None):
+        """
+        Format the code with the box's CodeFormatter, off the event loop.
+        Raises if the code cannot be parsed.
+        """
+        return await self.formatter.format(code_string, mode=format_mode)
+
+    async def run_python_with_pyodide(self, code_string, format_mode=None):
+        timer = ExecutionTimer()
+        # Format the code using Black
+        with timer.phase("format"):
+            try:
+                formatted_code = await self.format_code(code_string, format_mode)
+            except Exception as e:
+                self._publish(timer, status="format_error")
+                return f"{type(e).__name__}: {e}\nBe sure your indentation is correct."
 
         code_string = formatted_code
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
-
-            memfs = MemFS(page)
-
-            # --- Expose a messaging function ---
-            async def send_message(message):
-                # This function is invoked from the Pyodide context.
-                print("Host received message from Pyodide:", message)
-
-                # process message, such as getting data from kgraph
-
-
-                # Build a reply dictionary.
-                response = {"reply": "Message received", "original": message}
-                return response
-
-            await page.expose_function("sendMessage", send_message)
-
-            # Load Pyodide via CDN using a data URL that injects the script
-            await page.goto(
-                'data:text/html,<script src="https://cdn.jsdelivr.net/pyodide/v0.23.0/full/pyodide.js"></script>'
-            )
-
-            # Evaluate Python code in Pyodide. Passing `code_string` as an argument avoids
-            # issues with escaping when embedding it in the JavaScript snippet.
-
-            evaluate_task = asyncio.create_task(
-                page.evaluate(
-                    """async (code) => {
-                    const pyodide = await loadPyodide();
-                    try {
-                        // Redirect stdout in Pyodide to capture output
-                        pyodide.runPython(`
-import sys
-from io import StringIO
-sys.stdout = StringIO()
-                        `);
-                        pyodide.runPython(`
-import json
-import js
-class Messaging:
-    async def send(self, message):
-        # Explicitly convert the Python dict to a JSON string,
-        # then parse it into a JS object.
-        json_message = json.dumps(message)
-        js_message = js.JSON.parse(json_message)
-        result = await js.sendMessage(js_message)
+        if self.pool is not None:
+            result = await self._run_timed(self.pool, code_string, timer)
+            return self._publish(timer, result, code_string=code_string)
+
+        # Without a shared pool, use a single-instance pool for this call only.
+        pool = PyodidePool(min_size=0, max_size=1, health_check=False, assets=self.assets, worker=self.worker,
+                           packages=self.packages, manager=self.manager)
         try:
-            return result.to_py()
-        except AttributeError:
-            return result
-messaging = Messaging()
-                        `);
-                        
-                        // Execute the provided code
-                        await pyodide.runPythonAsync(code);
-                        // Retrieve captured stdout output
-                        const std_output = pyodide.runPython("sys.stdout.getvalue()");
-                        return { success: true, output: std_output };
-                    } catch (error) {
-                        return { success: false, error: `${error.name}: ${error.message}` };
-                    }
-                    }""",
-                    code_string
-                )
-            )
+            with timer.phase("pool_start"):
+                await pool.start()
+            result = await self._run_timed(pool, code_string, timer)
+        finally:
+            with timer.phase("teardown"):
+                await pool.stop()
+        return self._publish(timer, result, code_string=code_string)
 
-            try:
-                result = await asyncio.wait_for(evaluate_task, timeout=30)
-            except asyncio.TimeoutError:
-                evaluate_task.cancel()  # Cancel the task if it exceeds the timeout.
-                result = {
-                    "success": False,
-                    "error": "TimeoutError: Pyodide code execution exceeded 30 seconds."
-                }
+    async def _run_timed(self, pool, code_string, timer, on_output=None, inputs=None, key=None, output_files=None,
+                         output_globs=None):
+        """
+        Lease an instance from pool, run the code on it and release it,
+        recording each phase on timer.
+        """
+        with timer.phase("lease"):
+            instance = await pool.acquire()
+        if instance.uses == 0:
+            # The instance was booted for this call.
+            for name, elapsed_ms in instance.boot_timings.items():
+                timer.record("boot_" + name, elapsed_ms)
+        try:
+            result = None
+            if inputs:
+                with timer.phase("inputs"):
+                    result = await self._write_inputs(instance, inputs)
+            if result is None:
+                with timer.phase("packages"):
+                    result = await self._load_packages(instance, code_string)
+            if result is None:
+                with timer.phase("execute"):
+                    result = await self._run_on_instance(instance, code_string, on_output=on_output,
+                                                         output_globs=output_globs)
+                with timer.phase("outputs"):
+                    result = await self._finish_result(instance, key, result, output_files)
+        except BaseException:
+            await pool.release(instance, discard=True)
+            raise
+        with timer.phase("release"):
+            await pool.release(instance)
+        return result
+
+    def _publish(self, timer, result=None, status=None, code_string=None, inputs=None):
+        """
+        Attach the timing breakdown and byte counts to a result dict and
+        report them to the metrics hook. Returns the result.
+        """
+        timings = timer.finish()
+        counts = {}
+        if code_string is not None:
+            counts["code"] = len(code_string.encode("utf-8"))
+        if inputs:
+            counts["input_files"] = sum(len(data) for data in inputs.values())
+        if isinstance(result, dict):
+            counts["stdout"] = len((result.get("output") or "").encode("utf-8"))
+            counts["stderr"] = len((result.get("stderr") or "").encode("utf-8"))
+            if result.get("files"):
+                counts["output_files"] = sum(len(data) for data in result["files"].values())
+            if result.get("artifacts"):
+                counts["artifacts"] = sum(len(a["data"]) for a in result["artifacts"] if a["data"] is not None)
+            if status is None:
+                status = "cached" if result.get("cached") else "success" if result.get("success") else "error"
+            result["timings"] = timings
+            result["bytes"] = counts
+        elif status is None:
+            status = "error"
+
+        self.metrics.increment("agentbox_executions_total", tags={"status": status})
+        for phase, elapsed_ms in timings.items():
+            self.metrics.observe("agentbox_execution_phase_seconds", elapsed_ms / 1000, tags={"phase": phase})
+        for kind, size in counts.items():
+            self.metrics.observe("agentbox_execution_bytes", size, tags={"kind": kind})
+        return result
+
+    @staticmethod
+    def _in_reset_paths(path):
+        path = posixpath.normpath(posixpath.join(ARTIFACT_CWD, path))
+        return any(path.startswith(root + "/") for root in RESET_PATHS)
+
+    async def _write_inputs(self, instance, inputs):
+        """
+        Write the input files, with their parent directories, in one round
+        trip. Returns an error result if any could not be written, else None.
+        """
+        batch = instance.memfs.batch()
+        for path, data in inputs.items():
+            path = posixpath.join(ARTIFACT_CWD, path)
+            batch.makedirs(posixpath.dirname(path)).write_bytes(path, data)
+        for op in await batch.run():
+            if not op["ok"]:
+                return {"success": False, "error": f"OSError: could not write input files: {op.get('error')}"}
+        return None
+
+    async def _load_packages(self, instance, code_string):
+        """
+        Load the packages the code imports that the instance lacks.
+        Returns an error result if they could not be loaded, else None.
+        """
+        try:
+            await instance.ensure_packages(code_string)
+        except Exception as e:
+            return {"success": False, "error": f"PackageError: {e}"}
+        return None
+
+    async def _run_on_instance(self, instance, code_string, on_output=None, output_globs=None):
+        instance.message_handler = self.send_message
+        return await instance.run(code_string, timeout=self.timeout, on_output=on_output, output_globs=output_globs,
+                                  capture_figures=self.capture_figures, max_artifact_bytes=self.max_artifact_bytes)
+
+    # --- result cache ---
+
+    def _result_key(self, code_string, input_digests, output_files):
+        version = self.assets.version if self.assets is not None else PYODIDE_VERSION
+        packages = self.packages or getattr(self.pool, "packages", ())
+        return self.result_cache.key(code_string, input_digests, pyodide_version=version,
+                                     packages=packages, output_files=output_files)
 
-            await browser.close()
+    async def _cached_result(self, key, on_output=None):
+        cached = await self.result_cache.get_async(key)
+        if cached is None:
+            return None
+        result, files = cached
+        result["cached"] = True
+        if files:
+            result["files"] = files
+        if on_output is not None:
+            # Replay the stored output so streaming callers see it too.
+            for stream in ("stdout", "stderr"):
+                text = result.get("output" if stream == "stdout" else "stderr")
+                if text:
+                    replayed = on_output(stream, text)
+                    if inspect.isawaitable(replayed):
+                        await replayed
+        return result
+
+    async def _finish_result(self, instance, key, result, output_files):
+        """
+        Collect the declared output files into the result and store it in
+        the result cache if the execution succeeded.
+        """
+        if not isinstance(result, dict) or instance.broken:
             return result
+        files = None
+        if output_files:
+            files = {}
+            for path in output_files:
+                data = await instance.memfs.read_bytes(path)
+                if data is not None:
+                    files[path] = data
+            result["files"] = files
+        # Artifacts are not part of the key, so such results are not stored.
+        if key is not None and result.get("success") and not result.get("artifacts"):
+            await self.result_cache.put_async(key, {k: v for k, v in result.items() if k != "files"}, files)
+        return result
+
+    async def _ensure_pool(self):
+        if self.pool is not None:
+            return self.pool
+        async with self._pool_lock:
+            if self._owned_pool is None:
+                pool = PyodidePool(min_size=0, max_size=self.pool_size, assets=self.assets, worker=self.worker,
+                                   packages=self.packages, manager=self.manager)
+                await pool.start()
+                self._owned_pool = pool
+        return self._owned_pool
+
+    # --- sessions ---
+
+    async def open_session(self, ttl=None):
+        """
+        Lease a Pyodide instance for a multi-step session and return it.
+        Snippets run with session.run() (or run_in_session()) share globals
+        and MemFS until the session is closed or stays idle longer than ttl.
+        """
+        pool = await self._ensure_pool()
+        instance = await pool.acquire()
+        session = CodeExecSession(self, pool, instance, self.session_ttl if ttl is None else ttl)
+        self.sessions[session.session_id] = session
+        if pool.manager is not None:
+            session.track(pool.manager)
+        self._start_reaper()
+        return session
+
+    def get_session(self, session_id):
+        """
+        Return the open session with the given id, or None.
+        """
+        return self.sessions.get(session_id)
+
+    async def run_in_session(self, session_id, code_string, on_output=None, format_mode=None,
+                             input_paths=None, output_files=None, use_cache=True, output_globs=None):
+        session = self.sessions.get(session_id)
+        if session is None:
+            return {"success": False, "error": f"SessionNotFound: no open session {session_id}."}
+        return await session.run(code_string, on_output=on_output, format_mode=format_mode,
+                                 input_paths=input_paths, output_files=output_files, use_cache=use_cache,
+                                 output_globs=output_globs)
+
+    async def close_session(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is not None:
+            await session.close()
+
+    async def expire_sessions(self):
+        """
+        Close sessions that have been idle longer than their ttl.
+        Returns the ids of the closed sessions.
+        """
+        expired = [s for s in list(self.sessions.values()) if s.expired]
+        for session in expired:
+            await session.close()
+        return [s.session_id for s in expired]
+
+    def _start_reaper(self):
+        if self._reaper is not None and not self._reaper.done():
+            return
+        self._reaper = asyncio.create_task(self._reap())
+
+    async def _reap(self):
+        while self.sessions:
+            ttls = [s.ttl for s in self.sessions.values() if s.ttl is not None]
+            if not ttls:
+                return
+            await asyncio.sleep(max(1.0, min(ttls) / 4))
+            await self.expire_sessions()
+
+    async def close(self):
+        """
+        Close all sessions and any pool owned by this box.
+        """
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        for session in list(self.sessions.values()):
+            await session.close()
+        if self._owned_pool is not None:
+            await self._owned_pool.stop()
+            self._owned_pool = None
+        if self._owns_formatter:
+            self.formatter.close()
@@ -0,0 +1,207 @@
+import os
+import time
+import uuid
+import shutil
+import asyncio
+import posixpath
+
+from agentbox.box.metrics import ExecutionTimer
+from agentbox.box.pyodide.pyodide_instance import RESET_PATHS
+
+
+class CodeExecSession:
+    """
+    A leased Pyodide instance kept across executions, so that globals and
+    MemFS contents persist from one snippet to the next.
+    Sessions are opened and expired by CodeExecutorBox.
+
+    When the pool has a BoxManager, an idle session may be evicted to free
+    memory. If the manager has a spill_dir, the session's MemFS contents
+    are saved there and restored on a fresh instance at the next run, whose
+    result has 'restored' set and lists the restored paths under
+    'restored_paths'. Only the reset paths and entries created at the
+    filesystem root are saved; Python globals, installed packages and
+    writes inside other boot-time directories (/lib, /usr, ...) do not
+    survive eviction. Without a spill_dir, eviction closes the session.
+    """
+
+    def __init__(self, box, pool, instance, ttl):
+        self.session_id = str(uuid.uuid4())
+        self.box = box
+        self.pool = pool
+        self.instance = instance
+        self.ttl = ttl
+        self.created_at = time.monotonic()
+        self.last_access = self.created_at
+        self.closed = False
+        self.memfs = instance.memfs
+        # (MemFS path, unpack directory, host archive) saved when the session was evicted.
+        self.spilled = []
+        # Snippets in a session run one at a time.
+        self._lock = asyncio.Lock()
+
+    @property
+    def idle_seconds(self):
+        return time.monotonic() - self.last_access
+
+    @property
+    def expired(self):
+        if self.ttl is None or self._lock.locked():
+            return False
+        return self.idle_seconds > self.ttl
+
+    async def run(self, code_string, on_output=None, format_mode=None, input_paths=None, output_files=None,
+                  use_cache=True, output_globs=None):
+        """
+        Execute code against the session's globals and MemFS.
+        on_output, if given, receives (stream, text) chunks as the code runs.
+        format_mode overrides the box's formatting for this snippet.
+        input_paths and output_files list MemFS paths the snippet reads and
+        writes. When the box has a result cache, a snippet whose code and
+        input file digests match an earlier run is not executed: its stored
+        output files are written back to MemFS and its result is returned.
+        Only declared inputs are hashed, so snippets that also depend on
+        session globals should not be cached.
+        output_globs select MemFS files returned as the result's 'artifacts'
+        (see CodeExecutorBox.execute()); such snippets are not cached.
+        Returns a result dict, with 'success' False and an 'error' message
+        on failure.
+        """
+        async with self._lock:
+            if self.closed:
+                return {"success": False, "error": f"SessionClosed: session {self.session_id} is closed."}
+            self.last_access = time.monotonic()
+            timer = ExecutionTimer()
+            restored = self.instance is None
+            if restored:
+                with timer.phase("restore"):
+                    try:
+                        restored_paths = await self._restore()
+                    except OSError as e:
+                        return self.box._publish(timer, {"success": False, "error": f"OSError: {e}"})
+
+            key = None
+            if use_cache and self.box.result_cache is not None and not output_globs:
+                with timer.phase("cache_lookup"):
+                    try:
+                        digests = await self.memfs.digest(input_paths or [])
+                    except OSError as e:
+                        return self.box._publish(timer, {"success": False, "error": f"OSError: {e}"})
+                    key = self.box._result_key(code_string, digests, output_files)
+                    cached = await self.box._cached_result(key, on_output)
+                if cached is not None:
+                    with timer.phase("outputs"):
+                        for path, data in cached.get("files", {}).items():
+                            await self.memfs.write_bytes(path, data)
+                    return self.box._publish(timer, cached)
+
+            with timer.phase("format"):
+                try:
+                    code_string = await self.box.format_code(code_string, format_mode)
+                except Exception as e:
+                    self.box._publish(timer, status="format_error")
+                    return self.box._format_failure(e)
+
+            with timer.phase("packages"):
+                result = await self.box._load_packages(self.instance, code_string)
+            if result is None:
+                with timer.phase("execute"):
+                    result = await self.box._run_on_instance(self.instance, code_string, on_output=on_output,
+                                                             output_globs=output_globs)
+                with timer.phase("outputs"):
+                    result = await self.box._finish_result(self.instance, key, result, output_files)
+            result = self.box._publish(timer, result, code_string=code_string)
+            if restored and isinstance(result, dict):
+                result["restored"] = True
+                result["restored_paths"] = restored_paths
+            self.last_access = time.monotonic()
+
+        if self.instance is not None and self.instance.broken:
+            # The page cannot be trusted after a timeout; end the session.
+            await self.close()
+        return result
+
+    async def close(self):
+        """
+        Return the instance to the pool, which resets it for the next caller.
+        """
+        async with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+            self.box.sessions.pop(self.session_id, None)
+            self._discard_spill()
+            if self.instance is not None:
+                await self.pool.release(self.instance)
+
+    # --- eviction ---
+
+    def track(self, manager):
+        """
+        Register the session's instance with a BoxManager for eviction.
+        """
+        manager.track(self.instance, self._evict, can_evict=self._evictable,
+                      last_access=lambda: self.last_access)
+
+    def _evictable(self):
+        return not self.closed and self.instance is not None and not self._lock.locked()
+
+    def _spill_dir(self):
+        manager = self.pool.manager
+        spill_dir = manager.spill_dir if manager is not None else None
+        return os.path.join(spill_dir, self.session_id) if spill_dir else None
+
+    async def _evict(self, instance):
+        # Called by the BoxManager. Returns True if the instance was released.
+        if not self._evictable():
+            return False
+        async with self._lock:
+            if self.closed or self.instance is not instance:
+                return False
+            directory = self._spill_dir()
+            if directory is None:
+                self.closed = True
+                self.box.sessions.pop(self.session_id, None)
+            else:
+                os.makedirs(directory, exist_ok=True)
+                try:
+                    paths = await instance.state_paths()
+                except Exception:
+                    paths = [(path, True) for path in RESET_PATHS]
+                spilled = []
+                for i, (path, is_dir) in enumerate(paths):
+                    target = os.path.join(directory, f"{i}.tar")
+                    try:
+                        await self.memfs.export_archive(path, path=target)
+                    except OSError:
+                        # Nothing to keep under this path.
+                        continue
+                    spilled.append((path, path if is_dir else posixpath.dirname(path), target))
+                self.spilled = spilled
+            self.instance = None
+            # The wasm heap never shrinks, so the page itself must go.
+            await self.pool.release(instance, discard=True)
+            return True
+
+    async def _restore(self):
+        # Returns the MemFS paths brought back from the spill.
+        instance = await self.pool.acquire()
+        paths = [path for path, _, _ in self.spilled]
+        try:
+            for _, dest, archive in self.spilled:
+                await instance.memfs.import_archive(archive, dest)
+        except BaseException:
+            await self.pool.release(instance)
+            raise
+        self.instance = instance
+        self.memfs = instance.memfs
+        self._discard_spill()
+        if self.pool.manager is not None:
+            self.track(self.pool.manager)
+        return paths
+
+    def _discard_spill(self):
+        self.spilled = []
+        directory = self._spill_dir()
+        if directory is not None:
+            shutil.rmtree(directory, ignore_errors=True)
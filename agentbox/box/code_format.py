@@ -0,0 +1,163 @@
+import ast
+import asyncio
+import hashlib
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from black import format_str, FileMode
+
+
+FORMAT_MODES = ("black", "ast", "none")
+
+# Worker processes in the pool shared by formatters that do not ask for
+# their own. Workers are started with forkserver (or spawn) rather than
+# fork, as the host process runs Playwright and worker threads.
+DEFAULT_MAX_WORKERS = 2
+
+_shared_executor = None
+_shared_executor_lock = threading.Lock()
+
+
+def _mp_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _new_executor(max_workers):
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=_mp_context())
+
+
+def shared_executor():
+    """
+    Return the process pool shared by every CodeFormatter without its own.
+    """
+    global _shared_executor
+    with _shared_executor_lock:
+        if _shared_executor is None:
+            _shared_executor = _new_executor(DEFAULT_MAX_WORKERS)
+        return _shared_executor
+
+
+def _black_format(code_string):
+    # Module level so it can run in a worker process.
+    return format_str(code_string, mode=FileMode())
+
+
+class CodeFormatter:
+    """
+    Formats code before it is executed, without blocking the event loop.
+
+    mode is the default for format(): "black" reformats the code in a worker
+    process, "ast" only checks the syntax, and "none" passes the code through.
+    Results, including failures, are kept in an LRU keyed by a hash of the
+    mode and code, so retried snippets are not formatted twice, and identical
+    snippets formatted concurrently share one job.
+    """
+
+    def __init__(self, mode="black", cache_size=1024, max_workers=None, executor=None):
+        """
+        cache_size: number of results kept; 0 disables the cache.
+        max_workers: size of a process pool for Black owned by this
+        formatter. By default Black runs in a small pool shared by all
+        formatters in the process.
+        executor: an optional concurrent.futures executor to use instead.
+        """
+        if mode not in FORMAT_MODES:
+            raise ValueError(f"Unknown format mode: {mode}")
+        self.mode = mode
+        self.cache_size = cache_size
+        self.max_workers = max_workers
+        self.hits = 0
+        self.misses = 0
+        self._executor = executor
+        self._owns_executor = executor is None and max_workers is not None
+        self._executor_lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._pending = {}
+
+    @staticmethod
+    def _key(mode, code_string):
+        return hashlib.sha256(f"{mode}\0{code_string}".encode("utf-8")).hexdigest()
+
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                if self.max_workers is None:
+                    return shared_executor()
+                self._executor = _new_executor(self.max_workers)
+            return self._executor
+
+    def _store(self, key, entry):
+        if self.cache_size <= 0:
+            return
+        self._cache[key] = entry
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    @staticmethod
+    def _unpack(entry):
+        ok, value = entry
+        if ok:
+            return value
+        raise value.with_traceback(None)
+
+    async def _run(self, mode, code_string):
+        if mode == "ast":
+            # ast.parse is cheap next to Black; only the check is done here.
+            ast.parse(code_string)
+            return code_string
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), _black_format, code_string)
+
+    async def format(self, code_string, mode=None):
+        """
+        Return the code formatted according to mode (default: self.mode).
+        Raises if the code cannot be parsed.
+        """
+        mode = mode or self.mode
+        if mode not in FORMAT_MODES:
+            raise ValueError(f"Unknown format mode: {mode}")
+        if mode == "none":
+            return code_string
+
+        key = self._key(mode, code_string)
+        entry = self._cache.get(key)
+        if entry is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return self._unpack(entry)
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            return self._unpack(await asyncio.shield(pending))
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            try:
+                entry = (True, await self._run(mode, code_string))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                entry = (False, e)
+            self._store(key, entry)
+            future.set_result(entry)
+        finally:
+            self._pending.pop(key, None)
+            if not future.done():
+                future.cancel()
+        return self._unpack(entry)
+
+    def close(self):
+        """
+        Shut down the worker pool if this formatter created it. The shared
+        pool is left running for other formatters.
+        """
+        with self._executor_lock:
+            if self._executor is not None and self._owns_executor:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
@@ -1,13 +1,242 @@
-import json
-import asyncio
+import os
+import uuid
+import base64
+import weakref
+
+from agentbox.box.memfs.memfs_cache import MemFSCache
+from agentbox.box.memfs.memfs_js import MEMFS_JS, MEMFS_CALL_JS
+
+# Size of each chunk moved between host and page by the binary transfer APIs.
+CHUNK_SIZE = 1024 * 1024
+
+
+def unpack_artifacts(payload):
+    """
+    Turn the payload built by the page's collectArtifacts() into a list of
+    artifact dicts with 'path', 'size', 'sha256' and 'data' (bytes, or None
+    for files skipped to stay within the size limit).
+    Raises OSError if the page reported an error.
+    """
+    if isinstance(payload, str):
+        raise OSError(payload)
+    data = base64.b64decode(payload["data"])
+    artifacts = []
+    for entry in payload["artifacts"]:
+        artifact = {"path": entry["path"], "size": entry["size"], "sha256": entry["sha256"], "data": None}
+        if entry.get("skipped"):
+            artifact["skipped"] = True
+        else:
+            artifact["data"] = data[entry["offset"]:entry["offset"] + entry["size"]]
+        artifacts.append(artifact)
+    return artifacts
+
+
+class MemFSWriter:
+    """
+    Streaming writer returned by MemFS.open_write().
+    Data is buffered on the host and sent to the page in chunk_size pieces.
+    """
+
+    def __init__(self, memfs, path, append=False, chunk_size=CHUNK_SIZE):
+        self.memfs = memfs
+        self.path = path
+        self.chunk_size = chunk_size
+        self.closed = False
+        self._buffer = bytearray()
+        # The first chunk truncates the file unless appending.
+        self._append = append
+        self._opened = False
+
+    async def _send(self, data):
+        ok = await self.memfs._write_chunk(self.path, data, append=self._append)
+        if not ok:
+            raise OSError(f"Error writing {self.path}")
+        self._append = True
+        self._opened = True
+
+    async def write(self, data):
+        if self.closed:
+            raise ValueError("write to closed MemFSWriter")
+        self._buffer.extend(data)
+        while len(self._buffer) >= self.chunk_size:
+            chunk = bytes(self._buffer[:self.chunk_size])
+            del self._buffer[:self.chunk_size]
+            await self._send(chunk)
+        return len(data)
+
+    async def close(self):
+        if self.closed:
+            return
+        if self._buffer or not self._opened:
+            await self._send(bytes(self._buffer))
+            self._buffer.clear()
+        self.closed = True
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
+class MemFSBatch:
+    """
+    Collects MemFS operations and runs them in a single page.evaluate call.
+
+    Each method queues one operation and returns the batch, so calls can be
+    chained. run() returns one result dict per operation with 'op', 'ok' and
+    either 'result' or 'error'; operations skipped after a failure (when
+    stop_on_error is True) have 'skipped' set.
+    """
+
+    MUTATING_OPS = {"mkdir", "makedirs", "rmdir", "remove_file", "write_file", "write_bytes", "copy"}
+
+    def __init__(self, memfs):
+        self.memfs = memfs
+        self.ops = []
+
+    def __len__(self):
+        return len(self.ops)
+
+    def _add(self, op, **args):
+        self.ops.append([op, args])
+        return self
+
+    def mkdir(self, path):
+        return self._add("mkdir", path=path)
+
+    def makedirs(self, path):
+        # Create a directory and any missing parents; existing ones are fine.
+        return self._add("makedirs", path=path)
+
+    def rmdir(self, path):
+        return self._add("rmdir", path=path)
+
+    def remove_file(self, path):
+        return self._add("remove_file", path=path)
+
+    def write_file(self, path, content, append=False):
+        return self._add("write_file", path=path, content=content, append=append)
+
+    def write_bytes(self, path, data, append=False):
+        return self._add("write_bytes", path=path, data=base64.b64encode(data).decode("ascii"), append=append)
+
+    def read_file(self, path):
+        return self._add("read_file", path=path)
+
+    def read_bytes(self, path):
+        return self._add("read_bytes", path=path)
+
+    def copy(self, src, dest):
+        return self._add("copy", src=src, dest=dest)
+
+    def list_dir(self, directory="/", recursive=False, info=False):
+        return self._add("list_dir", path=directory, recursive=recursive, info=info)
+
+    def exists(self, path):
+        return self._add("exists", path=path)
+
+    def find(self, top="/", name=None, type=None, max_depth=None, limit=10000):
+        return self._add("find", path=top, name=name, type=type, max_depth=max_depth, limit=limit)
+
+    def grep(self, pattern, path, ignore_case=False, recursive=False, max_count=1000, max_line_length=1000):
+        return self._add("grep", pattern=pattern, path=path, ignore_case=ignore_case, recursive=recursive,
+                         max_count=max_count if max_count is not None else 1000,
+                         max_line_length=max_line_length)
+
+    def head(self, path, lines=10):
+        return self._add("head", path=path, lines=lines)
+
+    def tail(self, path, lines=10):
+        return self._add("tail", path=path, lines=lines)
+
+    def wc(self, path):
+        return self._add("wc", path=path)
+
+    def du(self, path="/"):
+        return self._add("du", path=path)
+
+    async def run(self, stop_on_error=True):
+        """
+        Execute the queued operations in one round trip and clear the batch.
+        """
+        ops, self.ops = self.ops, []
+        if not ops:
+            return []
+        results = await self.memfs._call("batch", ops, stop_on_error)
+        for op, args in ops:
+            if op in self.MUTATING_OPS:
+                self.memfs._invalidate(args.get("dest") or args.get("path"))
+        for result in results:
+            if result["op"] == "read_bytes" and result.get("ok"):
+                result["result"] = base64.b64decode(result["result"])
+        return results
+
 
 class MemFS:
-    def __init__(self, page):
+    # Pages that already carry the helper library, shared by all MemFS objects.
+    _installed_pages = weakref.WeakSet()
+
+    def __init__(self, page, cache=False, evaluate=None):
         """
         Initialize the MemFS interface with a Playwright page object.
         The page is expected to have Pyodide loaded and attached to window.pyodide.
+        The JavaScript helper library is installed on the page on first use.
+        If cache is True (or a MemFSCache), directory listings are cached on the
+        host and invalidated by mutations made through this object and by
+        bump_generation().
+        evaluate, if given, is a coroutine function (source, arg) used instead
+        of page.evaluate, e.g. to reach Pyodide in a worker; the helper library
+        must already be loaded wherever it evaluates.
         """
         self.page = page
+        self._evaluate = evaluate
+        if cache is True:
+            cache = MemFSCache()
+        elif cache is False:
+            cache = None
+        self.cache = cache
+
+    @property
+    def generation(self):
+        return self.cache.generation if self.cache is not None else 0
+
+    def bump_generation(self):
+        """
+        Mark every cached listing stale. Called around each code execution in
+        the page, since user code can change the filesystem behind our back.
+        """
+        if self.cache is not None:
+            self.cache.bump_generation()
+
+    def _invalidate(self, path):
+        if self.cache is not None and path:
+            self.cache.invalidate(path)
+
+    async def install(self):
+        """
+        Install the helper library on the page, now and for any later navigation.
+        Safe to call more than once.
+        """
+        if self._evaluate is not None or self.page in MemFS._installed_pages:
+            return
+        await self.page.add_init_script(script=MEMFS_JS)
+        await self.page.evaluate(MEMFS_JS)
+        MemFS._installed_pages.add(self.page)
+
+    async def _call(self, name, *args):
+        # Call a helper library function by name with structured arguments.
+        if self._evaluate is not None:
+            return await self._evaluate(MEMFS_CALL_JS, [name, list(args)])
+        if self.page not in MemFS._installed_pages:
+            await self.install()
+        return await self.page.evaluate(MEMFS_CALL_JS, [name, list(args)])
+
+    def batch(self):
+        """
+        Return a MemFSBatch that runs a list of operations in one round trip.
+        """
+        return MemFSBatch(self)
 
     async def list_dir(self, directory="/", recursive=False, info=False):
         """
@@ -19,216 +248,143 @@ class MemFS:
         and for recursive listing, a nested dict is returned.
         """
         if recursive:
-            if info:
-                # Recursive listing with info: returns a list of objects with name, type, size and children.
-                code = f'''
-                () => {{
-                    function listRecursiveInfo(path) {{
-                        const fs = window.pyodide._module.FS;
-                        let result = [];
-                        let entries;
-                        try {{
-                            entries = fs.readdir(path);
-                        }} catch(e) {{
-                            return "Error reading directory: " + e.message;
-                        }}
-                        entries.forEach(entry => {{
-                            if (entry === "." || entry === "..") return;
-                            let fullPath = (path === "/" ? "/" + entry : path + "/" + entry);
-                            let item = {{ name: entry }};
-                            try {{
-                                let stat = fs.stat(fullPath);
-                                if ((stat.mode & 0x4000) === 0x4000) {{
-                                    item.type = "dir";
-                                    item.size = null;
-                                    item.children = listRecursiveInfo(fullPath);
-                                }} else {{
-                                    item.type = "file";
-                                    item.size = stat.size;
-                                }}
-                            }} catch(e) {{
-                                item.error = e.message;
-                            }}
-                            result.push(item);
-                        }});
-                        return result;
-                    }}
-                    return listRecursiveInfo({json.dumps(directory)});
-                }}
-                '''
-            else:
-                # Recursive listing without info: returns a nested dictionary.
-                code = f'''
-                () => {{
-                    function listRecursive(path) {{
-                        const fs = window.pyodide._module.FS;
-                        let result = {{}};
-                        let entries;
-                        try {{
-                            entries = fs.readdir(path);
-                        }} catch(e) {{
-                            return "Error reading directory: " + e.message;
-                        }}
-                        entries.forEach(entry => {{
-                            if (entry === "." || entry === "..") return;
-                            let fullPath = (path === "/" ? "/" + entry : path + "/" + entry);
-                            try {{
-                                let stat = fs.stat(fullPath);
-                                if ((stat.mode & 0x4000) === 0x4000) {{
-                                    result[entry] = listRecursive(fullPath);
-                                }} else {{
-                                    result[entry] = "file";
-                                }}
-                            }} catch(e) {{
-                                result[entry] = "Error: " + e.message;
-                            }}
-                        }});
-                        return result;
-                    }}
-                    return listRecursive({json.dumps(directory)});
-                }}
-                '''
+            # Recursive listing with info returns a list of objects with name, type, size and children;
+            # without info it returns a nested dictionary.
+            name = "listRecursiveInfo" if info else "listRecursive"
         else:
-            # Non-recursive listing.
-            if info:
-                # If info is true, return an array of maps with details.
-                code = f'''
-                () => {{
-                    const fs = window.pyodide._module.FS;
-                    let result = [];
-                    try {{
-                        let entries = fs.readdir({json.dumps(directory)});
-                        entries.filter(e => e !== "." && e !== "..").forEach(entry => {{
-                            let fullPath = {json.dumps(directory)} === "/" ? "/" + entry : {json.dumps(directory)} + "/" + entry;
-                            let item = {{ name: entry }};
-                            try {{
-                                let stat = fs.stat(fullPath);
-                                if ((stat.mode & 0x4000) === 0x4000) {{
-                                    item.type = "dir";
-                                    item.size = null;
-                                }} else {{
-                                    item.type = "file";
-                                    item.size = stat.size;
-                                }}
-                            }} catch(e) {{
-                                item.error = e.message;
-                            }}
-                            result.push(item);
-                        }});
-                        return result;
-                    }} catch(e) {{
-                        return "Error reading directory: " + e.message;
-                    }}
-                }}
-                '''
-            else:
-                # Non-recursive listing without info: simple array of names.
-                code = f'''
-                () => {{
-                    const fs = window.pyodide._module.FS;
-                    try {{
-                        let entries = fs.readdir({json.dumps(directory)});
-                        return entries.filter(e => e !== "." && e !== "..");
-                    }} catch(e) {{
-                        return "Error reading directory: " + e.message;
-                    }}
-                }}
-                '''
-        return await self.page.evaluate(code)
+            # Non-recursive listing with info returns an array of maps with details;
+            # without info a simple array of names.
+            name = "listDirInfo" if info else "listDir"
+        if self.cache is not None:
+            cached = self.cache.get(directory, recursive, info)
+            if cached is not None:
+                return cached
+        if self.cache is None:
+            return await self._call(name, directory)
+        version = self.cache.version
+        result = await self._call(name, directory)
+        self.cache.put(directory, recursive, info, result, version=version)
+        return result
 
+    async def walk_page(self, top="/", cursor=None, page_size=500, max_depth=None, include=None, exclude=None):
+        """
+        Return one page of a depth-first walk under top as a dict with
+        'entries' and 'cursor'. Pass the returned cursor back to get the next
+        page; it is None once the walk is complete.
+        Entries are maps with 'path', 'name', 'depth', 'type' and 'size'.
+        max_depth limits how far below top the walk descends (1 = children only).
+        include and exclude are lists of globs ("*.py", "data/**/*.csv");
+        globs without "/" match entry names, others the path relative to top.
+        Excluded directories are not descended into.
+        Raises OSError if top is not a readable directory.
+        """
+        page = await self._call("walkPage", top, cursor, page_size, max_depth, include or [], exclude or [])
+        if isinstance(page, str):
+            raise OSError(page)
+        return page
+
+    async def walk(self, top="/", max_depth=None, include=None, exclude=None, page_size=500):
+        """
+        Async generator yielding the entries under top, depth first, fetched
+        from the page page_size entries at a time so memory stays bounded on
+        both sides. See walk_page() for the entry format and filters.
+        """
+        cursor = None
+        while True:
+            page = await self.walk_page(top, cursor=cursor, page_size=page_size, max_depth=max_depth,
+                                        include=include, exclude=exclude)
+            for entry in page["entries"]:
+                yield entry
+            cursor = page["cursor"]
+            if cursor is None:
+                return
+
+    # --- content commands ---
+    # These run in the page and send back only the matching slice, so large
+    # files and trees never cross the bridge. Each returns an error string
+    # on failure, like list_dir().
+
+    async def find(self, top="/", name=None, type=None, max_depth=None, limit=10000):
+        """
+        Return {'paths': [...], 'truncated': bool} for entries under top.
+        name is a glob matched against entry names (or paths relative to top
+        if it contains "/"); type is "f" for files or "d" for directories.
+        """
+        return await self._call("find", top, name, type, max_depth, limit)
+
+    async def grep(self, pattern, path, ignore_case=False, recursive=False, max_count=1000,
+                   max_line_length=1000):
+        """
+        Search a file, or every file under a directory when recursive is True,
+        for lines matching the JavaScript regular expression pattern.
+        Returns {'matches': [{'path', 'line', 'text'}, ...], 'truncated': bool}.
+        Binary files are skipped and matched lines are cut to max_line_length.
+        """
+        return await self._call("grep", pattern, path, ignore_case, recursive,
+                                max_count if max_count is not None else 1000, max_line_length)
+
+    async def head(self, path, lines=10):
+        """
+        Return the first lines of a text file as a string.
+        """
+        return await self._call("head", path, lines)
+
+    async def tail(self, path, lines=10):
+        """
+        Return the last lines of a text file as a string.
+        """
+        return await self._call("tail", path, lines)
+
+    async def wc(self, path):
+        """
+        Return {'path', 'lines', 'words', 'bytes'} for a file.
+        """
+        return await self._call("wc", path)
+
+    async def du(self, path="/"):
+        """
+        Return {'path', 'bytes', 'files', 'dirs'} totals for a file or directory tree.
+        """
+        return await self._call("du", path)
 
     async def read_file(self, path):
         """
         Return the content of a file at the given path as a UTF-8 string.
         Returns None if the file does not exist or cannot be read.
         """
-        code = f'''
-        () => {{
-            const fs = window.pyodide._module.FS;
-            try {{
-                return fs.readFile({json.dumps(path)}, {{encoding: "utf8"}});
-            }} catch (e) {{
-                return null;
-            }}
-        }}
-        '''
-        return await self.page.evaluate(code)
+        return await self._call("readFile", path)
 
     async def write_file(self, path, content, append=False):
         """
         Write content to a file at the given path using UTF-8 encoding.
         If append is True, the content is appended rather than overwriting the file.
         """
-        flag = "a" if append else "w"
-        code = f'''
-        () => {{
-            const fs = window.pyodide._module.FS;
-            try {{
-                fs.writeFile({json.dumps(path)}, {json.dumps(content)}, {{
-                    encoding: "utf8",
-                    flags: {json.dumps(flag)}
-                }});
-                return true;
-            }} catch (e) {{
-                return false;
-            }}
-        }}
-        '''
-        return await self.page.evaluate(code)
+        self._invalidate(path)
+        return await self._call("writeFile", path, content, "a" if append else "w")
 
     async def remove_file(self, path):
         """
         Remove (unlink) the file at the given path.
         Returns True if successful, False otherwise.
         """
-        code = f'''
-        () => {{
-            const fs = window.pyodide._module.FS;
-            try {{
-                fs.unlink({json.dumps(path)});
-                return true;
-            }} catch (e) {{
-                return false;
-            }}
-        }}
-        '''
-        return await self.page.evaluate(code)
+        self._invalidate(path)
+        return await self._call("removeFile", path)
 
     async def mkdir(self, path):
         """
         Create a new directory at the given path.
         Returns True if successful, False otherwise.
         """
-        code = f'''
-        () => {{
-            const fs = window.pyodide._module.FS;
-            try {{
-                fs.mkdir({json.dumps(path)});
-                return true;
-            }} catch (e) {{
-                return false;
-            }}
-        }}
-        '''
-        return await self.page.evaluate(code)
+        self._invalidate(path)
+        return await self._call("mkdir", path)
 
     async def rmdir(self, path):
         """
         Remove a directory at the given path.
         Returns True if successful, False otherwise.
         """
-        code = f'''
-        () => {{
-            const fs = window.pyodide._module.FS;
-            try {{
-                fs.rmdir({json.dumps(path)});
-                return true;
-            }} catch (e) {{
-                return false;
-            }}
-        }}
-        '''
-        return await self.page.evaluate(code)
+        self._invalidate(path)
+        return await self._call("rmdir", path)
 
     async def copy(self, src, dest):
         """
@@ -236,60 +392,153 @@ class MemFS:
         If src is a directory, it is copied recursively.
         Returns true if the copy was successful, or an error message if an error occurs.
         """
-        code = f'''
-        () => {{
-            const fs = window.pyodide._module.FS;
-            function copyRecursively(src, dest) {{
-                let stat;
-                try {{
-                    stat = fs.stat(src);
-                }} catch(e) {{
-                    return "Error getting stats for " + src + ": " + e.message;
-                }}
-                // Check if src is a directory: directory bit is 0x4000.
-                if ((stat.mode & 0x4000) === 0x4000) {{
-                    // Create destination directory.
-                    try {{
-                        fs.mkdir(dest);
-                    }} catch(e) {{
-                        // Ignore error if directory already exists.
-                        if (!(e && e.errno === 20)) {{
-                            return "Error creating directory " + dest + ": " + e.message;
-                        }}
-                    }}
-                    let entries;
-                    try {{
-                        entries = fs.readdir(src);
-                    }} catch(e) {{
-                        return "Error reading directory " + src + ": " + e.message;
-                    }}
-                    for (let i = 0; i < entries.length; i++) {{
-                        let entry = entries[i];
-                        if (entry === "." || entry === "..") continue;
-                        let srcEntry = src === "/" ? "/" + entry : src + "/" + entry;
-                        let destEntry = dest === "/" ? "/" + entry : dest + "/" + entry;
-                        let result = copyRecursively(srcEntry, destEntry);
-                        if (result !== true) {{
-                            return result;
-                        }}
-                    }}
-                }} else {{
-                    // src is a file. Read it and write it to dest.
-                    let content;
-                    try {{
-                        content = fs.readFile(src, {{ encoding: "binary" }});
-                    }} catch(e) {{
-                        return "Error reading file " + src + ": " + e.message;
-                    }}
-                    try {{
-                        fs.writeFile(dest, content, {{ encoding: "binary" }});
-                    }} catch(e) {{
-                        return "Error writing file " + dest + ": " + e.message;
-                    }}
-                }}
-                return true;
-            }}
-            return copyRecursively({json.dumps(src)}, {json.dumps(dest)});
-        }}
-        '''
-        return await self.page.evaluate(code)
+        self._invalidate(dest)
+        return await self._call("copy", src, dest)
+
+    async def _read_chunk(self, path, offset, length):
+        # Returns (bytes, total file size), or None if the file cannot be read.
+        result = await self._call("readChunk", path, offset, length)
+        if result is None:
+            return None
+        data, size = result
+        return base64.b64decode(data), size
+
+    async def _write_chunk(self, path, data, append=False):
+        encoded = base64.b64encode(data).decode("ascii")
+        self._invalidate(path)
+        return await self._call("writeChunk", path, encoded, "a" if append else "w")
+
+    async def open_read(self, path, chunk_size=CHUNK_SIZE):
+        """
+        Async generator yielding the content of a file as bytes chunks of at
+        most chunk_size. Raises FileNotFoundError if the file cannot be read.
+        """
+        offset = 0
+        while True:
+            result = await self._read_chunk(path, offset, chunk_size)
+            if result is None:
+                raise FileNotFoundError(path)
+            data, size = result
+            if data:
+                yield data
+            offset += len(data)
+            if not data or offset >= size:
+                return
+
+    def open_write(self, path, append=False, chunk_size=CHUNK_SIZE):
+        """
+        Return a MemFSWriter for streaming bytes into a file, e.g.
+        async with memfs.open_write(path) as f: await f.write(data)
+        """
+        return MemFSWriter(self, path, append=append, chunk_size=chunk_size)
+
+    async def read_bytes(self, path, chunk_size=CHUNK_SIZE):
+        """
+        Return the content of a file as bytes, transferred in chunks.
+        Returns None if the file does not exist or cannot be read.
+        """
+        chunks = []
+        try:
+            async for chunk in self.open_read(path, chunk_size=chunk_size):
+                chunks.append(chunk)
+        except FileNotFoundError:
+            return None
+        return b"".join(chunks)
+
+    async def digest(self, paths):
+        """
+        Return a dict mapping each path to the sha256 hex digest of its
+        content, or None if it is not a readable file. Hashing is done in
+        the page. Raises OSError on failure.
+        """
+        digests = await self._call("digestFiles", list(paths))
+        if isinstance(digests, str):
+            raise OSError(digests)
+        return digests
+
+    async def collect_artifacts(self, globs, cwd="/home/pyodide", max_bytes=None):
+        """
+        Return the files matching globs as a list of artifact dicts (see
+        unpack_artifacts()), read, hashed and transferred in one round trip.
+        Relative globs are matched under cwd with the walk() include syntax,
+        absolute ones against the full path. Files that would take the total
+        past max_bytes are listed without data.
+        Raises OSError on failure.
+        """
+        return unpack_artifacts(await self._call("collectArtifacts", cwd, list(globs), max_bytes, []))
+
+    async def write_bytes(self, path, data, append=False, chunk_size=CHUNK_SIZE):
+        """
+        Write bytes to a file, transferred in chunks.
+        If append is True, the data is appended rather than overwriting the file.
+        Returns True if successful, False otherwise.
+        """
+        writer = self.open_write(path, append=append, chunk_size=chunk_size)
+        try:
+            await writer.write(data)
+            await writer.close()
+        except OSError:
+            return False
+        return True
+
+    # --- archives ---
+
+    @staticmethod
+    def _temp_path():
+        return f"/tmp/.agentbox-archive-{uuid.uuid4().hex}"
+
+    async def import_archive(self, source, dest, format=None):
+        """
+        Unpack a tar or zip archive into the directory dest.
+        source is the archive as bytes or the path of an archive on the host.
+        The archive crosses into the page as one binary transfer and is
+        unpacked inside Pyodide; format ("zip", or "tar" for any tar
+        compression) is detected from the content when not given.
+        Returns the number of files extracted. Raises OSError on failure.
+        """
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, "rb") as f:
+                data = f.read()
+        else:
+            data = bytes(source)
+        if format is None:
+            format = "zip" if data[:4] == b"PK\x03\x04" else "tar"
+
+        tmp_path = self._temp_path()
+        if not await self.write_bytes(tmp_path, data, chunk_size=max(len(data), 1)):
+            raise OSError(f"Error writing archive to {tmp_path}")
+        self._invalidate(dest)
+        result = await self._call("unpackArchive", tmp_path, dest, format)
+        if isinstance(result, str):
+            raise OSError(result)
+        return result
+
+    async def export_archive_stream(self, src, format="tar", chunk_size=CHUNK_SIZE):
+        """
+        Async generator packing the file or directory src into an archive
+        inside Pyodide and yielding it as bytes chunks.
+        format is "tar", "tar.gz" or "zip". Raises OSError on failure.
+        """
+        tmp_path = self._temp_path()
+        result = await self._call("packArchive", src, tmp_path, format)
+        if isinstance(result, str):
+            raise OSError(result)
+        try:
+            async for chunk in self.open_read(tmp_path, chunk_size=chunk_size):
+                yield chunk
+        finally:
+            await self._call("removeFile", tmp_path)
+
+    async def export_archive(self, src, format="tar", path=None):
+        """
+        Pack the file or directory src into a tar or zip archive.
+        Returns the archive as bytes, or, if path is given, writes it to that
+        host file and returns the path. Raises OSError on failure.
+        """
+        if path is None:
+            chunks = [chunk async for chunk in self.export_archive_stream(src, format=format)]
+            return b"".join(chunks)
+        with open(path, "wb") as f:
+            async for chunk in self.export_archive_stream(src, format=format):
+                f.write(chunk)
+        return path
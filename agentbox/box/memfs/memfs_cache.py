@@ -0,0 +1,88 @@
+import copy
+import posixpath
+from collections import OrderedDict
+
+
+# Directory the Pyodide filesystem resolves relative paths against.
+MEMFS_CWD = "/home/pyodide"
+
+
+def normalize_path(path, cwd=MEMFS_CWD):
+    path = posixpath.join(cwd, path or "/")
+    path = posixpath.normpath(path)
+    # normpath keeps a leading "//", which POSIX allows to mean something else.
+    return "/" + path.lstrip("/")
+
+
+class MemFSCache:
+    """
+    Host-side cache of MemFS directory listings.
+
+    Entries are keyed by (directory, recursive, info) and tagged with the
+    generation they were read in. Mutations made through MemFS invalidate
+    the affected listings; bump_generation() invalidates everything and is
+    called whenever code that may touch the filesystem runs in the page.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.generation = 0
+        # Counts invalidations, so a listing read while a mutation was in
+        # flight is not stored.
+        self.mutations = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, directory, recursive, info):
+        """
+        Return a copy of the cached listing, or None on a miss.
+        """
+        key = (normalize_path(directory), recursive, info)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != self.generation:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return copy.deepcopy(entry[1])
+
+    @property
+    def version(self):
+        return (self.generation, self.mutations)
+
+    def put(self, directory, recursive, info, value, version=None):
+        # Error strings from the page, and listings read while the
+        # filesystem changed, are not cached.
+        if isinstance(value, str) or (version is not None and version != self.version):
+            return
+        key = (normalize_path(directory), recursive, info)
+        self._entries[key] = (self.generation, copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, path):
+        """
+        Drop listings that may include a change at path: the listing of its
+        parent, recursive listings of any ancestor, and listings inside path.
+        """
+        self.mutations += 1
+        path = normalize_path(path)
+        parent = posixpath.dirname(path)
+        for key in list(self._entries):
+            directory, recursive = key[0], key[1]
+            prefix = directory.rstrip("/") + "/"
+            if (directory == parent or directory == path or directory.startswith(path.rstrip("/") + "/")
+                    or (recursive and parent.startswith(prefix))):
+                del self._entries[key]
+
+    def bump_generation(self):
+        """
+        Invalidate every entry, e.g. after code ran that may have changed the filesystem.
+        """
+        self.generation += 1
+        self._entries.clear()
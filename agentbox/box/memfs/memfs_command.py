@@ -14,11 +14,16 @@ class MemFSCommand:
         """
         Parse the input command string and dispatch to the corresponding MemFS method.
         Returns the result of the operation or an error dictionary if parsing fails.
+        Input holding several commands (separated by ";" or newlines) is run
+        as a script, returning a list of results.
         """
         parsed = self.parser.parse(input_str)
 
         # print(parsed)
 
+        if isinstance(parsed, list):
+            return await self.run_commands(parsed)
+
         if 'error' in parsed:
             # Return parser error if parsing fails.
             return parsed
@@ -53,8 +58,92 @@ class MemFSCommand:
                 path = parsed.get('path')
                 append = parsed.get('append', False)
                 return await self.memfs.write_file(path, content, append=append)
+            elif cmd == 'find':
+                return await self.memfs.find(parsed.get('path'), name=parsed.get('name'),
+                                             type=parsed.get('type'), max_depth=parsed.get('maxdepth'))
+            elif cmd == 'grep':
+                return await self.memfs.grep(parsed.get('pattern'), parsed.get('path'),
+                                             ignore_case=parsed.get('ignore_case', False),
+                                             recursive=parsed.get('recursive', False),
+                                             max_count=parsed.get('max_count'))
+            elif cmd == 'head':
+                return await self.memfs.head(parsed.get('path'), parsed.get('lines', 10))
+            elif cmd == 'tail':
+                return await self.memfs.tail(parsed.get('path'), parsed.get('lines', 10))
+            elif cmd == 'wc':
+                return await self.memfs.wc(parsed.get('path'))
+            elif cmd == 'du':
+                return await self.memfs.du(parsed.get('path') or "/")
             else:
                 return {'error': f'Unknown command: {cmd}'}
         except Exception as e:
             return {'error': str(e)}
 
+    async def script(self, script_str, stop_on_error=False):
+        """
+        Parse a script of commands separated by ";" or newlines and run it
+        in a single browser round trip.
+        Returns a list with one result per command (an error dictionary for
+        commands that failed or were skipped), or an error dictionary if
+        parsing fails.
+        """
+        parsed = self.parser.parse_script(script_str)
+        if isinstance(parsed, dict):
+            return parsed
+        return await self.run_commands(parsed, stop_on_error=stop_on_error)
+
+    def _add_to_batch(self, batch, parsed):
+        cmd = parsed.get('command')
+        if cmd == 'ls':
+            batch.list_dir(parsed.get('path') or "/", recursive=parsed.get('recursive', False),
+                           info=parsed.get('info', False))
+        elif cmd == 'cp':
+            batch.copy(parsed.get('src'), parsed.get('dst'))
+        elif cmd == 'rm':
+            batch.remove_file(parsed.get('path'))
+        elif cmd == 'mkdir':
+            batch.mkdir(parsed.get('path'))
+        elif cmd == 'rmdir':
+            batch.rmdir(parsed.get('path'))
+        elif cmd == 'get':
+            batch.read_file(parsed.get('path'))
+        elif cmd == 'put':
+            batch.write_file(parsed.get('path'), parsed.get('content'), append=parsed.get('append', False))
+        elif cmd == 'find':
+            batch.find(parsed.get('path'), name=parsed.get('name'), type=parsed.get('type'),
+                       max_depth=parsed.get('maxdepth'))
+        elif cmd == 'grep':
+            batch.grep(parsed.get('pattern'), parsed.get('path'), ignore_case=parsed.get('ignore_case', False),
+                       recursive=parsed.get('recursive', False), max_count=parsed.get('max_count'))
+        elif cmd == 'head':
+            batch.head(parsed.get('path'), parsed.get('lines', 10))
+        elif cmd == 'tail':
+            batch.tail(parsed.get('path'), parsed.get('lines', 10))
+        elif cmd == 'wc':
+            batch.wc(parsed.get('path'))
+        elif cmd == 'du':
+            batch.du(parsed.get('path') or "/")
+        else:
+            raise ValueError(f'Unknown command: {cmd}')
+
+    async def run_commands(self, commands, stop_on_error=False):
+        """
+        Run a list of parsed commands as one MemFS batch.
+        """
+        batch = self.memfs.batch()
+        try:
+            for parsed in commands:
+                self._add_to_batch(batch, parsed)
+            results = await batch.run(stop_on_error=stop_on_error)
+        except Exception as e:
+            return {'error': str(e)}
+
+        output = []
+        for result in results:
+            if result.get('ok'):
+                output.append(result.get('result'))
+            elif result.get('skipped'):
+                output.append({'error': 'Skipped after an earlier error'})
+            else:
+                output.append({'error': result.get('error')})
+        return output
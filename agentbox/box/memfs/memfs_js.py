@@ -0,0 +1,777 @@
+# JavaScript helper library used by MemFS.
+#
+# The library is installed once per page under globalThis.__agentbox_fs and
+# its functions are then called by name with structured arguments, so no
+# per-call source is generated, sent over CDP or compiled by V8.
+# It resolves the filesystem through globalThis.pyodide at call time.
+
+MEMFS_NAMESPACE = "__agentbox_fs"
+
+MEMFS_JS = r'''
+(() => {
+    if (globalThis.__agentbox_fs) return;
+
+    const FS = () => globalThis.pyodide._module.FS;
+    const isDirMode = (mode) => (mode & 0x4000) === 0x4000;
+    const join = (dir, entry) => dir === "/" ? "/" + entry : dir + "/" + entry;
+    const entriesOf = (fs, path) => fs.readdir(path).filter(e => e !== "." && e !== "..");
+
+    function encode(buffer) {
+        let binary = "";
+        for (let i = 0; i < buffer.length; i += 0x8000) {
+            binary += String.fromCharCode.apply(null, buffer.subarray(i, i + 0x8000));
+        }
+        return btoa(binary);
+    }
+
+    function decode(data) {
+        const binary = atob(data);
+        const buffer = new Uint8Array(binary.length);
+        for (let i = 0; i < binary.length; i++) {
+            buffer[i] = binary.charCodeAt(i);
+        }
+        return buffer;
+    }
+
+    // --- listing ---
+
+    function statItem(fs, fullPath, item) {
+        let stat = fs.stat(fullPath);
+        if (isDirMode(stat.mode)) {
+            item.type = "dir";
+            item.size = null;
+        } else {
+            item.type = "file";
+            item.size = stat.size;
+        }
+        return item;
+    }
+
+    function listDir(path) {
+        try {
+            return entriesOf(FS(), path);
+        } catch (e) {
+            return "Error reading directory: " + e.message;
+        }
+    }
+
+    function listDirInfo(path) {
+        const fs = FS();
+        let entries;
+        try {
+            entries = entriesOf(fs, path);
+        } catch (e) {
+            return "Error reading directory: " + e.message;
+        }
+        return entries.map(entry => {
+            let item = { name: entry };
+            try {
+                statItem(fs, join(path, entry), item);
+            } catch (e) {
+                item.error = e.message;
+            }
+            return item;
+        });
+    }
+
+    function listRecursive(path) {
+        const fs = FS();
+        let result = {};
+        let entries;
+        try {
+            entries = entriesOf(fs, path);
+        } catch (e) {
+            return "Error reading directory: " + e.message;
+        }
+        entries.forEach(entry => {
+            let fullPath = join(path, entry);
+            try {
+                if (isDirMode(fs.stat(fullPath).mode)) {
+                    result[entry] = listRecursive(fullPath);
+                } else {
+                    result[entry] = "file";
+                }
+            } catch (e) {
+                result[entry] = "Error: " + e.message;
+            }
+        });
+        return result;
+    }
+
+    function listRecursiveInfo(path) {
+        const fs = FS();
+        let entries;
+        try {
+            entries = entriesOf(fs, path);
+        } catch (e) {
+            return "Error reading directory: " + e.message;
+        }
+        return entries.map(entry => {
+            let fullPath = join(path, entry);
+            let item = { name: entry };
+            try {
+                statItem(fs, fullPath, item);
+                if (item.type === "dir") {
+                    item.children = listRecursiveInfo(fullPath);
+                }
+            } catch (e) {
+                item.error = e.message;
+            }
+            return item;
+        });
+    }
+
+    // --- paginated walk ---
+
+    // Glob syntax: "*" and "?" stay within a path segment, "**" spans
+    // segments. Patterns without "/" match the entry name, others the path
+    // relative to the walk root.
+    function globToRegExp(glob) {
+        let re = "";
+        for (let i = 0; i < glob.length; i++) {
+            const c = glob[i];
+            if (c === "*") {
+                if (glob[i + 1] === "*") {
+                    i++;
+                    if (glob[i + 1] === "/") {
+                        i++;
+                        re += "(?:.*/)?";
+                    } else {
+                        re += ".*";
+                    }
+                } else {
+                    re += "[^/]*";
+                }
+            } else if (c === "?") {
+                re += "[^/]";
+            } else if ("\\^$+.()|{}[]".includes(c)) {
+                re += "\\" + c;
+            } else {
+                re += c;
+            }
+        }
+        return new RegExp("^" + re + "$");
+    }
+
+    function globMatcher(globs) {
+        if (!globs || globs.length === 0) return null;
+        const compiled = globs.map(g => [g.includes("/"), globToRegExp(g.replace(/^\/+/, ""))]);
+        return (relPath, name) => compiled.some(([byPath, re]) => re.test(byPath ? relPath : name));
+    }
+
+    // Walks the tree depth first, returning at most pageSize entries and a
+    // cursor to resume from (null once the walk is complete). The cursor is
+    // a stack of [directory, depth, next entry index] frames, so the page
+    // keeps no state between calls. Each directory is read and sorted at
+    // most once per call.
+    function walkPage(root, cursor, pageSize, maxDepth, include, exclude) {
+        const fs = FS();
+        const sortedNames = new Map();
+        const includes = globMatcher(include);
+        const excludes = globMatcher(exclude);
+        const base = root === "/" ? "/" : root.replace(/\/+$/, "");
+        if (!cursor) {
+            try {
+                if (!isDirMode(fs.stat(base).mode)) {
+                    return "Error reading directory: Not a directory";
+                }
+            } catch (e) {
+                return "Error reading directory: " + e.message;
+            }
+            cursor = [[base, 0, 0]];
+        }
+        const stack = cursor;
+        const entries = [];
+        while (stack.length > 0 && entries.length < pageSize) {
+            const frame = stack[stack.length - 1];
+            const [dir, depth] = frame;
+            let names = sortedNames.get(dir);
+            if (names === undefined) {
+                try {
+                    names = entriesOf(fs, dir).sort();
+                } catch (e) {
+                    stack.pop();
+                    continue;
+                }
+                sortedNames.set(dir, names);
+            }
+            if (frame[2] >= names.length) {
+                stack.pop();
+                continue;
+            }
+            const name = names[frame[2]++];
+            const path = join(dir, name);
+            const relPath = base === "/" ? path.slice(1) : path.slice(base.length + 1);
+            if (excludes && excludes(relPath, name)) continue;
+            const item = { path: path, name: name, depth: depth + 1 };
+            try {
+                statItem(fs, path, item);
+            } catch (e) {
+                item.error = e.message;
+            }
+            if (!includes || includes(relPath, name)) {
+                entries.push(item);
+            }
+            if (item.type === "dir" && (maxDepth === null || depth + 1 < maxDepth)) {
+                stack.push([path, depth + 1, 0]);
+            }
+        }
+        return { entries: entries, cursor: stack.length > 0 ? stack : null };
+    }
+
+    // --- content commands ---
+    // These run entirely in the page and return only the requested slices.
+    // Failures are reported as "Error ..." strings.
+
+    function isDirPath(fs, path) {
+        return isDirMode(fs.stat(path).mode);
+    }
+
+    function find(root, name, type, maxDepth, limit) {
+        const paths = [];
+        let cursor = null;
+        do {
+            const page = walkPage(root, cursor, limit, maxDepth, name ? [name] : [], []);
+            if (typeof page === "string") return page;
+            for (const entry of page.entries) {
+                if (type === "f" && entry.type !== "file") continue;
+                if (type === "d" && entry.type !== "dir") continue;
+                if (paths.length >= limit) return { paths: paths, truncated: true };
+                paths.push(entry.path);
+            }
+            cursor = page.cursor;
+        } while (cursor !== null);
+        return { paths: paths, truncated: false };
+    }
+
+    function readText(fs, path) {
+        const data = fs.readFile(path, { encoding: "binary" });
+        // Treat files with NUL bytes in their first block as binary.
+        if (data.subarray(0, 8192).includes(0)) return null;
+        return new TextDecoder().decode(data);
+    }
+
+    function grep(pattern, path, ignoreCase, recursive, maxCount, maxLineLength) {
+        const fs = FS();
+        let regex;
+        try {
+            regex = new RegExp(pattern, ignoreCase ? "i" : "");
+        } catch (e) {
+            return "Error in pattern: " + e.message;
+        }
+        let files;
+        try {
+            if (isDirPath(fs, path)) {
+                if (!recursive) return "Error: " + path + " is a directory";
+                files = [];
+                let cursor = null;
+                do {
+                    const page = walkPage(path, cursor, 1000, null, [], []);
+                    page.entries.forEach(e => { if (e.type === "file") files.push(e.path); });
+                    cursor = page.cursor;
+                } while (cursor !== null);
+            } else {
+                files = [path];
+            }
+        } catch (e) {
+            return "Error: " + e.message;
+        }
+        const matches = [];
+        for (const file of files) {
+            let text;
+            try {
+                text = readText(fs, file);
+            } catch (e) {
+                if (files.length === 1) return "Error reading file " + file + ": " + e.message;
+                continue;
+            }
+            if (text === null) continue;
+            const lines = text.split("\n");
+            for (let i = 0; i < lines.length; i++) {
+                if (!regex.test(lines[i])) continue;
+                if (matches.length >= maxCount) return { matches: matches, truncated: true };
+                matches.push({ path: file, line: i + 1, text: lines[i].slice(0, maxLineLength) });
+            }
+        }
+        return { matches: matches, truncated: false };
+    }
+
+    function splitLines(text) {
+        const lines = text.split("\n");
+        if (lines.length > 0 && lines[lines.length - 1] === "") lines.pop();
+        return lines;
+    }
+
+    function head(path, count) {
+        try {
+            const lines = splitLines(FS().readFile(path, { encoding: "utf8" }));
+            return lines.slice(0, count).join("\n");
+        } catch (e) {
+            return "Error reading file " + path + ": " + e.message;
+        }
+    }
+
+    function tail(path, count) {
+        try {
+            const lines = splitLines(FS().readFile(path, { encoding: "utf8" }));
+            return lines.slice(Math.max(0, lines.length - count)).join("\n");
+        } catch (e) {
+            return "Error reading file " + path + ": " + e.message;
+        }
+    }
+
+    function wc(path) {
+        try {
+            const data = FS().readFile(path, { encoding: "binary" });
+            const text = new TextDecoder().decode(data);
+            let lines = 0;
+            for (let i = 0; i < data.length; i++) {
+                if (data[i] === 10) lines++;
+            }
+            const words = text.split(/\s+/).filter(w => w.length > 0).length;
+            return { path: path, lines: lines, words: words, bytes: data.length };
+        } catch (e) {
+            return "Error reading file " + path + ": " + e.message;
+        }
+    }
+
+    function du(path) {
+        const fs = FS();
+        const result = { path: path, bytes: 0, files: 0, dirs: 0 };
+        try {
+            if (!isDirPath(fs, path)) {
+                result.bytes = fs.stat(path).size;
+                result.files = 1;
+                return result;
+            }
+        } catch (e) {
+            return "Error: " + e.message;
+        }
+        let cursor = null;
+        do {
+            const page = walkPage(path, cursor, 1000, null, [], []);
+            for (const entry of page.entries) {
+                if (entry.type === "dir") {
+                    result.dirs++;
+                } else if (entry.type === "file") {
+                    result.files++;
+                    result.bytes += entry.size;
+                }
+            }
+            cursor = page.cursor;
+        } while (cursor !== null);
+        return result;
+    }
+
+    // --- files and directories ---
+
+    function readFile(path) {
+        try {
+            return FS().readFile(path, { encoding: "utf8" });
+        } catch (e) {
+            return null;
+        }
+    }
+
+    function writeFile(path, content, flag) {
+        try {
+            FS().writeFile(path, content, { encoding: "utf8", flags: flag });
+            return true;
+        } catch (e) {
+            return false;
+        }
+    }
+
+    function attempt(fn) {
+        try {
+            fn();
+            return true;
+        } catch (e) {
+            return false;
+        }
+    }
+
+    const removeFile = (path) => attempt(() => FS().unlink(path));
+    const mkdir = (path) => attempt(() => FS().mkdir(path));
+    const rmdir = (path) => attempt(() => FS().rmdir(path));
+
+    function copyRecursively(fs, src, dest) {
+        let stat;
+        try {
+            stat = fs.stat(src);
+        } catch (e) {
+            return "Error getting stats for " + src + ": " + e.message;
+        }
+        if (isDirMode(stat.mode)) {
+            try {
+                fs.mkdir(dest);
+            } catch (e) {
+                // Ignore error if directory already exists.
+                if (!(e && e.errno === 20)) {
+                    return "Error creating directory " + dest + ": " + e.message;
+                }
+            }
+            let entries;
+            try {
+                entries = entriesOf(fs, src);
+            } catch (e) {
+                return "Error reading directory " + src + ": " + e.message;
+            }
+            for (const entry of entries) {
+                let result = copyRecursively(fs, join(src, entry), join(dest, entry));
+                if (result !== true) {
+                    return result;
+                }
+            }
+        } else {
+            let content;
+            try {
+                content = fs.readFile(src, { encoding: "binary" });
+            } catch (e) {
+                return "Error reading file " + src + ": " + e.message;
+            }
+            try {
+                fs.writeFile(dest, content, { encoding: "binary" });
+            } catch (e) {
+                return "Error writing file " + dest + ": " + e.message;
+            }
+        }
+        return true;
+    }
+
+    const copy = (src, dest) => copyRecursively(FS(), src, dest);
+
+    // --- chunked binary transfer ---
+
+    // Returns [base64 data, total file size], or null if the file cannot be read.
+    function readChunk(path, offset, length) {
+        const fs = FS();
+        let stream;
+        try {
+            const size = fs.stat(path).size;
+            stream = fs.open(path, "r");
+            const buffer = new Uint8Array(Math.max(0, Math.min(length, size - offset)));
+            const n = fs.read(stream, buffer, 0, buffer.length, offset);
+            return [encode(buffer.subarray(0, n)), size];
+        } catch (e) {
+            return null;
+        } finally {
+            if (stream) fs.close(stream);
+        }
+    }
+
+    function writeChunk(path, data, flag) {
+        const fs = FS();
+        let stream;
+        try {
+            const buffer = decode(data);
+            stream = fs.open(path, flag);
+            fs.write(stream, buffer, 0, buffer.length);
+            return true;
+        } catch (e) {
+            return false;
+        } finally {
+            if (stream) fs.close(stream);
+        }
+    }
+
+    // --- archives ---
+
+    // Python helpers for packing and unpacking tar/zip archives, run inside
+    // Pyodide in their own namespace so they never touch user globals.
+    const ARCHIVE_PY = `
+import os
+import shutil
+import tarfile
+import zipfile
+import posixpath
+
+def _safe_target(dest, name):
+    target = posixpath.normpath(posixpath.join(dest, name))
+    if target != dest and not target.startswith(dest.rstrip("/") + "/"):
+        raise ValueError("unsafe path in archive: " + name)
+    return target
+
+def unpack(src, dest, fmt):
+    dest = posixpath.normpath(dest)
+    os.makedirs(dest, exist_ok=True)
+    count = 0
+    try:
+        if fmt == "zip":
+            with zipfile.ZipFile(src) as archive:
+                for info in archive.infolist():
+                    target = _safe_target(dest, info.filename)
+                    if info.is_dir():
+                        os.makedirs(target, exist_ok=True)
+                        continue
+                    os.makedirs(posixpath.dirname(target), exist_ok=True)
+                    with archive.open(info) as fsrc, open(target, "wb") as fdst:
+                        shutil.copyfileobj(fsrc, fdst)
+                    count += 1
+        else:
+            with tarfile.open(src, "r:*") as archive:
+                for member in archive.getmembers():
+                    target = _safe_target(dest, member.name)
+                    if member.isdir():
+                        os.makedirs(target, exist_ok=True)
+                    elif member.isfile():
+                        os.makedirs(posixpath.dirname(target), exist_ok=True)
+                        with archive.extractfile(member) as fsrc, open(target, "wb") as fdst:
+                            shutil.copyfileobj(fsrc, fdst)
+                        count += 1
+    finally:
+        os.unlink(src)
+    return count
+
+def _walk_files(src, exclude):
+    if os.path.isfile(src):
+        yield src, posixpath.basename(src)
+        return
+    for dirpath, dirnames, filenames in os.walk(src):
+        dirnames.sort()
+        for name in sorted(filenames):
+            path = posixpath.join(dirpath, name)
+            if path != exclude:
+                yield path, posixpath.relpath(path, src)
+
+def pack(src, out, fmt):
+    src = posixpath.normpath(src)
+    if not os.path.exists(src):
+        raise FileNotFoundError(src)
+    count = 0
+    if fmt == "zip":
+        with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as archive:
+            for path, name in _walk_files(src, out):
+                archive.write(path, name)
+                count += 1
+    else:
+        mode = "w:gz" if fmt in ("tar.gz", "tgz") else "w"
+        with tarfile.open(out, mode) as archive:
+            for path, name in _walk_files(src, out):
+                archive.add(path, name, recursive=False)
+                count += 1
+    return count
+
+def digest(paths):
+    import hashlib
+    result = {}
+    for path in paths:
+        try:
+            sha = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    sha.update(chunk)
+            result[path] = sha.hexdigest()
+        except OSError:
+            result[path] = None
+    return result
+`;
+
+    let archiveNamespace = null;
+
+    function archiveHelper(name) {
+        const pyodide = globalThis.pyodide;
+        if (archiveNamespace === null) {
+            archiveNamespace = pyodide.globals.get("dict")();
+            pyodide.runPython(ARCHIVE_PY, { globals: archiveNamespace });
+        }
+        return archiveNamespace.get(name);
+    }
+
+    // Returns the number of files extracted, or an error string.
+    function unpackArchive(src, dest, format) {
+        let fn;
+        try {
+            fn = archiveHelper("unpack");
+            return fn(src, dest, format);
+        } catch (e) {
+            try { FS().unlink(src); } catch (ignored) {}
+            return "Error unpacking archive: " + e.message;
+        } finally {
+            if (fn) fn.destroy();
+        }
+    }
+
+    // Returns the number of files packed, or an error string.
+    function packArchive(src, out, format) {
+        let fn;
+        try {
+            fn = archiveHelper("pack");
+            return fn(src, out, format);
+        } catch (e) {
+            try { FS().unlink(out); } catch (ignored) {}
+            return "Error packing archive: " + e.message;
+        } finally {
+            if (fn) fn.destroy();
+        }
+    }
+
+    // Returns a map of path to sha256 hex digest (null for unreadable
+    // files), or an error string. Hashing runs in the page so file contents
+    // never leave it.
+    function digestFiles(paths) {
+        let fn, digests;
+        try {
+            fn = archiveHelper("digest");
+            digests = fn(paths);
+            return digests.toJs({ dict_converter: Object.fromEntries });
+        } catch (e) {
+            return "Error computing digests: " + e.message;
+        } finally {
+            if (digests) digests.destroy();
+            if (fn) fn.destroy();
+        }
+    }
+
+    // --- artifacts ---
+
+    // Collects the files matching globs into one payload: a list of
+    // {path, size, sha256, offset} entries and a single base64 string with
+    // their contents back to back. Relative globs are matched under cwd like
+    // walkPage() includes; absolute ones against the full path. Files that
+    // would take the payload past maxBytes are listed with skipped set and
+    // no offset. Paths in remove are deleted once read.
+    function collectArtifacts(cwd, globs, maxBytes, remove) {
+        const fs = FS();
+        const seen = new Set();
+        const found = [];
+        for (const glob of globs) {
+            let root = cwd, include = [glob], test = null;
+            if (glob.startsWith("/")) {
+                // Walk from the deepest directory without wildcards.
+                const parts = glob.split("/");
+                let i = 1;
+                while (i < parts.length - 1 && !/[*?]/.test(parts[i])) i++;
+                root = parts.slice(0, i).join("/") || "/";
+                include = [];
+                const re = globToRegExp(glob);
+                test = (path) => re.test(path);
+            }
+            let cursor = null;
+            do {
+                const page = walkPage(root, cursor, 1000, null, include, []);
+                // A missing directory simply matches nothing.
+                if (typeof page === "string") break;
+                for (const entry of page.entries) {
+                    if (entry.type !== "file" || seen.has(entry.path)) continue;
+                    if (test !== null && !test(entry.path)) continue;
+                    seen.add(entry.path);
+                    found.push(entry);
+                }
+                cursor = page.cursor;
+            } while (cursor !== null);
+        }
+        found.sort((a, b) => a.path < b.path ? -1 : a.path > b.path ? 1 : 0);
+
+        const digests = digestFiles(found.map(entry => entry.path));
+        if (typeof digests === "string") return digests;
+        const artifacts = [];
+        const chunks = [];
+        let total = 0;
+        for (const entry of found) {
+            const artifact = { path: entry.path, size: entry.size, sha256: digests[entry.path] };
+            if (maxBytes !== null && total + entry.size > maxBytes) {
+                artifact.skipped = true;
+            } else {
+                let data;
+                try {
+                    data = fs.readFile(entry.path, { encoding: "binary" });
+                } catch (e) {
+                    continue;
+                }
+                artifact.offset = total;
+                artifact.size = data.length;
+                chunks.push(data);
+                total += data.length;
+            }
+            artifacts.push(artifact);
+        }
+        const payload = new Uint8Array(total);
+        let offset = 0;
+        for (const chunk of chunks) {
+            payload.set(chunk, offset);
+            offset += chunk.length;
+        }
+        for (const path of remove || []) {
+            try { fs.unlink(path); } catch (e) {}
+        }
+        return { artifacts: artifacts, data: encode(payload) };
+    }
+
+    // --- batches ---
+
+    // Batch operations throw on failure so the error can be reported.
+    function orThrow(result) {
+        if (typeof result === "string" && result.startsWith("Error")) throw new Error(result);
+        return result;
+    }
+
+    const batchOps = {
+        mkdir: (a) => { FS().mkdir(a.path); return true; },
+        makedirs: (a) => { FS().mkdirTree(a.path); return true; },
+        rmdir: (a) => { FS().rmdir(a.path); return true; },
+        remove_file: (a) => { FS().unlink(a.path); return true; },
+        write_file: (a) => {
+            FS().writeFile(a.path, a.content, { encoding: "utf8", flags: a.append ? "a" : "w" });
+            return true;
+        },
+        write_bytes: (a) => {
+            FS().writeFile(a.path, decode(a.data), { encoding: "binary", flags: a.append ? "a" : "w" });
+            return true;
+        },
+        read_file: (a) => FS().readFile(a.path, { encoding: "utf8" }),
+        read_bytes: (a) => encode(FS().readFile(a.path, { encoding: "binary" })),
+        copy: (a) => {
+            const result = copy(a.src, a.dest);
+            if (result !== true) throw new Error(result);
+            return true;
+        },
+        list_dir: (a) => {
+            const list = a.recursive ? (a.info ? listRecursiveInfo : listRecursive) : (a.info ? listDirInfo : listDir);
+            const result = list(a.path);
+            if (typeof result === "string") throw new Error(result);
+            return result;
+        },
+        exists: (a) => { try { FS().stat(a.path); return true; } catch (e) { return false; } },
+        find: (a) => orThrow(find(a.path, a.name, a.type, a.max_depth, a.limit)),
+        grep: (a) => orThrow(grep(a.pattern, a.path, a.ignore_case, a.recursive, a.max_count, a.max_line_length)),
+        head: (a) => orThrow(head(a.path, a.lines)),
+        tail: (a) => orThrow(tail(a.path, a.lines)),
+        wc: (a) => orThrow(wc(a.path)),
+        du: (a) => orThrow(du(a.path)),
+    };
+
+    function batch(ops, stopOnError) {
+        const results = [];
+        let failed = false;
+        for (const [op, args] of ops) {
+            if (failed) {
+                results.push({ op: op, ok: false, skipped: true });
+                continue;
+            }
+            try {
+                if (!(op in batchOps)) throw new Error("Unknown operation: " + op);
+                results.push({ op: op, ok: true, result: batchOps[op](args) });
+            } catch (e) {
+                results.push({ op: op, ok: false, error: e.message || String(e) });
+                failed = stopOnError;
+            }
+        }
+        return results;
+    }
+
+    globalThis.__agentbox_fs = {
+        encode, decode, join, isDirMode,
+        listDir, listDirInfo, listRecursive, listRecursiveInfo,
+        globToRegExp, globMatcher, walkPage,
+        find, grep, head, tail, wc, du,
+        readFile, writeFile, removeFile, mkdir, rmdir, copy,
+        readChunk, writeChunk,
+        unpackArchive, packArchive, digestFiles, collectArtifacts,
+        batchOps, batch,
+    };
+})();
+'''
+
+# Calls a library function by name; the source is constant so it is compiled once.
+MEMFS_CALL_JS = "([name, args]) => globalThis.__agentbox_fs[name](...args)"
@@ -1,12 +1,21 @@
+import threading
+
 from lark import Lark, Transformer, Token, Tree, v_args
 
 class MemFSParser:
     grammar = r"""
-        start: put_cmd | command
+        start: script
+
+        // A script is one or more statements separated by ";" or newlines.
+        // Empty statements (blank lines, repeated separators) are allowed.
+        script: statement? (_SEP statement?)*
+        statement: put_cmd | command
+        _SEP: /[;\r\n]/
 
         // A command is either a put_cmd (starting with a quoted string)
         // or one of the following commands.
         command: ls_cmd | cp_cmd | rm_cmd | mkdir_cmd | rmdir_cmd | get_cmd
+               | find_cmd | grep_cmd | head_cmd | tail_cmd | wc_cmd | du_cmd
 
         // The ls command: after "ls" you may have zero or more options followed by an optional path.
         ls_cmd: "ls" option* path?
@@ -21,6 +30,30 @@ class MemFSParser:
         rmdir_cmd: "rmdir" path
         get_cmd: "get" path
 
+        // Content commands, run inside the page.
+        // find [path] [-name GLOB] [-type f|d] [-maxdepth N]
+        find_cmd: "find" path? find_option*
+        find_option: FIND_FLAG value
+                   | "-maxdepth" INT -> find_maxdepth
+        FIND_FLAG: "-name" | "-type"
+
+        // grep [-i] [-r] [-m N] PATTERN path
+        grep_cmd: "grep" grep_option* value path
+        grep_option: GREP_FLAG
+                   | "-m" INT -> grep_max_count
+        GREP_FLAG: "-i" | "-r"
+
+        // head/tail [-n N] path
+        head_cmd: "head" line_count? path
+        tail_cmd: "tail" line_count? path
+        line_count: "-n" INT
+
+        wc_cmd: "wc" path
+        du_cmd: "du" path?
+
+        // An argument that may be quoted (patterns, globs).
+        value: QUOTED_STRING | path
+
         // The put command: a quoted string, an operator, the literal "put", and a path.
         put_cmd: QUOTED_STRING OPERATOR "put" path
 
@@ -29,17 +62,19 @@ class MemFSParser:
 
         // Terminals:
         // OPTION: any token that starts with a dash.
-        OPTION: /-\S+/
-        // A path is any sequence of non-whitespace characters that does not start with a dash or ">".
-        path: /[^-\s>][^\s>]*/
+        OPTION: /-[^\s;]+/
+        // A path is any sequence of non-whitespace characters that does not start with a dash or ">",
+        // and does not contain the statement separator ";".
+        path: /[^-\s>;][^\s>;]*/
 
         // Terminals for quoted strings (support both double- and single-quoted)
         DOUBLE_QUOTED_STRING: /"(\\.|[^"\\])*"/
         SINGLE_QUOTED_STRING: /'(\\.|[^'\\])*'/
         QUOTED_STRING: DOUBLE_QUOTED_STRING | SINGLE_QUOTED_STRING
 
-        %import common.WS
-        %ignore WS
+        %import common.INT
+        %import common.WS_INLINE
+        %ignore WS_INLINE
     """
 
     class MemFSTransformer(Transformer):
@@ -50,6 +85,17 @@ class MemFSParser:
         def start(self, result):
             return result
 
+        def script(self, children):
+            return [child for child in children if child is not None]
+
+        @v_args(inline=True)
+        def statement(self, result):
+            return result
+
+        @v_args(inline=True)
+        def command(self, result):
+            return result
+
         # --- put command ---
         @v_args(inline=True)
         def put_cmd(self, quoted, operator, path):
@@ -116,6 +162,76 @@ class MemFSParser:
         def get_cmd(self, path):
             return {"command": "get", "path": self.extract_value(path)}
 
+        # --- content commands ---
+        def find_cmd(self, children):
+            result = {"command": "find", "path": "/", "name": None, "type": None, "maxdepth": None}
+            for child in children:
+                if isinstance(child, tuple):
+                    result[child[0]] = child[1]
+                else:
+                    result["path"] = self.extract_value(child)
+            return result
+
+        @v_args(inline=True)
+        def find_option(self, flag, value):
+            return (self.extract_value(flag)[1:], value)
+
+        @v_args(inline=True)
+        def find_maxdepth(self, count):
+            return ("maxdepth", int(count))
+
+        def grep_cmd(self, children):
+            *options, pattern, path = children
+            flags = [opt for opt in options if isinstance(opt, str)]
+            max_count = None
+            for opt in options:
+                if isinstance(opt, int):
+                    max_count = opt
+            return {
+                "command": "grep",
+                "pattern": pattern,
+                "path": self.extract_value(path),
+                "ignore_case": "-i" in flags,
+                "recursive": "-r" in flags,
+                "max_count": max_count
+            }
+
+        @v_args(inline=True)
+        def grep_option(self, flag):
+            return self.extract_value(flag)
+
+        @v_args(inline=True)
+        def grep_max_count(self, count):
+            return int(count)
+
+        @v_args(inline=True)
+        def line_count(self, count):
+            return int(count)
+
+        def head_cmd(self, children):
+            lines = children[0] if len(children) == 2 else 10
+            return {"command": "head", "lines": lines, "path": self.extract_value(children[-1])}
+
+        def tail_cmd(self, children):
+            lines = children[0] if len(children) == 2 else 10
+            return {"command": "tail", "lines": lines, "path": self.extract_value(children[-1])}
+
+        @v_args(inline=True)
+        def wc_cmd(self, path):
+            return {"command": "wc", "path": self.extract_value(path)}
+
+        def du_cmd(self, children):
+            path = self.extract_value(children[0]) if children else "/"
+            return {"command": "du", "path": path}
+
+        @v_args(inline=True)
+        def value(self, token):
+            # Remove the surrounding quotes from quoted arguments.
+            text = self.extract_value(token)
+            if len(text) >= 2 and text[0] == text[-1] and text[0] in "'\"":
+                return text[1:-1]
+            return text
+
         @v_args(inline=True)
         def path(self, token):
             return self.extract_value(token)
@@ -137,19 +253,52 @@ class MemFSParser:
             result = result.children[0]
         return result
 
+    # The LALR tables are built once per process and shared by all parsers;
+    # the transformer is stateless, so one Lark instance serves everyone.
+    # cache=True also stores the analysed grammar on disk for later processes.
+    _shared_parser = None
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def shared_parser(cls):
+        if cls._shared_parser is None:
+            with cls._shared_lock:
+                if cls._shared_parser is None:
+                    cls._shared_parser = Lark(
+                        cls.grammar,
+                        parser="lalr",
+                        transformer=cls.MemFSTransformer(),
+                        cache=True
+                    )
+        return cls._shared_parser
+
     def __init__(self):
-        self.parser = Lark(
-            self.grammar,
-            parser="lalr",
-            transformer=self.MemFSTransformer()
-        )
+        self.parser = self.shared_parser()
 
-    def parse(self, command_str: str):
+    def parse_script(self, script_str: str):
+        """
+        Parse a script of commands separated by ";" or newlines in one pass.
+        Returns a list of command dicts, or an error dict if parsing fails.
+        """
         try:
-            result = self.parser.parse(command_str)
-            return self._unwrap(result)
+            result = self.parser.parse(script_str)
+            return [self._unwrap(command) for command in result]
         except Exception as e:
-            return {"error": str(e), "input": command_str}
+            return {"error": str(e), "input": script_str}
+
+    def parse(self, command_str: str):
+        """
+        Parse a single command into a dict. Input holding several commands
+        returns a list of dicts, as parse_script() does.
+        """
+        commands = self.parse_script(command_str)
+        if isinstance(commands, dict):
+            return commands
+        if len(commands) == 1:
+            return commands[0]
+        if not commands:
+            return {"error": "Empty command", "input": command_str}
+        return commands
 
 # --- Example usage ---
 if __name__ == "__main__":
@@ -169,7 +318,15 @@ if __name__ == "__main__":
         "rmdir /old/folder",
         "get /home/user/document.txt",
         "'hello' > put /old/folder/file.txt",
-        "\"hello world\" >> put /append/file.txt"
+        "\"hello world\" >> put /append/file.txt",
+        "mkdir /a; mkdir /a/b\n'x; y' > put /a/b/f.txt\nls -r /a",
+        "find /home -name '*.py' -type f -maxdepth 2",
+        "grep -i -m 5 'def \\w+' /home/user/main.py",
+        "grep -r TODO /home/user",
+        "head -n 20 /home/user/log.txt",
+        "tail /home/user/log.txt",
+        "wc /home/user/log.txt",
+        "du /home/user"
     ]
     for cmd in test_commands:
         print(parser.parse(cmd))
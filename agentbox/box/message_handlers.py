@@ -0,0 +1,197 @@
+import copy
+import json
+import time
+import asyncio
+from collections import OrderedDict
+
+
+class MessageHandlerRegistry:
+    """
+    Routes messages sent from sandbox code (messaging.send) to async
+    handlers registered by message type.
+
+    Replies of handlers registered with cacheable=True are kept in a shared
+    LRU cache with a per-handler TTL, and concurrent identical messages are
+    coalesced so the handler runs once. Each handler can be given a limit
+    on how many of its calls run at once.
+    """
+
+    def __init__(self, cache_size=1024, default_ttl=60, type_key="type", default_handler=None):
+        """
+        cache_size: replies kept in the shared cache across all handlers.
+        default_ttl: seconds a cached reply stays valid unless the handler sets its own.
+        type_key: message key holding the message type.
+        default_handler: async callable for messages with no registered type;
+        without one such messages raise LookupError.
+        """
+        self.cache_size = cache_size
+        self.default_ttl = default_ttl
+        self.type_key = type_key
+        self.default_handler = default_handler
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._handlers = {}
+        self._cache = OrderedDict()
+        self._in_flight = {}
+
+    def register(self, message_type, handler, max_concurrency=None, cacheable=False, ttl=None):
+        """
+        Register an async callable handler(message) -> reply for message_type.
+        max_concurrency limits the handler's simultaneous calls.
+        cacheable replies are reused for identical messages for ttl seconds.
+        """
+        self._handlers[message_type] = {
+            "handler": handler,
+            "semaphore": asyncio.Semaphore(max_concurrency) if max_concurrency else None,
+            "cacheable": cacheable,
+            "ttl": self.default_ttl if ttl is None else ttl,
+        }
+
+    def unregister(self, message_type):
+        self._handlers.pop(message_type, None)
+        self.invalidate(message_type)
+
+    def invalidate(self, message_type=None):
+        """
+        Drop cached replies, for one message type or all of them.
+        """
+        for key in list(self._cache):
+            if message_type is None or key[0] == message_type:
+                del self._cache[key]
+
+    def _cache_key(self, message_type, message):
+        try:
+            return message_type, json.dumps(message, sort_keys=True, default=repr)
+        except (TypeError, ValueError):
+            return None
+
+    def _cached(self, key):
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires, reply = entry
+        if expires < time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return entry
+
+    def _store(self, key, reply, ttl):
+        if ttl <= 0 or self.cache_size <= 0:
+            return
+        self._cache[key] = (time.monotonic() + ttl, copy.deepcopy(reply))
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def _call(self, entry, message):
+        if entry["semaphore"] is None:
+            return await entry["handler"](message)
+        async with entry["semaphore"]:
+            return await entry["handler"](message)
+
+    async def handle(self, message):
+        """
+        Dispatch a message to its handler and return the reply.
+        Handler exceptions propagate to the caller (and to the sandbox).
+        """
+        message_type = message.get(self.type_key) if isinstance(message, dict) else None
+        entry = self._handlers.get(message_type)
+        if entry is None:
+            if self.default_handler is None:
+                raise LookupError(f"No handler registered for message type {message_type!r}")
+            return await self.default_handler(message)
+
+        key = self._cache_key(message_type, message) if entry["cacheable"] else None
+        if key is None:
+            return await self._call(entry, message)
+
+        cached = self._cached(key)
+        if cached is not None:
+            self.hits += 1
+            return copy.deepcopy(cached[1])
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.create_task(self._fetch(key, entry, message))
+            # Retrieve a failure even if every caller has gone away.
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._in_flight[key] = task
+        # Cancelling one caller must not cancel the call the others await.
+        return copy.deepcopy(await asyncio.shield(task))
+
+    async def _fetch(self, key, entry, message):
+        # The handler call shared by every caller of an identical message.
+        try:
+            reply = await self._call(entry, message)
+        finally:
+            self._in_flight.pop(key, None)
+        self._store(key, reply, entry["ttl"])
+        return reply
+
+
+def to_message_value(value):
+    """
+    Convert a backend result into plain data that can be sent to the sandbox.
+    Graph objects are converted with their to_dict()/to_json() methods.
+    """
+    if value is None or isinstance(value, (str, int, float, bool, bytes)):
+        return value
+    if isinstance(value, dict):
+        return {str(k): to_message_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [to_message_value(v) for v in value]
+    if hasattr(value, "to_dict"):
+        return to_message_value(value.to_dict())
+    if hasattr(value, "to_json"):
+        return json.loads(value.to_json())
+    try:
+        return [to_message_value(v) for v in value]
+    except TypeError:
+        return str(value)
+
+
+class KGraphMessageHandler:
+    """
+    Message handler answering knowledge-graph lookups with a KGraphService.
+
+    Messages look like {"type": "kgraph", "op": "get_object", "args": {...}},
+    where op is one of the read-only service methods in READ_OPS and args
+    are its keyword arguments. The service is synchronous, so calls run in
+    a worker thread. Register it as cacheable so repeated lookups are
+    served from the registry's cache:
+
+        registry.register("kgraph", KGraphMessageHandler(service),
+                          max_concurrency=8, cacheable=True, ttl=300)
+    """
+
+    READ_OPS = (
+        "get_object",
+        "get_object_list",
+        "query",
+        "filter_query",
+        "get_graph_all_objects",
+        "get_frame",
+        "get_frames",
+        "get_frame_id",
+        "get_frames_id",
+        "get_frames_root",
+        "get_graph_objects_type",
+        "get_graph_objects_tag",
+        "list_graphs",
+    )
+
+    def __init__(self, kgraph_service):
+        self.kgraph_service = kgraph_service
+
+    async def __call__(self, message):
+        op = message.get("op")
+        if op not in self.READ_OPS:
+            raise ValueError(f"Unsupported kgraph op: {op!r}")
+        args = message.get("args") or {}
+        result = await asyncio.to_thread(getattr(self.kgraph_service, op), **args)
+        return {"op": op, "result": to_message_value(result)}
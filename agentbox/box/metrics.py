@@ -0,0 +1,132 @@
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+
+# Upper bounds of the histogram buckets, for seconds and for byte counts.
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+class ExecutionTimer:
+    """
+    Collects a per-phase timing breakdown for one execution, in milliseconds.
+    Phases that run more than once are summed.
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000)
+
+    def record(self, name, elapsed_ms):
+        self.timings[name] = self.timings.get(name, 0.0) + elapsed_ms
+
+    def finish(self):
+        """
+        Return the timings with the wall-clock total since the timer started.
+        """
+        timings = {name: round(value, 3) for name, value in self.timings.items()}
+        timings["total"] = round((time.perf_counter() - self._start) * 1000, 3)
+        return timings
+
+
+class MetricsHook:
+    """
+    Receives execution metrics from CodeExecutorBox. The base class drops
+    everything; subclass it to forward metrics to a monitoring system.
+    Tags are a dict of label names to string values.
+    """
+
+    def increment(self, name, value=1, tags=None):
+        pass
+
+    def observe(self, name, value, tags=None):
+        pass
+
+
+class InMemoryMetrics(MetricsHook):
+    """
+    MetricsHook that keeps counters and histograms in memory.
+    snapshot() returns them as plain data; render() formats them in the
+    Prometheus text exposition format for scraping.
+    """
+
+    def __init__(self, buckets=None):
+        """
+        buckets: optional dict of histogram name to bucket upper bounds.
+        Histograms whose name ends in "_bytes" default to BYTES_BUCKETS,
+        others to SECONDS_BUCKETS.
+        """
+        self.buckets = dict(buckets or {})
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name, tags):
+        return name, tuple(sorted((tags or {}).items()))
+
+    def _bounds(self, name):
+        if name in self.buckets:
+            return tuple(self.buckets[name])
+        return BYTES_BUCKETS if name.endswith("_bytes") else SECONDS_BUCKETS
+
+    def increment(self, name, value=1, tags=None):
+        key = self._key(name, tags)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, tags=None):
+        key = self._key(name, tags)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                bounds = self._bounds(name)
+                histogram = {"bounds": bounds, "counts": [0] * (len(bounds) + 1), "sum": 0.0, "count": 0}
+                self._histograms[key] = histogram
+            histogram["counts"][bisect.bisect_left(histogram["bounds"], value)] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def snapshot(self):
+        """
+        Return {'counters': [...], 'histograms': [...]} with one entry per
+        name and tag set.
+        """
+        with self._lock:
+            counters = [{"name": name, "tags": dict(tags), "value": value}
+                        for (name, tags), value in self._counters.items()]
+            histograms = [{"name": name, "tags": dict(tags), "bounds": list(h["bounds"]),
+                           "counts": list(h["counts"]), "sum": h["sum"], "count": h["count"]}
+                          for (name, tags), h in self._histograms.items()]
+        return {"counters": counters, "histograms": histograms}
+
+    @staticmethod
+    def _labels(tags, extra=None):
+        items = list(tags.items()) + list((extra or {}).items())
+        if not items:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+    def render(self):
+        lines = []
+        snapshot = self.snapshot()
+        for counter in sorted(snapshot["counters"], key=lambda c: c["name"]):
+            lines.append(f"{counter['name']}{self._labels(counter['tags'])} {counter['value']}")
+        for h in sorted(snapshot["histograms"], key=lambda h: h["name"]):
+            cumulative = 0
+            for bound, count in zip(h["bounds"] + ["+Inf"], h["counts"]):
+                cumulative += count
+                lines.append(f"{h['name']}_bucket{self._labels(h['tags'], {'le': bound})} {cumulative}")
+            lines.append(f"{h['name']}_sum{self._labels(h['tags'])} {h['sum']}")
+            lines.append(f"{h['name']}_count{self._labels(h['tags'])} {h['count']}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,44 @@
+import asyncio
+
+
+_END = object()
+
+
+class ExecutionStream:
+    """
+    Async iterator over (stream, text) output chunks of a running execution.
+
+    Iterate it to receive stdout/stderr as the sandbox writes it, then await
+    result() for the final result dict. Chunks streamed before a timeout are
+    delivered even though the execution fails.
+    """
+
+    def __init__(self):
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    def on_output(self, stream, text):
+        self._queue.put_nowait((stream, text))
+
+    def start(self, coro):
+        self._task = asyncio.create_task(coro)
+        self._task.add_done_callback(lambda task: self._queue.put_nowait(_END))
+        return self
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        item = await self._queue.get()
+        if item is _END:
+            # Leave the marker for any other consumer.
+            self._queue.put_nowait(_END)
+            raise StopAsyncIteration
+        return item
+
+    async def result(self):
+        return await self._task
+
+    def cancel(self):
+        if self._task is not None:
+            self._task.cancel()
@@ -0,0 +1,254 @@
+import os
+import json
+import hashlib
+import mimetypes
+import urllib.request
+
+from agentbox.box.pyodide.pyodide_packages import PackageIndex
+
+
+PYODIDE_VERSION = "0.23.0"
+PYODIDE_CDN_BASE = f"https://cdn.jsdelivr.net/pyodide/v{PYODIDE_VERSION}/full/"
+
+# Files needed to boot the interpreter, fetched by fill().
+PYODIDE_CORE_FILES = [
+    "pyodide.js",
+    "pyodide.asm.js",
+    "pyodide.asm.wasm",
+    "python_stdlib.zip",
+    "repodata.json",
+]
+
+CONTENT_TYPES = {
+    ".js": "application/javascript",
+    ".mjs": "application/javascript",
+    ".wasm": "application/wasm",
+    ".json": "application/json",
+    ".zip": "application/zip",
+    ".whl": "application/zip",
+    ".tar": "application/x-tar",
+    ".data": "application/octet-stream",
+}
+
+MANIFEST_NAME = "manifest.json"
+
+# PyPI endpoints used by micropip, cached under these prefixes so installs
+# can be replayed offline. Wheel URLs are content-addressed; the JSON index
+# is cached as first seen, which also pins the versions micropip resolves.
+PYPI_PREFIXES = {
+    "https://pypi.org/pypi/": "pypi/index/",
+    "https://files.pythonhosted.org/": "pypi/files/",
+}
+
+
+def default_cache_dir(version=PYODIDE_VERSION):
+    base = os.environ.get("AGENTBOX_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "agentbox")
+    return os.path.join(base, "pyodide", version)
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PyodideAssetCache:
+    """
+    Serve Pyodide assets from a versioned local directory instead of the CDN.
+
+    install() registers a Playwright route on a browser context (or page) for
+    every request under the Pyodide base URL. Cached files are served from
+    disk with long-lived caching headers; missing files are fetched from the
+    CDN once, stored and recorded in a sha256 manifest. In offline mode,
+    missing files are answered with a 404 and nothing touches the network.
+    """
+
+    def __init__(self, cache_dir=None, version=PYODIDE_VERSION, base_url=None, offline=False, pypi=True):
+        """
+        pypi: also cache the PyPI index and wheels fetched by micropip.
+        """
+        self.version = version
+        self.pypi = pypi
+        self.base_url = base_url or f"https://cdn.jsdelivr.net/pyodide/v{version}/full/"
+        self.cache_dir = cache_dir or default_cache_dir(version)
+        self.offline = offline
+        self._manifest = None
+        self._repodata_hashes = None
+        # Files whose hash has already been checked by this process.
+        self._verified = set()
+
+    # --- manifest ---
+
+    def _manifest_path(self):
+        return os.path.join(self.cache_dir, MANIFEST_NAME)
+
+    @property
+    def manifest(self):
+        if self._manifest is None:
+            try:
+                with open(self._manifest_path(), "r", encoding="utf-8") as f:
+                    self._manifest = json.load(f)
+            except (OSError, ValueError):
+                self._manifest = {}
+        return self._manifest
+
+    def _save_manifest(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self._manifest_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._manifest_path())
+
+    def _expected_hash(self, name):
+        # Package files are checked against the hashes published in repodata.json.
+        if self._repodata_hashes is None:
+            self._repodata_hashes = {}
+            try:
+                with open(self.local_path("repodata.json"), "r", encoding="utf-8") as f:
+                    repodata = json.load(f)
+                for package in repodata.get("packages", {}).values():
+                    if package.get("file_name") and package.get("sha256"):
+                        self._repodata_hashes[package["file_name"]] = package["sha256"]
+            except (OSError, ValueError):
+                pass
+        return self._repodata_hashes.get(name) or self.manifest.get(name)
+
+    # --- local files ---
+
+    def local_path(self, name):
+        path = os.path.normpath(os.path.join(self.cache_dir, name))
+        if not path.startswith(os.path.normpath(self.cache_dir) + os.sep):
+            raise ValueError(f"Asset path escapes the cache directory: {name}")
+        return path
+
+    def is_cached(self, name):
+        """
+        Return True if the file is on disk and matches its recorded hash.
+        """
+        path = self.local_path(name)
+        if not os.path.isfile(path):
+            return False
+        if name in self._verified:
+            return True
+        expected = self._expected_hash(name)
+        if expected is not None and sha256_file(path) != expected:
+            return False
+        self._verified.add(name)
+        return True
+
+    def store(self, name, body):
+        """
+        Atomically write an asset into the cache and record its hash.
+        """
+        path = self.local_path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+        self.manifest[name] = hashlib.sha256(body).hexdigest()
+        self._save_manifest()
+        self._verified.add(name)
+        if name == "repodata.json":
+            self._repodata_hashes = None
+
+    def fill(self, names=None):
+        """
+        Download the given assets (the core runtime by default) into the cache.
+        Run once on a connected machine; the directory can then be copied to
+        air-gapped workers. Returns the list of names that were downloaded.
+        """
+        downloaded = []
+        for name in names or PYODIDE_CORE_FILES:
+            if self.is_cached(name):
+                continue
+            with urllib.request.urlopen(self.base_url + name) as response:
+                self.store(name, response.read())
+            downloaded.append(name)
+        return downloaded
+
+    def fill_packages(self, packages):
+        """
+        Download the distribution files of the given Pyodide packages and
+        their dependencies, so they can be loaded offline.
+        Returns the list of names that were downloaded.
+        """
+        self.fill(["repodata.json"])
+        return self.fill(PackageIndex.from_assets(self).file_names(packages))
+
+    def verify(self):
+        """
+        Re-hash every file in the manifest. Returns a dict of name -> bool.
+        """
+        self._verified.clear()
+        return {name: self.is_cached(name) for name in sorted(self.manifest)}
+
+    # --- playwright routing ---
+
+    def _headers(self, name):
+        ext = os.path.splitext(name)[1]
+        content_type = CONTENT_TYPES.get(ext) or mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if name.startswith("pypi/index/"):
+            content_type = "application/json"
+        headers = {
+            "Content-Type": content_type,
+            # Versioned assets never change, so let Chromium cache them
+            # (and its compiled wasm code cache) indefinitely.
+            "Cache-Control": "public, max-age=31536000, immutable",
+            "Access-Control-Allow-Origin": "*",
+            "Cross-Origin-Resource-Policy": "cross-origin",
+        }
+        expected = self.manifest.get(name)
+        if expected:
+            headers["ETag"] = f'"{expected}"'
+        return headers
+
+    async def install(self, target):
+        """
+        Route Pyodide asset requests on a Playwright BrowserContext or Page.
+        """
+        await target.route(f"{self.base_url}**", self._handle_route)
+        if self.pypi:
+            for prefix in PYPI_PREFIXES:
+                await target.route(f"{prefix}**", self._handle_route)
+
+    def _asset_name(self, url):
+        if url.startswith(self.base_url):
+            return url[len(self.base_url):]
+        for prefix, local_prefix in PYPI_PREFIXES.items():
+            if url.startswith(prefix):
+                return local_prefix + url[len(prefix):].rstrip("/")
+        return None
+
+    async def _handle_route(self, route):
+        url = route.request.url.split("?", 1)[0].split("#", 1)[0]
+        name = self._asset_name(url)
+        if not name or route.request.method != "GET":
+            await route.fallback()
+            return
+
+        if self.is_cached(name):
+            await route.fulfill(status=200, path=self.local_path(name), headers=self._headers(name))
+            return
+
+        if self.offline:
+            await route.fulfill(status=404, body=f"Pyodide asset not cached: {name}")
+            return
+
+        response = await route.fetch()
+        body = await response.body()
+        if response.status == 200:
+            self.store(name, body)
+            await route.fulfill(status=200, body=body, headers=self._headers(name))
+        else:
+            await route.fulfill(response=response, body=body)
+
+
+# --- Example usage ---
+if __name__ == "__main__":
+    cache = PyodideAssetCache()
+    print("Cache directory:", cache.cache_dir)
+    print("Downloaded:", cache.fill())
+    print("Verified:", cache.verify())
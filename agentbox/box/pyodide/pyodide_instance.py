@@ -0,0 +1,862 @@
+import time
+import json
+import base64
+import asyncio
+import inspect
+
+from agentbox.box.memfs.memfs import MemFS, unpack_artifacts
+from agentbox.box.memfs.memfs_js import MEMFS_JS
+from agentbox.box.pyodide.pyodide_assets import PYODIDE_CDN_BASE
+from agentbox.box.pyodide.pyodide_packages import PackageIndex, find_imports
+from agentbox.box.pyodide.pyodide_worker import (
+    WORKER_JS,
+    WORKER_HOST_JS,
+    WORKER_EVALUATE_JS,
+    bootstrap_url,
+    install_bootstrap_route,
+)
+
+# Python prelude run once when the interpreter boots. It installs the
+# messaging bridge used by sandbox code to talk to the host.
+PRELUDE = """
+import os
+import sys
+import json
+import base64
+import asyncio
+import js
+from io import StringIO
+
+class MessagingError(Exception):
+    pass
+
+def _agentbox_encode(value):
+    # bytes travel base64-encoded inside the JSON batch, with no JS conversion.
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {"__agentbox_bytes__": base64.b64encode(bytes(value)).decode("ascii")}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _agentbox_decode(obj):
+    if len(obj) == 1 and "__agentbox_bytes__" in obj:
+        return base64.b64decode(obj["__agentbox_bytes__"])
+    return obj
+
+class Messaging:
+    # Messages are queued with a request id and sent to the host in batches:
+    # everything sent in the same event loop turn travels in one binding call
+    # as a single JSON string, and replies are matched back by id. Calls can
+    # therefore be awaited concurrently, e.g. with asyncio.gather().
+    def __init__(self, max_batch=64, max_batch_bytes=65536):
+        self.max_batch = max_batch
+        self.max_batch_bytes = max_batch_bytes
+        self._next_id = 0
+        self._queue = []
+        self._queue_ids = []
+        self._queue_bytes = 0
+        self._pending = {}
+        self._flush_scheduled = False
+
+    async def send(self, message):
+        return await self.call(message)
+
+    def call(self, message):
+        # Returns a future for the reply; the message is sent on the next flush.
+        self._next_id += 1
+        call_id = self._next_id
+        encoded = json.dumps(message, default=_agentbox_encode)
+        future = asyncio.get_event_loop().create_future()
+        self._pending[call_id] = future
+        self._queue.append(f"[{call_id},{encoded}]")
+        self._queue_ids.append(call_id)
+        self._queue_bytes += len(encoded)
+        if len(self._queue) >= self.max_batch or self._queue_bytes >= self.max_batch_bytes:
+            self._flush()
+        elif not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_event_loop().call_soon(self._flush)
+        return future
+
+    async def gather(self, *messages):
+        return await asyncio.gather(*(self.call(message) for message in messages))
+
+    def _flush(self):
+        self._flush_scheduled = False
+        if not self._queue:
+            return
+        batch = "[" + ",".join(self._queue) + "]"
+        ids = self._queue_ids
+        self._queue = []
+        self._queue_ids = []
+        self._queue_bytes = 0
+        asyncio.ensure_future(self._dispatch(batch, ids))
+
+    async def _dispatch(self, batch, ids):
+        try:
+            replies = json.loads(await js.agentboxRpc(batch), object_hook=_agentbox_decode)
+        except Exception as e:
+            replies = [[call_id, False, f"{type(e).__name__}: {e}"] for call_id in ids]
+        for call_id, ok, value in replies:
+            future = self._pending.pop(call_id, None)
+            if future is None or future.done():
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(MessagingError(value))
+
+    def _clear(self):
+        # Drop calls left over from an earlier run.
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+        self._queue = []
+        self._queue_ids = []
+        self._queue_bytes = 0
+        self._flush_scheduled = False
+
+messaging = Messaging()
+_agentbox_messaging = messaging
+
+import time
+from pyodide.ffi import create_once_callable
+
+class _AgentboxStream(StringIO):
+    # Captures a stream and, when streaming, forwards it to the host in
+    # batches through the agentboxOutput binding.
+    def __init__(self, name, streaming=False, batch_size=4096, flush_interval=0.05):
+        super().__init__()
+        self.name = name
+        self.streaming = streaming
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending = []
+        self.pending_size = 0
+        # The first write is sent immediately; later ones are batched.
+        self.last_flush = float("-inf")
+        self.timer_scheduled = False
+
+    def write(self, text):
+        n = super().write(text)
+        if self.streaming and text:
+            self.pending.append(text)
+            self.pending_size += len(text)
+            if self.pending_size >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_interval:
+                self.flush()
+            elif not self.timer_scheduled:
+                # Flush later if the code yields to the event loop before writing again.
+                self.timer_scheduled = True
+                js.setTimeout(create_once_callable(self._timer_flush), int(self.flush_interval * 1000))
+        return n
+
+    def _timer_flush(self):
+        self.timer_scheduled = False
+        self.flush()
+
+    def flush(self):
+        if self.pending:
+            chunk = "".join(self.pending)
+            self.pending = []
+            self.pending_size = 0
+            js.agentboxOutput(self.name, chunk)
+        self.last_flush = time.monotonic()
+
+def _agentbox_begin(streaming, batch_size, flush_interval):
+    _agentbox_messaging._clear()
+    sys.stdout = _AgentboxStream("stdout", streaming, batch_size, flush_interval)
+    sys.stderr = _AgentboxStream("stderr", streaming, batch_size, flush_interval)
+
+def _agentbox_end():
+    for stream in (sys.stdout, sys.stderr):
+        if isinstance(stream, _AgentboxStream):
+            stream.flush()
+            stream.streaming = False
+    return [sys.stdout.getvalue(), sys.stderr.getvalue()]
+
+# There is no display to draw on, so figures are rendered off screen and
+# handed to the host as PNG artifacts instead.
+os.environ.setdefault("MPLBACKEND", "agg")
+
+def _agentbox_figures(directory):
+    # Save the open matplotlib figures as PNG files and close them.
+    pyplot = sys.modules.get("matplotlib.pyplot")
+    if pyplot is None:
+        return []
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for number in pyplot.get_fignums():
+        path = f"{directory}/figure_{number}.png"
+        pyplot.figure(number).savefig(path, format="png")
+        paths.append(path)
+    pyplot.close("all")
+    return paths
+"""
+
+# Python helpers used to return the interpreter to its post-boot baseline.
+# The baseline is captured once, after the prelude has run.
+RESET_PRELUDE = """
+import os
+import shutil
+
+class _AgentboxBaseline:
+    # Files are compared by size, mtime and whether they are symlinks;
+    # contents are only kept and compared for the few files present at
+    # boot, so reset cost does not grow with what a snippet wrote. Symlinks
+    # are recorded but never followed, so one planted under a reset path is
+    # removed like a file. Outside the reset paths, new entries at the root
+    # are removed and any change under /lib (the stdlib, site-packages) is
+    # reported so the instance is discarded.
+    def __init__(self, paths):
+        self.paths = list(paths)
+
+    def _scan(self, top, dirs, files):
+        try:
+            entries = list(os.scandir(top))
+        except OSError:
+            return
+        dirs.add(top)
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                self._scan(entry.path, dirs, files)
+            else:
+                st = entry.stat(follow_symlinks=False)
+                files[entry.path] = (st.st_size, round(st.st_mtime * 1000), entry.is_symlink())
+
+    def _snapshot(self):
+        dirs = set()
+        files = {}
+        for root in self.paths:
+            self._scan(root, dirs, files)
+        return dirs, files
+
+    def _lib_tree(self):
+        dirs = set()
+        files = {}
+        self._scan("/lib", dirs, files)
+        return dirs, files
+
+    def _read(self, path):
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def capture(self):
+        self.globals = dict(globals())
+        self.modules = set(sys.modules)
+        self.sys_path = list(sys.path)
+        self.environ = dict(os.environ)
+        self.cwd = os.getcwd()
+        self.dirs, self.files = self._snapshot()
+        self.contents = {path: self._read(path) for path, meta in self.files.items() if not meta[2]}
+        self.root = set(os.listdir("/"))
+        self.lib = self._lib_tree()
+
+    def rebase(self):
+        # Adopt the modules and /lib files present now, after packages load.
+        self.modules = set(sys.modules)
+        self.adopt_lib()
+
+    def lib_unchanged(self):
+        return self._lib_tree() == self.lib
+
+    def adopt_lib(self):
+        self.lib = self._lib_tree()
+
+    def reset(self, preserve_modules=()):
+        g = globals()
+        report = {"globals_removed": 0, "modules_removed": 0, "files_removed": 0, "problems": []}
+
+        # Drop user globals and restore rebound baseline names.
+        for name in [k for k in g if k not in self.globals]:
+            del g[name]
+            report["globals_removed"] += 1
+        for name, value in self.globals.items():
+            if g.get(name) is not value:
+                g[name] = value
+
+        # Forget modules imported since boot.
+        preserve = tuple(preserve_modules)
+        for name in [m for m in sys.modules if m not in self.modules]:
+            if preserve and name.split(".")[0] in preserve:
+                continue
+            del sys.modules[name]
+            report["modules_removed"] += 1
+
+        sys.stdout = StringIO()
+        sys.stderr = StringIO()
+        sys.path[:] = self.sys_path
+        sys.dont_write_bytecode = True
+        os.environ.clear()
+        os.environ.update(self.environ)
+
+        # Restore the working tree to its snapshot.
+        try:
+            os.chdir(self.cwd)
+        except OSError as e:
+            report["problems"].append(f"chdir: {e}")
+        dirs, files = self._snapshot()
+        for path, meta in files.items():
+            if path not in self.files or meta[2] != self.files[path][2]:
+                os.unlink(path)
+                report["files_removed"] += 1
+        for path in sorted(dirs - self.dirs, key=len, reverse=True):
+            try:
+                os.rmdir(path)
+            except OSError as e:
+                report["problems"].append(f"rmdir {path}: {e}")
+        for path in sorted(self.dirs - dirs, key=len):
+            os.makedirs(path, exist_ok=True)
+        for path, content in self.contents.items():
+            if content is None:
+                continue
+            rewritten = self._read(path) != content
+            if rewritten:
+                with open(path, "wb") as f:
+                    f.write(content)
+            if rewritten or files.get(path) != self.files[path]:
+                # Put the mtime back so the file matches the snapshot.
+                mtime = self.files[path][1] / 1000
+                os.utime(path, (mtime, mtime))
+
+        # Remove anything new at the root of the filesystem.
+        for name in set(os.listdir("/")) - self.root:
+            path = os.path.join("/", name)
+            try:
+                if os.path.isdir(path) and not os.path.islink(path):
+                    shutil.rmtree(path)
+                else:
+                    os.unlink(path)
+                report["files_removed"] += 1
+            except OSError as e:
+                report["problems"].append(f"remove {path}: {e}")
+
+        report["problems"].extend(self.verify(preserve))
+        report["ok"] = not report["problems"]
+        return report
+
+    def new_root_entries(self):
+        # [path, is_dir] for each entry created at the root since boot.
+        entries = []
+        for name in sorted(set(os.listdir("/")) - self.root):
+            path = os.path.join("/", name)
+            entries.append([path, os.path.isdir(path)])
+        return entries
+
+    def verify(self, preserve=()):
+        problems = []
+        g = globals()
+        extra = [k for k in g if k not in self.globals]
+        if extra:
+            problems.append(f"globals not removed: {extra}")
+        modules = [m for m in sys.modules if m not in self.modules and m.split(".")[0] not in preserve]
+        if modules:
+            problems.append(f"modules not removed: {modules}")
+        if os.getcwd() != self.cwd:
+            problems.append(f"cwd is {os.getcwd()}")
+        dirs, files = self._snapshot()
+        if dirs != self.dirs or files != self.files:
+            problems.append("working tree differs from snapshot")
+        if set(os.listdir("/")) != self.root:
+            problems.append("root directory differs from snapshot")
+        if self._lib_tree() != self.lib:
+            problems.append("files under /lib were modified")
+        return problems
+
+# Bytecode caches would be written under /lib and fail verification.
+sys.dont_write_bytecode = True
+_agentbox_baseline = _AgentboxBaseline(_agentbox_reset_paths)
+del _agentbox_reset_paths
+_agentbox_baseline.capture()
+"""
+
+def rpc_encode(value):
+    # Host side of the messaging encoding: bytes are sent base64-encoded.
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {"__agentbox_bytes__": base64.b64encode(bytes(value)).decode("ascii")}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def rpc_decode(obj):
+    if len(obj) == 1 and "__agentbox_bytes__" in obj:
+        return base64.b64decode(obj["__agentbox_bytes__"])
+    return obj
+
+
+# MemFS directories restored to their boot-time contents by reset().
+RESET_PATHS = ["/home/pyodide", "/tmp"]
+
+# Runs the preludes once Pyodide is on globalThis.pyodide (page or worker).
+SETUP_JS = """([prelude, resetPrelude, resetPaths]) => {
+    const pyodide = globalThis.pyodide;
+    pyodide.runPython(prelude);
+    pyodide.globals.set("_agentbox_reset_paths", pyodide.toPy(resetPaths));
+    pyodide.runPython(resetPrelude);
+}"""
+
+# Working directory that relative output globs are matched under, and where
+# captured matplotlib figures are written before they are collected.
+ARTIFACT_CWD = "/home/pyodide"
+FIGURE_DIR = "/tmp/agentbox_figures"
+
+RUN_JS = """async ([code, streaming, batchSize, flushInterval, artifacts]) => {
+    const pyodide = globalThis.pyodide;
+    const begin = pyodide.globals.get("_agentbox_begin");
+    const end = pyodide.globals.get("_agentbox_end");
+    // Clear any interrupt left over from an earlier timeout.
+    if (globalThis.__agentbox_interrupt) globalThis.__agentbox_interrupt[0] = 0;
+    let result;
+    try {
+        // Redirect stdout and stderr in Pyodide to capture output
+        begin(streaming, batchSize, flushInterval);
+        // Execute the provided code
+        await pyodide.runPythonAsync(code);
+        result = { success: true };
+    } catch (error) {
+        result = { success: false, error: `${error.name}: ${error.message}` };
+    }
+    // Retrieve captured output, flushing anything still pending
+    const captured = end();
+    [result.output, result.stderr] = captured.toJs();
+    captured.destroy();
+    begin.destroy();
+    end.destroy();
+    if (artifacts) {
+        // Figures and output files come back in the same reply as the output.
+        let figures = [];
+        if (artifacts.figures) {
+            const capture = pyodide.globals.get("_agentbox_figures");
+            try {
+                const paths = capture(artifacts.figureDir);
+                figures = paths.toJs();
+                paths.destroy();
+            } catch (error) {
+                result.figure_error = `${error.name}: ${error.message}`;
+            } finally {
+                capture.destroy();
+            }
+        }
+        const globs = artifacts.globs.concat(figures);
+        if (globs.length > 0) {
+            result.artifacts = globalThis.__agentbox_fs.collectArtifacts(
+                artifacts.cwd, globs, artifacts.maxBytes, figures);
+            result.figures = figures;
+        }
+    }
+    return result;
+}"""
+
+RESET_JS = """(preserve) => {
+    const pyodide = globalThis.pyodide;
+    const reset = pyodide.globals.get("_agentbox_baseline").reset;
+    const report = reset(pyodide.toPy(preserve));
+    try {
+        return report.toJs({ dict_converter: Object.fromEntries });
+    } finally {
+        report.destroy();
+        reset.destroy();
+    }
+}"""
+
+HEALTH_JS = "() => globalThis.pyodide.runPython('1 + 1') === 2"
+
+# Adds the modules imported and the /lib files installed so far to the reset
+# baseline, so preloaded packages are neither unloaded by reset() nor
+# reported as changes to /lib.
+REBASE_JS = "() => { globalThis.pyodide.runPython('_agentbox_baseline.rebase()'); }"
+
+NEW_ROOT_JS = """() => {
+    const entries = globalThis.pyodide.runPython("_agentbox_baseline.new_root_entries()");
+    try {
+        return entries.toJs();
+    } finally {
+        entries.destroy();
+    }
+}"""
+
+# Size of the interpreter's WebAssembly memory. It grows on demand and never
+# shrinks, so it is the page's high-water mark rather than live usage.
+HEAP_JS = "() => globalThis.pyodide._module.HEAPU8.length"
+
+# Loads Pyodide packages in one parallel loadPackage() call, then installs
+# any other requirements with micropip. The files they add under /lib join
+# the reset baseline, unless /lib had already been changed by user code.
+LOAD_PACKAGES_JS = """async ([packages, requirements, imports]) => {
+    const pyodide = globalThis.pyodide;
+    const quiet = { messageCallback: () => {} };
+    const clean = pyodide.runPython("_agentbox_baseline.lib_unchanged()");
+    if (packages.length > 0) {
+        await pyodide.loadPackage(packages, quiet);
+    }
+    if (requirements.length > 0) {
+        await pyodide.loadPackage("micropip", quiet);
+        const micropip = pyodide.pyimport("micropip");
+        const pyRequirements = pyodide.toPy(requirements);
+        try {
+            await micropip.install(pyRequirements);
+        } finally {
+            pyRequirements.destroy();
+            micropip.destroy();
+        }
+    }
+    // Import the modules now, so the first snippet does not pay for it.
+    for (const name of imports) {
+        try {
+            pyodide.pyimport(name).destroy();
+        } catch (e) {
+            // Not every declared module is importable on its own.
+        }
+    }
+    if (clean) {
+        pyodide.runPython("_agentbox_baseline.adopt_lib()");
+    }
+}"""
+
+LOAD_IMPORTS_JS = "(code) => globalThis.pyodide.loadPackagesFromImports(code, { messageCallback: () => {} })"
+
+
+class PyodideInstance:
+    """
+    A Playwright browser context and page with Pyodide loaded and attached
+    to window.pyodide, ready to execute code.
+    Instances are created and recycled by PyodidePool.
+
+    With worker=True, Pyodide runs in a dedicated Web Worker and the page
+    relays calls to it. Timeouts then raise KeyboardInterrupt inside the
+    interpreter, so the instance stays usable after a runaway snippet.
+    """
+
+    def __init__(self, context, page, base_url=PYODIDE_CDN_BASE, memfs_cache=False, worker=False,
+                 interrupt_grace=2.0, package_index=None):
+        self.context = context
+        self.page = page
+        self.base_url = base_url
+        self.worker = worker
+        # Seconds to wait for interrupted code to unwind before giving up.
+        self.interrupt_grace = interrupt_grace
+        # Set at boot when the worker can be interrupted (cross-origin isolated page).
+        self.interruptible = False
+        # Milliseconds spent creating the context, loading Pyodide and running the preludes.
+        self.boot_timings = {}
+        # Index of the Pyodide distribution's packages, and those loaded so far.
+        self.package_index = package_index if package_index is not None else PackageIndex()
+        self.loaded_packages = set()
+        # Top-level modules of the loaded packages and their dependencies,
+        # kept in sys.modules across resets.
+        self.preserve_modules = set()
+        self.memfs = MemFS(page, cache=memfs_cache, evaluate=self._evaluate if worker else None)
+        self.uses = 0
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        # Set when the page can no longer be trusted (e.g. after a timeout).
+        self.broken = False
+        # Async callable invoked for messages sent from sandbox code.
+        self.message_handler = None
+        # Callable (stream, text) receiving streamed output during a run.
+        self.output_handler = None
+        self._partial_output = []
+
+    @classmethod
+    async def create(cls, browser, assets=None, memfs_cache=False, worker=False, packages=(), package_index=None):
+        """
+        Open a new context and page on the browser and boot Pyodide in it.
+        If a PyodideAssetCache is given, assets are served from its local cache.
+        memfs_cache enables the host-side MemFS listing cache for the instance.
+        worker hosts Pyodide in a Web Worker (see the class docstring).
+        packages are loaded (and imported) once booted; see load_packages().
+        package_index defaults to the one built from the asset cache.
+        """
+        if package_index is None:
+            package_index = PackageIndex.from_assets(assets)
+        start = time.perf_counter()
+        context = await browser.new_context()
+        try:
+            base_url = PYODIDE_CDN_BASE
+            if assets is not None:
+                await assets.install(context)
+                base_url = assets.base_url
+            if worker:
+                await install_bootstrap_route(context, base_url)
+            page = await context.new_page()
+            instance = cls(context, page, base_url=base_url, memfs_cache=memfs_cache, worker=worker,
+                           package_index=package_index)
+            instance.boot_timings["context"] = (time.perf_counter() - start) * 1000
+            await instance.boot()
+            if packages:
+                loading = time.perf_counter()
+                await instance.load_packages(packages, warm_imports=True)
+                await instance._evaluate(REBASE_JS)
+                instance.boot_timings["packages"] = (time.perf_counter() - loading) * 1000
+        except Exception:
+            await context.close()
+            raise
+        return instance
+
+    async def boot(self):
+        """
+        Load pyodide.js, initialize the interpreter and run the prelude.
+        The MemFS helper library is installed before the page loads, or
+        loaded into the worker with Pyodide.
+        """
+        start = time.perf_counter()
+        await self.memfs.install()
+        await self.page.expose_function("sendMessage", self._send_message)
+        await self.page.expose_function("agentboxRpc", self._rpc)
+        await self.page.expose_function("agentboxOutput", self._on_output)
+        if self.worker:
+            await self.page.goto(bootstrap_url(self.base_url))
+            await self.page.evaluate(WORKER_HOST_JS)
+            self.interruptible = await self.page.evaluate(
+                "([source, indexURL, memfs]) => globalThis.__agentbox_worker.start(source, indexURL, memfs)",
+                [WORKER_JS, self.base_url, MEMFS_JS]
+            )
+        else:
+            await self.page.goto(f'data:text/html,<script src="{self.base_url}pyodide.js"></script>')
+            await self.page.evaluate("async () => { window.pyodide = await loadPyodide(); }")
+        loaded = time.perf_counter()
+        await self._evaluate(SETUP_JS, [PRELUDE, RESET_PRELUDE, RESET_PATHS])
+        self.boot_timings["load"] = (loaded - start) * 1000
+        self.boot_timings["prelude"] = (time.perf_counter() - loaded) * 1000
+
+    async def _evaluate(self, source, arg=None):
+        # Evaluate a function source with one argument where Pyodide lives.
+        if self.worker:
+            return await self.page.evaluate(WORKER_EVALUATE_JS, [source, arg])
+        return await self.page.evaluate(source, arg)
+
+    async def _interrupt(self):
+        # Raise KeyboardInterrupt in the worker's interpreter, if supported.
+        if not (self.worker and self.interruptible):
+            return False
+        try:
+            return await asyncio.wait_for(
+                self.page.evaluate("() => globalThis.__agentbox_worker.interrupt()"),
+                timeout=self.interrupt_grace
+            )
+        except Exception:
+            return False
+
+    async def load_packages(self, requirements, warm_imports=False):
+        """
+        Load requirements that are not loaded yet. Packages shipped with
+        Pyodide are fetched in one parallel loadPackage() call (from the
+        asset cache when one is installed); anything else is installed with
+        micropip. With warm_imports their modules are imported as well.
+        Their modules, and those of their dependencies, are kept imported
+        across resets.
+        Returns the requirements that were loaded. Raises on failure.
+        """
+        missing = [r for r in requirements if r not in self.loaded_packages]
+        if not missing:
+            return []
+        packages, others = self.package_index.split(missing)
+        imports = self.package_index.import_names(missing) if warm_imports else []
+        await self._evaluate(LOAD_PACKAGES_JS, [packages, others, imports])
+        self.loaded_packages.update(missing)
+        self.loaded_packages.update(packages)
+        dependencies = self.package_index.dependencies(packages)
+        self.preserve_modules.update(self.package_index.import_names(missing))
+        self.preserve_modules.update(self.package_index.import_names(sorted(dependencies)))
+        return missing
+
+    async def ensure_packages(self, code_string):
+        """
+        Load the Pyodide packages imported by the code that are not loaded
+        yet, found statically before it runs. Returns the packages loaded.
+        Without a package index, Pyodide resolves the imports itself; as
+        their modules are then unknown, an instance that loads anything
+        this way fails its next reset and is retired.
+        """
+        if not self.package_index:
+            await self._evaluate(LOAD_IMPORTS_JS, code_string)
+            return []
+        needed = self.package_index.packages_for_imports(find_imports(code_string))
+        return await self.load_packages(sorted(needed - self.loaded_packages))
+
+    async def _send_message(self, message):
+        # This function is invoked from the Pyodide context.
+        if self.message_handler is None:
+            return {"reply": "Message received", "original": message}
+        return await self.message_handler(message)
+
+    async def _rpc(self, batch):
+        # Invoked from the Pyodide context with a JSON batch of [id, message]
+        # pairs. Messages are handled concurrently; the reply is a JSON list
+        # of [id, ok, reply or error text].
+        calls = json.loads(batch, object_hook=rpc_decode)
+        replies = await asyncio.gather(*(self._rpc_call(call_id, message) for call_id, message in calls))
+        return json.dumps(replies, default=rpc_encode)
+
+    async def _rpc_call(self, call_id, message):
+        try:
+            return [call_id, True, await self._send_message(message)]
+        except Exception as e:
+            return [call_id, False, f"{type(e).__name__}: {e}"]
+
+    async def _on_output(self, stream, text):
+        # Invoked from the Pyodide context with a batch of stdout/stderr text.
+        self._partial_output.append((stream, text))
+        if self.output_handler is not None:
+            result = self.output_handler(stream, text)
+            if inspect.isawaitable(result):
+                await result
+
+    async def run(self, code_string, timeout=30, on_output=None, batch_size=4096, flush_interval=0.05,
+                  output_globs=None, capture_figures=False, max_artifact_bytes=None):
+        """
+        Execute code in the interpreter, capturing stdout and stderr.
+        Returns a dict with 'success', 'output', 'stderr' and, on failure, 'error'.
+        Files matching output_globs ("*.png", "out/**", "/tmp/*.csv"; relative
+        globs are matched under ARTIFACT_CWD) and, with capture_figures, the
+        open matplotlib figures are returned as 'artifacts': dicts with
+        'path', 'size', 'sha256', 'data' and 'kind' ("file" or "figure"),
+        collected in the same round trip as the output. Captured figures are
+        closed. Files past max_artifact_bytes in total come back without data.
+        If on_output is given, output is streamed to it as (stream, text)
+        chunks of up to batch_size characters, flushed at least every
+        flush_interval seconds while the code writes or awaits.
+        On timeout an interruptible worker instance raises KeyboardInterrupt
+        in the running code and stays usable. Otherwise, or if the code does
+        not stop within interrupt_grace seconds, the instance is marked
+        broken, as the page may still be busy. Output written before the
+        timeout is returned either way.
+        """
+        self.uses += 1
+        self.last_used = time.monotonic()
+        # User code may change the filesystem, so cached listings go stale.
+        self.memfs.bump_generation()
+        self.output_handler = on_output
+        self._partial_output = []
+        streaming = on_output is not None
+        artifacts = None
+        if output_globs or capture_figures:
+            artifacts = {
+                "globs": list(output_globs or ()),
+                "figures": capture_figures,
+                "figureDir": FIGURE_DIR,
+                "cwd": ARTIFACT_CWD,
+                "maxBytes": max_artifact_bytes,
+            }
+        timeout_error = f"TimeoutError: Pyodide code execution exceeded {timeout} seconds."
+
+        # Passing `code_string` as an argument avoids issues with escaping
+        # when embedding it in the JavaScript snippet.
+        evaluate_task = asyncio.create_task(
+            self._evaluate(RUN_JS, [code_string, streaming, batch_size, flush_interval, artifacts])
+        )
+
+        try:
+            done, _ = await asyncio.wait({evaluate_task}, timeout=timeout)
+            if done:
+                return self._unpack_artifacts(evaluate_task.result())
+
+            if await self._interrupt():
+                done, _ = await asyncio.wait({evaluate_task}, timeout=self.interrupt_grace)
+                if done and not evaluate_task.exception():
+                    result = self._unpack_artifacts(evaluate_task.result())
+                    result["success"] = False
+                    result["error"] = timeout_error
+                    result["interrupted"] = True
+                    return result
+
+            evaluate_task.cancel()
+            self.broken = True
+            return {
+                "success": False,
+                "error": timeout_error,
+                "output": "".join(text for stream, text in self._partial_output if stream == "stdout"),
+                "stderr": "".join(text for stream, text in self._partial_output if stream == "stderr"),
+            }
+        finally:
+            self.output_handler = None
+            self.memfs.bump_generation()
+
+    @staticmethod
+    def _unpack_artifacts(result):
+        if "artifacts" not in result:
+            return result
+        figures = set(result.pop("figures", ()))
+        try:
+            result["artifacts"] = unpack_artifacts(result["artifacts"])
+        except OSError as e:
+            result["artifacts"] = []
+            result["artifact_error"] = str(e)
+        for artifact in result["artifacts"]:
+            artifact["kind"] = "figure" if artifact["path"] in figures else "file"
+        return result
+
+    async def reset(self, preserve_modules=(), timeout=5):
+        """
+        Return the interpreter to its post-boot baseline without reloading
+        Pyodide: user globals are dropped, sys.modules is restored to the
+        boot-time set (except top-level packages in preserve_modules and
+        those of packages this instance loaded),
+        stdout/stderr are cleared and the MemFS working tree is restored to
+        its snapshot, with symlinks removed rather than followed. New entries
+        at the filesystem root are removed, and any change under /lib
+        (including site-packages) fails verification.
+        Returns a report dict whose 'ok' key is False if verification found
+        leftover state; such instances should not be reused.
+        """
+        start = time.perf_counter()
+        self.memfs.bump_generation()
+        try:
+            report = await asyncio.wait_for(
+                self._evaluate(RESET_JS, list(preserve_modules) + sorted(self.preserve_modules)),
+                timeout=timeout
+            )
+        except Exception as e:
+            self.broken = True
+            report = {"ok": False, "problems": [f"{type(e).__name__}: {e}"]}
+        report["elapsed_ms"] = (time.perf_counter() - start) * 1000
+        if not report["ok"]:
+            self.broken = True
+        return report
+
+    async def health_check(self, timeout=5):
+        """
+        Return True if the interpreter responds to a trivial evaluation.
+        """
+        if self.broken:
+            return False
+        try:
+            return await asyncio.wait_for(self._evaluate(HEALTH_JS), timeout=timeout)
+        except Exception:
+            return False
+
+    async def state_paths(self, timeout=5):
+        """
+        Return the MemFS paths that hold state written since boot, as
+        (path, is_dir) pairs: the reset paths, then every entry created at
+        the filesystem root. Writes inside other boot-time directories
+        (/lib, /usr, ...) are not covered.
+        """
+        entries = await asyncio.wait_for(self._evaluate(NEW_ROOT_JS), timeout=timeout)
+        return [(path, True) for path in RESET_PATHS] + [(path, bool(is_dir)) for path, is_dir in entries]
+
+    async def memory_usage(self, timeout=5):
+        """
+        Return {'wasm_heap', 'memfs'}: the size of the WebAssembly heap and
+        the bytes stored under state_paths(), in one round trip for MemFS.
+        Values are None if they could not be read.
+        """
+        usage = {"wasm_heap": None, "memfs": None}
+        if self.broken:
+            return usage
+        try:
+            usage["wasm_heap"] = await asyncio.wait_for(self._evaluate(HEAP_JS), timeout=timeout)
+            paths = await self.state_paths(timeout=timeout)
+            batch = self.memfs.batch()
+            for path, _ in paths:
+                batch.du(path)
+            results = await asyncio.wait_for(batch.run(stop_on_error=False), timeout=timeout)
+        except Exception:
+            return usage
+        usage["memfs"] = sum(r["result"]["bytes"] for r in results if r.get("ok"))
+        return usage
+
+    async def close(self):
+        try:
+            await self.context.close()
+        except Exception:
+            pass
@@ -0,0 +1,131 @@
+import ast
+import json
+import re
+
+
+def find_imports(code_string):
+    """
+    Return the top-level module names imported by the code, found statically.
+    Relative imports are ignored; code that does not parse imports nothing.
+    """
+    try:
+        tree = ast.parse(code_string)
+    except SyntaxError:
+        return set()
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            names.add(node.module.split(".")[0])
+    return names
+
+
+def canonical_name(name):
+    # PEP 503 normalization, as used for the keys of repodata.json.
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def requirement_name(requirement):
+    # "pandas>=2.0" -> "pandas"
+    return re.split(r"[<>=!~;\[\s]", requirement, maxsplit=1)[0]
+
+
+class PackageIndex:
+    """
+    Index of the packages shipped with a Pyodide distribution, read from its
+    repodata.json: which package provides each importable module, and what
+    each package depends on.
+    """
+
+    def __init__(self, repodata=None):
+        self.packages = (repodata or {}).get("packages", {})
+        self._by_import = {}
+        for key, package in self.packages.items():
+            for module in package.get("imports", []):
+                self._by_import.setdefault(module, key)
+
+    @classmethod
+    def from_assets(cls, assets):
+        """
+        Build the index from the repodata.json in a PyodideAssetCache.
+        Returns an empty index if there is no cache or it lacks repodata.json.
+        """
+        if assets is None or not assets.is_cached("repodata.json"):
+            return cls()
+        try:
+            with open(assets.local_path("repodata.json"), "r", encoding="utf-8") as f:
+                return cls(json.load(f))
+        except (OSError, ValueError):
+            return cls()
+
+    def __bool__(self):
+        return bool(self.packages)
+
+    def package_for_import(self, module):
+        return self._by_import.get(module)
+
+    def packages_for_imports(self, modules):
+        """
+        Return the Pyodide packages providing the given modules. Modules
+        from the standard library or unknown packages are skipped.
+        """
+        found = set()
+        for module in modules:
+            key = self._by_import.get(module)
+            # Modules bundled in the stdlib zip are listed without a file.
+            if key is not None and self.packages[key].get("file_name"):
+                found.add(key)
+        return found
+
+    def split(self, requirements):
+        """
+        Split declared requirements into Pyodide package names, loaded with
+        loadPackage(), and requirements left to micropip.
+        """
+        packages, others = [], []
+        for requirement in requirements:
+            key = canonical_name(requirement_name(requirement))
+            # Pyodide builds are loaded whatever version is asked for;
+            # PyPI has no wasm wheels for them.
+            if key in self.packages:
+                packages.append(key)
+            else:
+                others.append(requirement)
+        return packages, others
+
+    def import_names(self, requirements):
+        """
+        Return the top-level modules the requirements provide, used to keep
+        them imported across instance resets.
+        """
+        names = []
+        for requirement in requirements:
+            key = canonical_name(requirement_name(requirement))
+            package = self.packages.get(key)
+            if package is not None:
+                names.extend(package.get("imports", []))
+            else:
+                names.append(requirement_name(requirement).replace("-", "_"))
+        return names
+
+    def dependencies(self, names):
+        """
+        Return the given packages plus everything they depend on.
+        """
+        pending = [canonical_name(name) for name in names]
+        seen = set()
+        while pending:
+            key = pending.pop()
+            if key in seen or key not in self.packages:
+                continue
+            seen.add(key)
+            pending.extend(canonical_name(dep) for dep in self.packages[key].get("depends", []))
+        return seen
+
+    def file_names(self, names):
+        """
+        Return the distribution files needed to load the packages.
+        """
+        return sorted(self.packages[key]["file_name"] for key in self.dependencies(names)
+                      if self.packages[key].get("file_name"))
@@ -0,0 +1,270 @@
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+
+from playwright.async_api import async_playwright
+
+from agentbox.box.pyodide.pyodide_instance import PyodideInstance
+from agentbox.box.pyodide.pyodide_packages import PackageIndex, requirement_name
+
+
+class PyodidePool:
+    """
+    A pool of warm PyodideInstance pages sharing one headless Chromium.
+
+    Executions lease an instance from the pool and return it afterwards,
+    so the cost of launching the browser and booting Pyodide is paid once
+    per instance rather than once per call.
+    """
+
+    def __init__(self, min_size=1, max_size=4, max_uses=100, health_check=True, launch_options=None, assets=None,
+                 reset=True, preserve_modules=(), memfs_cache=False, worker=False, packages=(), manager=None):
+        """
+        min_size: number of instances kept warm at all times.
+        max_size: upper bound on live instances; further leases wait.
+        max_uses: an instance is recycled after this many executions.
+        health_check: verify an idle instance responds before leasing it.
+        launch_options: extra keyword arguments for chromium.launch().
+        assets: an optional PyodideAssetCache used to serve Pyodide locally.
+        reset: reset an instance to its post-boot baseline when it is released,
+        so it can safely run the next caller's code. Instances that fail
+        to reset cleanly are discarded.
+        preserve_modules: top-level packages kept in sys.modules across resets.
+        memfs_cache: enable the host-side MemFS listing cache on each instance.
+        worker: host Pyodide in a Web Worker so timeouts interrupt the running
+        code instead of discarding the instance.
+        packages: requirements loaded and imported on every instance as it
+        boots, kept in sys.modules across resets. Pyodide packages are
+        served from the asset cache; others are installed with micropip.
+        manager: an optional BoxManager. Instances are then placed on its
+        browser fleet instead of a browser launched by the pool, and
+        launch_options are ignored.
+        """
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("PyodidePool requires 0 <= min_size <= max_size and max_size >= 1")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_uses = max_uses
+        self.health_check = health_check
+        self.launch_options = launch_options or {}
+        self.assets = assets
+        self.reset = reset
+        self.memfs_cache = memfs_cache
+        self.worker = worker
+        self.packages = tuple(packages)
+        self.package_index = PackageIndex.from_assets(assets)
+        # Keep the declared packages and everything they pulled in imported.
+        dependencies = self.package_index.dependencies(requirement_name(r) for r in self.packages)
+        preserved = list(preserve_modules) + self.package_index.import_names(self.packages)
+        preserved += self.package_index.import_names(sorted(dependencies))
+        self.preserve_modules = tuple(dict.fromkeys(preserved))
+        self.manager = manager
+
+        self._playwright = None
+        self.browser = None
+        self._idle = deque()
+        # Live instances, including ones that are still booting.
+        self._size = 0
+        self._condition = asyncio.Condition()
+        self._closed = True
+        self._background = set()
+
+    async def start(self):
+        """
+        Launch the browser and warm min_size instances.
+        """
+        if not self._closed:
+            return
+        if self.manager is not None:
+            await self.manager.start()
+        else:
+            self._playwright = await async_playwright().start()
+            self.browser = await self._playwright.chromium.launch(headless=True, **self.launch_options)
+        self._closed = False
+        await asyncio.gather(*(self._add_idle_instance() for _ in range(self.min_size)))
+
+    async def stop(self):
+        """
+        Close every instance, the browser and the Playwright driver.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        for task in list(self._background):
+            task.cancel()
+        while self._idle:
+            await self._close_instance(self._idle.popleft())
+        if self.browser is not None:
+            await self.browser.close()
+            self.browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+        async with self._condition:
+            self._condition.notify_all()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def idle_count(self):
+        return len(self._idle)
+
+    async def _create_instance(self):
+        # The caller must have already reserved a slot in self._size.
+        options = dict(assets=self.assets, memfs_cache=self.memfs_cache, worker=self.worker,
+                       packages=self.packages, package_index=self.package_index)
+        try:
+            if self.manager is not None:
+                return await self.manager.open_instance(**options)
+            return await PyodideInstance.create(self.browser, **options)
+        except Exception:
+            async with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+    async def _add_idle_instance(self):
+        async with self._condition:
+            if self._size >= self.max_size:
+                return
+            self._size += 1
+        instance = await self._create_instance()
+        await self._park(instance)
+
+    async def _park(self, instance):
+        # Make an instance available for leasing. With a manager, idle
+        # instances are measured and those beyond min_size may be evicted
+        # to free memory.
+        async with self._condition:
+            self._idle.append(instance)
+            self._condition.notify()
+        if self.manager is not None:
+            self.manager.track(instance, self._evict, can_evict=lambda: self._evictable(instance),
+                               can_sample=lambda: instance in self._idle)
+
+    def _evictable(self, instance):
+        return instance in self._idle and self._size > self.min_size
+
+    async def _evict(self, instance):
+        async with self._condition:
+            if not self._evictable(instance):
+                return False
+            self._idle.remove(instance)
+        await self._discard(instance)
+        return True
+
+    async def _close_instance(self, instance):
+        if self.manager is not None:
+            await self.manager.close_instance(instance)
+        else:
+            await instance.close()
+
+    async def _discard(self, instance):
+        await self._close_instance(instance)
+        async with self._condition:
+            self._size -= 1
+            self._condition.notify()
+        self._replenish()
+
+    def _replenish(self):
+        # Top the pool back up to min_size in the background.
+        if self._closed:
+            return
+        for _ in range(self.min_size - self._size):
+            task = asyncio.create_task(self._add_idle_instance())
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+    def _take_idle(self):
+        # Prefer idle instances whose browser is within its limits. Returns
+        # None if every idle instance is on an overloaded browser.
+        for instance in self._idle:
+            if self.manager is None or not self.manager.placed_overloaded(instance):
+                self._idle.remove(instance)
+                return instance
+        return None
+
+    async def acquire(self):
+        """
+        Lease an instance, waiting if the pool is at max_size.
+        With a manager, idle instances on overloaded browsers are skipped
+        (or retired, at max_size) while a healthy browser has room.
+        The instance must be handed back with release().
+        """
+        if self.manager is not None:
+            await self.manager.refresh()
+        while True:
+            if self._closed:
+                raise RuntimeError("PyodidePool is not started")
+            instance = None
+            retire = None
+            create = False
+            async with self._condition:
+                if self._idle:
+                    instance = self._take_idle()
+                    if instance is not None:
+                        pass
+                    elif not self.manager.has_healthy_room():
+                        instance = self._idle.popleft()
+                    elif self._size < self.max_size:
+                        self._size += 1
+                        create = True
+                    else:
+                        retire = self._idle.popleft()
+                elif self._size < self.max_size:
+                    self._size += 1
+                    create = True
+                else:
+                    await self._condition.wait()
+                    continue
+
+            if retire is not None:
+                # Make room for an instance on a healthy browser.
+                await self._discard(retire)
+                continue
+            if create:
+                return await self._create_instance()
+
+            if self.health_check and not await instance.health_check():
+                await self._discard(instance)
+                continue
+            return instance
+
+    async def release(self, instance, discard=False):
+        """
+        Return a leased instance to the pool.
+        Broken instances, or ones that reached max_uses, are closed and replaced.
+        """
+        if discard or instance.broken or self._closed or instance.uses >= self.max_uses:
+            await self._discard(instance)
+            return
+        instance.message_handler = None
+        if self.reset:
+            report = await instance.reset(preserve_modules=self.preserve_modules)
+            if not report["ok"]:
+                await self._discard(instance)
+                return
+        await self._park(instance)
+
+    @asynccontextmanager
+    async def lease(self):
+        """
+        Async context manager that acquires an instance and releases it on exit.
+        """
+        instance = await self.acquire()
+        try:
+            yield instance
+        except BaseException:
+            await self.release(instance, discard=True)
+            raise
+        else:
+            await self.release(instance)
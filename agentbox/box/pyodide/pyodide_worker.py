@@ -0,0 +1,190 @@
+# Support for hosting Pyodide in a dedicated Web Worker instead of on the
+# page's main thread. The page only relays calls: code runs in the worker,
+# so a spinning snippet never blocks the page, and a SharedArrayBuffer
+# registered with pyodide.setInterruptBuffer() lets the host raise
+# KeyboardInterrupt inside the interpreter on timeout.
+#
+# SharedArrayBuffer is only available on cross-origin isolated pages, so the
+# page is loaded from a bootstrap URL under the Pyodide base URL that is
+# answered by a Playwright route with COOP/COEP headers.
+
+# Name of the routed bootstrap page, relative to the Pyodide base URL.
+BOOTSTRAP_NAME = "agentbox-worker.html"
+
+BOOTSTRAP_HEADERS = {
+    "Content-Type": "text/html",
+    "Cross-Origin-Opener-Policy": "same-origin",
+    "Cross-Origin-Embedder-Policy": "require-corp",
+    "Cross-Origin-Resource-Policy": "cross-origin",
+    "Cache-Control": "no-store",
+}
+
+BOOTSTRAP_HTML = "<!DOCTYPE html><html><head><meta charset=\"utf-8\"></head><body></body></html>"
+
+# Script run inside the worker. It loads Pyodide and the MemFS helper
+# library, evaluates function sources sent by the page, and forwards the
+# sendMessage/agentboxRpc/agentboxOutput bindings used by the prelude to
+# the page.
+WORKER_JS = r"""
+const hostCalls = new Map();
+let nextHostCall = 0;
+const compiled = new Map();
+
+function callHost(name, args) {
+    const id = ++nextHostCall;
+    return new Promise((resolve, reject) => {
+        hostCalls.set(id, { resolve, reject });
+        postMessage({ type: "host", id: id, name: name, args: args });
+    });
+}
+
+self.sendMessage = (message) => callHost("sendMessage", [message]);
+self.agentboxRpc = (batch) => callHost("agentboxRpc", [batch]);
+// Output is fire and forget; message order keeps the chunks in sequence.
+self.agentboxOutput = (stream, text) => {
+    postMessage({ type: "host", id: 0, name: "agentboxOutput", args: [stream, text] });
+};
+
+function compile(source) {
+    let fn = compiled.get(source);
+    if (fn === undefined) {
+        fn = (0, eval)("(" + source + ")");
+        compiled.set(source, fn);
+    }
+    return fn;
+}
+
+function errorText(e) {
+    return e && e.name ? e.name + ": " + e.message : String(e);
+}
+
+async function boot(msg) {
+    importScripts(msg.indexURL + "pyodide.js");
+    self.pyodide = await loadPyodide({ indexURL: msg.indexURL });
+    if (msg.interruptBuffer) {
+        self.__agentbox_interrupt = msg.interruptBuffer;
+        self.pyodide.setInterruptBuffer(msg.interruptBuffer);
+    }
+    (0, eval)(msg.memfs);
+}
+
+self.onmessage = async (event) => {
+    const msg = event.data;
+    if (msg.type === "reply") {
+        const call = hostCalls.get(msg.id);
+        hostCalls.delete(msg.id);
+        if (call) {
+            if (msg.error !== undefined) call.reject(new Error(msg.error));
+            else call.resolve(msg.value);
+        }
+        return;
+    }
+    let reply;
+    try {
+        const value = msg.type === "boot" ? await boot(msg) : await compile(msg.source)(msg.arg);
+        reply = { type: "result", id: msg.id, value: value };
+    } catch (e) {
+        reply = { type: "result", id: msg.id, error: errorText(e) };
+    }
+    try {
+        postMessage(reply);
+    } catch (e) {
+        postMessage({ type: "result", id: msg.id, error: "DataCloneError: " + e.message });
+    }
+};
+"""
+
+# Controller installed on the page as globalThis.__agentbox_worker.
+WORKER_HOST_JS = r"""
+(() => {
+    if (globalThis.__agentbox_worker) return;
+    let worker = null;
+    let interruptBuffer = null;
+    let nextCall = 0;
+    const calls = new Map();
+
+    function post(msg) {
+        const id = ++nextCall;
+        msg.id = id;
+        return new Promise((resolve, reject) => {
+            calls.set(id, { resolve, reject });
+            worker.postMessage(msg);
+        });
+    }
+
+    async function relay(msg) {
+        // Calls from the worker to bindings exposed on the page.
+        try {
+            const value = await globalThis[msg.name](...msg.args);
+            if (msg.id) worker.postMessage({ type: "reply", id: msg.id, value: value });
+        } catch (e) {
+            if (msg.id) worker.postMessage({ type: "reply", id: msg.id, error: String(e && e.message || e) });
+        }
+    }
+
+    function onMessage(event) {
+        const msg = event.data;
+        if (msg.type === "host") {
+            relay(msg);
+            return;
+        }
+        const call = calls.get(msg.id);
+        calls.delete(msg.id);
+        if (!call) return;
+        if (msg.error !== undefined) call.reject(new Error(msg.error));
+        else call.resolve(msg.value);
+    }
+
+    function failAll(reason) {
+        for (const call of calls.values()) call.reject(new Error(reason));
+        calls.clear();
+    }
+
+    globalThis.__agentbox_worker = {
+        // Returns true if timeouts can interrupt the interpreter.
+        async start(workerSource, indexURL, memfsSource) {
+            const blob = new Blob([workerSource], { type: "application/javascript" });
+            worker = new Worker(URL.createObjectURL(blob));
+            worker.onmessage = onMessage;
+            worker.onerror = (event) => failAll("Worker error: " + event.message);
+            if (globalThis.crossOriginIsolated && typeof SharedArrayBuffer !== "undefined") {
+                interruptBuffer = new Uint8Array(new SharedArrayBuffer(1));
+            }
+            await post({ type: "boot", indexURL: indexURL, memfs: memfsSource, interruptBuffer: interruptBuffer });
+            return interruptBuffer !== null;
+        },
+        evaluate(source, arg) {
+            return post({ type: "evaluate", source: source, arg: arg });
+        },
+        // Ask the interpreter to raise KeyboardInterrupt (SIGINT).
+        interrupt() {
+            if (interruptBuffer === null) return false;
+            interruptBuffer[0] = 2;
+            return true;
+        },
+        terminate() {
+            if (worker !== null) worker.terminate();
+            failAll("Worker terminated");
+        },
+    };
+})();
+"""
+
+# Evaluates a function source with one argument inside the worker.
+WORKER_EVALUATE_JS = "([source, arg]) => globalThis.__agentbox_worker.evaluate(source, arg)"
+
+
+def bootstrap_url(base_url):
+    return base_url + BOOTSTRAP_NAME
+
+
+async def install_bootstrap_route(target, base_url):
+    """
+    Serve the bootstrap page on a browser context (or page) with the headers
+    that make it cross-origin isolated. Register it after any asset routes,
+    as Playwright tries the most recently added route first.
+    """
+    async def handle(route):
+        await route.fulfill(status=200, headers=BOOTSTRAP_HEADERS, body=BOOTSTRAP_HTML)
+
+    await target.route(bootstrap_url(base_url), handle)
@@ -0,0 +1,259 @@
+import os
+import json
+import asyncio
+import base64
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+def normalize_code(code_string):
+    # Blank lines at either end do not change what runs. Other whitespace is
+    # kept, since it may be inside a string literal.
+    lines = code_string.replace("\r\n", "\n").split("\n")
+    while lines and not lines[0].strip():
+        lines.pop(0)
+    while lines and not lines[-1].strip():
+        lines.pop()
+    return "\n".join(lines)
+
+
+class ExecutionResultCache:
+    """
+    Cache of execution results for deterministic snippets.
+
+    Entries are keyed by key(): a hash of the normalized code, the sha256
+    digests of the declared input files, and the Pyodide and package
+    versions. Each entry stores the result dict (stdout, stderr, ...) and
+    the declared output files, so a hit can be returned without running
+    anything. The in-memory LRU is bounded by max_bytes; if a directory is
+    given, entries are also written there and evicted least recently used
+    first once the directory exceeds max_disk_bytes. The directory is
+    scanned once, at construction; after that its size is tracked as
+    entries are written and evicted. From async code, use get_async() and
+    put_async(), which do the disk I/O in a worker thread.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, directory=None, max_disk_bytes=1024 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Disk entries (key -> size), least recently used first.
+        self._disk = OrderedDict()
+        self._disk_bytes = 0
+        self._disk_lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self._load_disk_index()
+
+    @staticmethod
+    def key(code_string, input_digests=None, pyodide_version=None, packages=(), output_files=()):
+        """
+        Build the cache key. input_digests maps input paths to content
+        digests; packages is an iterable of package names or name==version;
+        output_files are the paths whose contents are stored with the result.
+        """
+        material = {
+            "code": normalize_code(code_string),
+            "inputs": sorted((input_digests or {}).items()),
+            "outputs": sorted(output_files or ()),
+            "pyodide": pyodide_version,
+            "packages": sorted(packages),
+        }
+        return hashlib.sha256(json.dumps(material, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size_bytes(self):
+        return self._bytes
+
+    # --- serialization ---
+
+    @staticmethod
+    def _encode(result, files):
+        entry = {
+            "result": result,
+            "files": {path: base64.b64encode(data).decode("ascii") for path, data in (files or {}).items()},
+        }
+        return json.dumps(entry).encode("utf-8")
+
+    @staticmethod
+    def _decode(blob):
+        entry = json.loads(blob.decode("utf-8"))
+        files = {path: base64.b64decode(data) for path, data in entry["files"].items()}
+        return entry["result"], files
+
+    # --- memory ---
+
+    def _remember(self, key, blob):
+        if len(blob) > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old)
+        self._entries[key] = blob
+        self._bytes += len(blob)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+
+    # --- disk ---
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def _load_disk_index(self):
+        # Modification times order the entries left by earlier processes.
+        files = []
+        for dirpath, _, filenames in os.walk(self.directory):
+            for name in filenames:
+                if not name.endswith(".json"):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(dirpath, name))
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, name[:-len(".json")], stat.st_size))
+        for _, key, size in sorted(files):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._evict_disk()
+
+    def _forget_disk(self, key):
+        size = self._disk.pop(key, None)
+        if size is not None:
+            self._disk_bytes -= size
+
+    def _read_disk(self, key):
+        path = self._path(key)
+        with self._disk_lock:
+            try:
+                with open(path, "rb") as f:
+                    blob = f.read()
+                # Keep the modification time in step for the next startup scan.
+                os.utime(path)
+            except OSError:
+                self._forget_disk(key)
+                return None
+            self._forget_disk(key)
+            self._disk[key] = len(blob)
+            self._disk_bytes += len(blob)
+            return blob
+
+    def _write_disk(self, key, blob):
+        path = self._path(key)
+        with self._disk_lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(blob)
+                os.replace(tmp_path, path)
+            except OSError:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                return
+            self._forget_disk(key)
+            self._disk[key] = len(blob)
+            self._disk_bytes += len(blob)
+            self._evict_disk()
+
+    def _evict_disk(self):
+        while self._disk_bytes > self.max_disk_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            try:
+                os.unlink(self._path(key))
+            except OSError:
+                pass
+
+    # --- public API ---
+
+    def get(self, key):
+        """
+        Return (result, files) for a cached execution, or None on a miss.
+        files maps output paths to bytes.
+        """
+        with self._lock:
+            blob = self._entries.get(key)
+            if blob is not None:
+                self._entries.move_to_end(key)
+            elif self.directory is not None:
+                blob = self._read_disk(key)
+                if blob is not None:
+                    self._remember(key, blob)
+            if blob is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        try:
+            return self._decode(blob)
+        except (ValueError, KeyError):
+            self.invalidate(key)
+            return None
+
+    def put(self, key, result, files=None):
+        """
+        Store a result dict and its output files (a dict of path to bytes).
+        """
+        blob = self._encode(result, files)
+        with self._lock:
+            self._remember(key, blob)
+        if self.directory is not None:
+            self._write_disk(key, blob)
+
+    async def get_async(self, key):
+        """
+        get() for use on an event loop: memory hits are answered directly,
+        disk reads run in a worker thread.
+        """
+        if self.directory is None or key in self._entries:
+            return self.get(key)
+        return await asyncio.to_thread(self.get, key)
+
+    async def put_async(self, key, result, files=None):
+        """
+        put() for use on an event loop, encoding and writing in a worker
+        thread when entries go to disk.
+        """
+        if self.directory is None:
+            self.put(key, result, files)
+        else:
+            await asyncio.to_thread(self.put, key, result, files)
+
+    def invalidate(self, key):
+        with self._lock:
+            blob = self._entries.pop(key, None)
+            if blob is not None:
+                self._bytes -= len(blob)
+        if self.directory is not None:
+            with self._disk_lock:
+                self._forget_disk(key)
+                try:
+                    os.unlink(self._path(key))
+                except OSError:
+                    pass
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.directory is not None:
+            with self._disk_lock:
+                for key in self._disk:
+                    try:
+                        os.unlink(self._path(key))
+                    except OSError:
+                        pass
+                self._disk.clear()
+                self._disk_bytes = 0
@@ -1,3 +1,544 @@
+import os
+import time
+import asyncio
+
+from playwright.async_api import async_playwright
+
+from agentbox.box.pyodide.pyodide_instance import PyodideInstance
+
+
+def process_rss(pid):
+    """
+    Return the resident memory of a process in bytes, or None if it cannot
+    be read (the process exited, or /proc is not available).
+    """
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def available_memory():
+    """
+    Return the memory available to new processes on this node in bytes,
+    or None if it cannot be read.
+    """
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class BrowserSlot:
+    """
+    One Chromium process of a BoxManager fleet, with the pages placed on it
+    and its latest resource sample.
+    """
+
+    def __init__(self, browser, cdp=None):
+        self.browser = browser
+        self.cdp = cdp
+        self.pages = 0
+        self.launched = time.monotonic()
+        # Resident memory of the browser and all its child processes.
+        self.memory_bytes = None
+        # CPU used by those processes since the previous sample, in percent
+        # of one core (so it can exceed 100 on a multi-core node).
+        self.cpu_percent = None
+        self.sampled = None
+        self._cpu_time = None
+        self.closed = False
+
+    async def sample(self):
+        """
+        Refresh memory_bytes and cpu_percent from the browser's process list.
+        Returns False if the browser could not be queried.
+        """
+        if self.cdp is None:
+            return False
+        try:
+            info = await self.cdp.send("SystemInfo.getProcessInfo")
+        except Exception:
+            return False
+        processes = info.get("processInfo", [])
+        now = time.monotonic()
+        cpu_time = sum(p.get("cpuTime", 0) for p in processes)
+        if self._cpu_time is not None and now > self.sampled:
+            self.cpu_percent = max(0.0, cpu_time - self._cpu_time) / (now - self.sampled) * 100
+        self._cpu_time = cpu_time
+        self.sampled = now
+        sizes = [process_rss(p["id"]) for p in processes if "id" in p]
+        sizes = [size for size in sizes if size is not None]
+        self.memory_bytes = sum(sizes) if sizes else None
+        return True
+
+    def stats(self):
+        return {
+            "pages": self.pages,
+            "memory_bytes": self.memory_bytes,
+            "cpu_percent": self.cpu_percent,
+            "uptime": time.monotonic() - self.launched,
+        }
+
+
+class BoxRecord:
+    """
+    Memory accounting for one live box (a Pyodide instance) tracked by a
+    BoxManager, with the callbacks used to evict it.
+    """
+
+    def __init__(self, instance, evict, can_evict=None, last_access=None, can_sample=None):
+        self.instance = instance
+        self.evict = evict
+        self._can_evict = can_evict
+        self._can_sample = can_sample
+        self._last_access = last_access
+        self.wasm_heap = None
+        self.memfs_bytes = None
+        self.sampled = None
+
+    @property
+    def can_evict(self):
+        return self._can_evict is None or self._can_evict()
+
+    @property
+    def can_sample(self):
+        if self._can_sample is not None:
+            return self._can_sample()
+        return self.can_evict
+
+    @property
+    def last_access(self):
+        if self._last_access is not None:
+            return self._last_access()
+        return self.instance.last_used or 0
+
+    @property
+    def memory_bytes(self):
+        return (self.wasm_heap or 0) + (self.memfs_bytes or 0)
+
+    async def sample(self):
+        usage = await self.instance.memory_usage()
+        if usage["wasm_heap"] is not None:
+            self.wasm_heap = usage["wasm_heap"]
+        if usage["memfs"] is not None:
+            self.memfs_bytes = usage["memfs"]
+        self.sampled = time.monotonic()
+
+    def stats(self):
+        return {
+            "wasm_heap": self.wasm_heap,
+            "memfs_bytes": self.memfs_bytes,
+            "idle_seconds": time.monotonic() - self.last_access if self.last_access else None,
+            "evictable": self.can_evict,
+        }
+
 
 class BoxManager:
-    pass
+    """
+    Owns a fleet of headless Chromium processes and places boxes on them.
+
+    Pools created with manager=... take their pages from the manager
+    instead of launching their own browser. Each new page goes to the
+    browser with the most memory and CPU headroom, never past
+    max_pages_per_browser. Browsers over max_memory_mb or
+    max_cpu_percent stop receiving new pages until they recover, and more
+    browsers are launched (up to max_browsers) while the node has memory
+    to spare. When every browser is full, placement waits for a page to
+    be released.
+
+    Live boxes (idle pool instances and open sessions) are tracked with
+    their wasm heap size, MemFS usage and last access. Idle boxes are
+    evicted least recently used first while the tracked total is over
+    memory_budget_mb, and once idle longer than max_idle. Sessions spill
+    their MemFS contents to spill_dir when evicted and get them back on
+    their next run.
+    """
+
+    def __init__(self, min_browsers=1, max_browsers=None, max_pages_per_browser=32, max_memory_mb=4096,
+                 max_cpu_percent=200.0, min_free_memory_mb=512, sample_interval=2.0, launch_options=None,
+                 memory_budget_mb=None, max_idle=None, spill_dir=None, eviction_interval=10.0):
+        """
+        min_browsers: browsers kept running even when idle.
+        max_browsers: upper bound on browsers, by default one per CPU core.
+        max_pages_per_browser: hard cap on pages (boxes) placed on one browser.
+        max_memory_mb: resident memory above which a browser is overloaded.
+        max_cpu_percent: CPU use (percent of one core) above which a browser
+        is overloaded.
+        min_free_memory_mb: no new browser is launched if the node has less
+        memory available than this.
+        sample_interval: seconds a resource sample stays fresh.
+        launch_options: extra keyword arguments for chromium.launch().
+        memory_budget_mb: budget for the wasm heaps and MemFS bytes of all
+        tracked boxes; idle boxes are evicted while it is exceeded.
+        max_idle: seconds after which an idle box is evicted regardless.
+        spill_dir: host directory where evicted sessions keep their MemFS
+        contents. Without it, evicting a session closes it.
+        eviction_interval: seconds between background eviction passes.
+        """
+        if max_browsers is None:
+            max_browsers = os.cpu_count() or 4
+        if min_browsers < 0 or max_browsers < 1 or min_browsers > max_browsers or max_pages_per_browser < 1:
+            raise ValueError("BoxManager requires 0 <= min_browsers <= max_browsers, max_browsers >= 1 "
+                             "and max_pages_per_browser >= 1")
+        self.min_browsers = min_browsers
+        self.max_browsers = max_browsers
+        self.max_pages_per_browser = max_pages_per_browser
+        self.max_memory_bytes = max_memory_mb * 1024 * 1024
+        self.max_cpu_percent = max_cpu_percent
+        self.min_free_memory_bytes = min_free_memory_mb * 1024 * 1024
+        self.sample_interval = sample_interval
+        self.launch_options = launch_options or {}
+        self.memory_budget_bytes = memory_budget_mb * 1024 * 1024 if memory_budget_mb is not None else None
+        self.max_idle = max_idle
+        self.spill_dir = spill_dir
+        self.eviction_interval = eviction_interval
+        self.evictions = 0
+
+        self._playwright = None
+        self.slots = []
+        # Browsers being launched, counted against max_browsers.
+        self._launching = 0
+        self._placements = {}
+        self.boxes = {}
+        self._evictor = None
+        self._condition = asyncio.Condition()
+        self._sampled = None
+        self._closed = True
+
+    async def start(self):
+        """
+        Start Playwright and launch min_browsers browsers. Safe to call more than once.
+        """
+        if not self._closed:
+            return
+        self._playwright = await async_playwright().start()
+        self._closed = False
+        for slot in await asyncio.gather(*(self._launch() for _ in range(self.min_browsers))):
+            self.slots.append(slot)
+        # Each browser was sampled as it launched.
+        self._sampled = time.monotonic()
+        if self.memory_budget_bytes is not None or self.max_idle is not None:
+            self._evictor = asyncio.create_task(self._evict_periodically())
+
+    async def stop(self):
+        """
+        Close every browser and the Playwright driver.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._evictor is not None:
+            self._evictor.cancel()
+            self._evictor = None
+        self.boxes.clear()
+        for slot in list(self.slots):
+            await self._close_slot(slot)
+        self._placements.clear()
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+        async with self._condition:
+            self._condition.notify_all()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    @property
+    def page_count(self):
+        return sum(slot.pages for slot in self.slots)
+
+    @property
+    def capacity(self):
+        return self.max_browsers * self.max_pages_per_browser
+
+    async def _launch(self):
+        browser = await self._playwright.chromium.launch(headless=True, **self.launch_options)
+        try:
+            cdp = await browser.new_browser_cdp_session()
+        except Exception:
+            cdp = None
+        slot = BrowserSlot(browser, cdp)
+        # A crashed browser is dropped from the fleet.
+        browser.on("disconnected", lambda _: self._forget(slot))
+        await slot.sample()
+        return slot
+
+    def _forget(self, slot):
+        slot.closed = True
+        if slot in self.slots:
+            self.slots.remove(slot)
+        for instance, placed in list(self._placements.items()):
+            if placed is slot:
+                del self._placements[instance]
+                self.boxes.pop(instance, None)
+
+    async def _close_slot(self, slot):
+        self._forget(slot)
+        try:
+            await slot.browser.close()
+        except Exception:
+            pass
+
+    # --- load ---
+
+    def overloaded(self, slot):
+        """
+        True if the browser is over its memory or CPU limit.
+        """
+        if slot.memory_bytes is not None and slot.memory_bytes > self.max_memory_bytes:
+            return True
+        return slot.cpu_percent is not None and slot.cpu_percent > self.max_cpu_percent
+
+    def headroom(self, slot):
+        """
+        Fraction of the browser's most constrained resource still free:
+        pages, memory or CPU. Unsampled resources are not counted.
+        """
+        free = [1 - slot.pages / self.max_pages_per_browser]
+        if slot.memory_bytes is not None:
+            free.append(1 - slot.memory_bytes / self.max_memory_bytes)
+        if slot.cpu_percent is not None:
+            free.append(1 - slot.cpu_percent / self.max_cpu_percent)
+        return min(free)
+
+    def placed_overloaded(self, instance):
+        """
+        True if the browser hosting an instance opened with open_instance()
+        is overloaded.
+        """
+        slot = self._placements.get(instance)
+        return slot is not None and self.overloaded(slot)
+
+    def has_healthy_room(self):
+        """
+        True if a new page would land on a browser within its limits: one
+        with a free page, or a new browser that can be launched.
+        """
+        for slot in self.slots:
+            if not slot.closed and slot.pages < self.max_pages_per_browser and not self.overloaded(slot):
+                return True
+        return self._can_launch()
+
+    async def refresh(self, force=False):
+        """
+        Sample every browser's memory and CPU use if the last sample is
+        older than sample_interval (or always, with force).
+        """
+        now = time.monotonic()
+        if not force and self._sampled is not None and now - self._sampled < self.sample_interval:
+            return
+        self._sampled = now
+        await asyncio.gather(*(slot.sample() for slot in list(self.slots)))
+
+    def _can_launch(self):
+        if len(self.slots) + self._launching >= self.max_browsers:
+            return False
+        available = available_memory()
+        return available is None or available >= self.min_free_memory_bytes
+
+    def _choose(self):
+        # Prefer browsers within their limits; an overloaded browser is only
+        # used when no other browser has room and no new one can be launched.
+        open_slots = [slot for slot in self.slots if not slot.closed and slot.pages < self.max_pages_per_browser]
+        healthy = [slot for slot in open_slots if not self.overloaded(slot)]
+        if healthy:
+            return max(healthy, key=self.headroom)
+        if self._can_launch():
+            return None
+        if open_slots:
+            return max(open_slots, key=self.headroom)
+        return None
+
+    # --- placement ---
+
+    async def acquire(self):
+        """
+        Reserve a page on the browser with the most headroom, launching a
+        new browser or waiting for a page to be released if needed.
+        Returns the BrowserSlot; hand it back with release().
+        """
+        await self.refresh()
+        while True:
+            if self._closed:
+                raise RuntimeError("BoxManager is not started")
+            launch = False
+            async with self._condition:
+                slot = self._choose()
+                if slot is not None:
+                    slot.pages += 1
+                    return slot
+                if self._can_launch():
+                    self._launching += 1
+                    launch = True
+                else:
+                    await self._condition.wait()
+                    continue
+
+            if launch:
+                try:
+                    slot = await self._launch()
+                except BaseException:
+                    self._launching -= 1
+                    async with self._condition:
+                        self._condition.notify_all()
+                    raise
+                self._launching -= 1
+                if self._closed:
+                    await slot.browser.close()
+                    raise RuntimeError("BoxManager is not started")
+                async with self._condition:
+                    slot.pages += 1
+                    self.slots.append(slot)
+                    self._condition.notify_all()
+                return slot
+
+    async def release(self, slot):
+        """
+        Give back a page reserved with acquire(). Idle browsers beyond
+        min_browsers are closed.
+        """
+        async with self._condition:
+            slot.pages = max(0, slot.pages - 1)
+            close = (slot.pages == 0 and not slot.closed and len(self.slots) > self.min_browsers
+                     and not self._closed)
+            if close:
+                self._forget(slot)
+            self._condition.notify_all()
+        if close:
+            try:
+                await slot.browser.close()
+            except Exception:
+                pass
+
+    async def open_instance(self, **options):
+        """
+        Boot a PyodideInstance on the browser chosen by acquire().
+        options are passed to PyodideInstance.create().
+        """
+        if self.memory_budget_bytes is not None and self.memory_used >= self.memory_budget_bytes:
+            # Make room before adding another box.
+            await self.evict_idle()
+        slot = await self.acquire()
+        try:
+            instance = await PyodideInstance.create(slot.browser, **options)
+        except BaseException:
+            await self.release(slot)
+            raise
+        self._placements[instance] = slot
+        return instance
+
+    async def close_instance(self, instance):
+        """
+        Close an instance opened with open_instance() and free its page.
+        """
+        self.untrack(instance)
+        await instance.close()
+        slot = self._placements.pop(instance, None)
+        if slot is not None:
+            await self.release(slot)
+
+    # --- memory accounting and eviction ---
+
+    def track(self, instance, evict, can_evict=None, last_access=None, can_sample=None):
+        """
+        Account for a live box and make it a candidate for eviction.
+        evict is an async callable(instance) returning True if it released
+        the box; can_evict() says whether it may be evicted right now;
+        can_sample() says whether it is idle, so its memory can be measured
+        without disturbing running code (by default, can_evict());
+        last_access() returns its last use (time.monotonic()), by default
+        the instance's last run. Tracking an instance again replaces its
+        callbacks but keeps its last memory sample.
+        """
+        record = BoxRecord(instance, evict, can_evict, last_access, can_sample)
+        previous = self.boxes.get(instance)
+        if previous is not None:
+            record.wasm_heap, record.memfs_bytes, record.sampled = (previous.wasm_heap, previous.memfs_bytes,
+                                                                    previous.sampled)
+        self.boxes[instance] = record
+        return record
+
+    def untrack(self, instance):
+        self.boxes.pop(instance, None)
+
+    @property
+    def memory_used(self):
+        """
+        Wasm heap and MemFS bytes of all tracked boxes, as last sampled.
+        """
+        return sum(record.memory_bytes for record in self.boxes.values())
+
+    async def account(self):
+        """
+        Sample the memory of every idle tracked box. Busy boxes keep their
+        previous sample, so running code is not interrupted; a box tracked
+        while busy is first sampled once it goes idle.
+        """
+        records = [record for record in list(self.boxes.values()) if record.can_sample]
+        await asyncio.gather(*(record.sample() for record in records))
+
+    async def evict_idle(self):
+        """
+        Evict idle boxes: those idle longer than max_idle, then the least
+        recently used ones while memory_used is over the budget.
+        Returns the number of boxes evicted.
+        """
+        await self.account()
+        now = time.monotonic()
+        candidates = sorted((r for r in self.boxes.values() if r.can_evict), key=lambda r: r.last_access)
+        evicted = 0
+        for record in candidates:
+            stale = self.max_idle is not None and now - record.last_access > self.max_idle
+            over = self.memory_budget_bytes is not None and self.memory_used > self.memory_budget_bytes
+            if not (stale or over):
+                continue
+            if self.boxes.get(record.instance) is not record or not record.can_evict:
+                continue
+            self.untrack(record.instance)
+            if await record.evict(record.instance):
+                evicted += 1
+            elif record.instance not in self.boxes:
+                # The box could not be evicted; keep accounting for it.
+                self.boxes[record.instance] = record
+        self.evictions += evicted
+        return evicted
+
+    async def _evict_periodically(self):
+        while not self._closed:
+            await asyncio.sleep(self.eviction_interval)
+            try:
+                await self.evict_idle()
+            except Exception:
+                # A failed pass is retried on the next interval.
+                pass
+
+    def stats(self):
+        """
+        Return the fleet's current load: one dict per browser plus totals.
+        """
+        browsers = []
+        for slot in self.slots:
+            entry = slot.stats()
+            entry["overloaded"] = self.overloaded(slot)
+            entry["headroom"] = self.headroom(slot)
+            browsers.append(entry)
+        return {
+            "browsers": browsers,
+            "pages": self.page_count,
+            "capacity": self.capacity,
+            "available_memory": available_memory(),
+            "boxes": len(self.boxes),
+            "box_memory": self.memory_used,
+            "memory_budget": self.memory_budget_bytes,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,59 @@
+import asyncio
+from agentbox.box.admission import AdmissionController, AdmissionRejected
+from agentbox.box.code_exec_box import CodeExecutorBox
+
+
+async def main():
+
+    admission = AdmissionController(max_in_flight=2, max_queue=3)
+    started = []
+
+    async def job(caller, name, duration=0.05):
+        async with admission.admit(caller):
+            started.append(name)
+            await asyncio.sleep(duration)
+
+    # Only two jobs run at once; the rest wait in the queue.
+    tasks = [asyncio.create_task(job("a", f"a{i}")) for i in range(5)]
+    await asyncio.sleep(0.01)
+    print("In flight:", admission.in_flight, "queued:", admission.queued)
+
+    # The queue is full, so the next request is turned away immediately.
+    try:
+        await job("b", "b0")
+    except AdmissionRejected as e:
+        print("Rejected:", e, "total rejected:", admission.rejected)
+    await asyncio.gather(*tasks)
+    print("Order:", started)
+
+    # Freed slots rotate between callers, so caller "b" is not stuck behind
+    # every queued request of caller "a".
+    started.clear()
+    admission = AdmissionController(max_in_flight=1, max_queue=10)
+    blocker = asyncio.create_task(job("a", "a0"))
+    await asyncio.sleep(0.01)
+    tasks = [asyncio.create_task(job("a", f"a{i}", 0.01)) for i in range(1, 4)]
+    await asyncio.sleep(0.01)
+    tasks += [asyncio.create_task(job("b", f"b{i}", 0.01)) for i in range(2)]
+    await asyncio.gather(blocker, *tasks)
+    print("Round-robin order:", started)
+
+    # A cancelled waiter gives up its place without leaking a slot.
+    admission = AdmissionController(max_in_flight=1, max_queue=10)
+    blocker = asyncio.create_task(job("a", "slow", 0.05))
+    await asyncio.sleep(0.01)
+    waiter = asyncio.create_task(job("b", "cancelled"))
+    await asyncio.sleep(0.01)
+    waiter.cancel()
+    await asyncio.gather(blocker, waiter, return_exceptions=True)
+    print("After cancel - in flight:", admission.in_flight, "queued:", admission.queued)
+
+    # The box applies the same limits to handle_code_exec_async().
+    box = CodeExecutorBox(max_in_flight=1, max_queue=1)
+    answers = await asyncio.gather(*(box.handle_code_exec_async(f"print({i})", caller="user") for i in range(3)))
+    for answer in answers:
+        print(answer)
+    await box.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,35 @@
+import os
+import asyncio
+from agentbox.box.code_exec_box import CodeExecutorBox
+
+
+async def main():
+
+    code_box = CodeExecutorBox(packages=["matplotlib"])
+
+    # A chart saved to a file is returned through the declared output glob.
+    with open(os.path.join(os.path.dirname(__file__), "test_generate_chart.py")) as f:
+        code = f.read()
+    result = await code_box.execute(code, output_globs=["*.png"])
+    print("Output:", result["output"])
+
+    # A figure left open is captured without being saved.
+    code = """
+import matplotlib.pyplot as plt
+plt.bar(["a", "b", "c"], [3, 1, 2])
+plt.title("Inline figure")
+plt.show()
+"""
+    inline = await code_box.execute(code)
+
+    for artifact in result["artifacts"] + inline["artifacts"]:
+        print(artifact["kind"], artifact["path"], artifact["size"], artifact["sha256"])
+        name = os.path.basename(artifact["path"])
+        with open(name, "wb") as f:
+            f.write(artifact["data"])
+        print("Saved", name)
+
+    await code_box.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
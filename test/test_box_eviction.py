@@ -0,0 +1,38 @@
+import asyncio
+import tempfile
+from agentbox.box.code_exec_box import CodeExecutorBox
+from agentbox.box.pyodide.pyodide_assets import PyodideAssetCache
+from agentbox.manager.box_manager import BoxManager
+
+
+async def main():
+
+    assets = PyodideAssetCache()
+    spill_dir = tempfile.mkdtemp(prefix="agentbox-spill-")
+
+    # A small budget so that idle sessions get evicted quickly.
+    async with BoxManager(memory_budget_mb=64, spill_dir=spill_dir, eviction_interval=1.0) as manager:
+
+        box = CodeExecutorBox(assets=assets, manager=manager)
+
+        session = await box.open_session()
+        print(await session.run("open('notes.txt', 'w').write('kept across eviction')\n"
+                                "import os; os.makedirs('/data'); open('/data/rows.csv', 'w').write('a,b')\nx = 42"))
+
+        await manager.account()
+        for instance, record in manager.boxes.items():
+            print(record.stats())
+        print(manager.stats())
+
+        evicted = await manager.evict_idle()
+        print("Evicted:", evicted, "Spilled:", session.spilled)
+
+        # The next run restores MemFS on a fresh instance; globals are gone.
+        result = await session.run("print(open('notes.txt').read(), open('/data/rows.csv').read())\n"
+                                   "print('x' in globals())")
+        print(result["restored"], result["restored_paths"], result["output"])
+
+        await box.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
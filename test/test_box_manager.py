@@ -0,0 +1,30 @@
+import asyncio
+from agentbox.box.code_exec_box import CodeExecutorBox
+from agentbox.box.pyodide.pyodide_assets import PyodideAssetCache
+from agentbox.manager.box_manager import BoxManager
+
+
+async def main():
+
+    assets = PyodideAssetCache()
+
+    # One fleet of browsers shared by every box.
+    async with BoxManager(min_browsers=1, max_browsers=2, max_pages_per_browser=4) as manager:
+
+        boxes = [CodeExecutorBox(assets=assets, pool_size=2, manager=manager) for _ in range(4)]
+
+        code = "import sys\nprint(sys.version)"
+        results = await asyncio.gather(*(box.execute(code) for box in boxes))
+        for result in results:
+            print(result["success"], result["output"].strip())
+
+        await manager.refresh(force=True)
+        for browser in manager.stats()["browsers"]:
+            print(browser)
+
+        for box in boxes:
+            await box.close()
+        print("Pages after close:", manager.page_count)
+
+if __name__ == "__main__":
+    asyncio.run(main())
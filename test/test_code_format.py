@@ -0,0 +1,37 @@
+import asyncio
+import time
+
+from agentbox.box.code_format import CodeFormatter
+
+
+async def main():
+
+    formatter = CodeFormatter()
+
+    code = "import math\nx=[math.sqrt(i) for i in range( 10 )]\nprint( x )\n"
+
+    # Identical snippets formatted concurrently share one Black job.
+    start = time.perf_counter()
+    results = await asyncio.gather(*[formatter.format(code) for _ in range(8)])
+    print(f"First format: {time.perf_counter() - start:.3f}s, identical results: {len(set(results)) == 1}")
+
+    start = time.perf_counter()
+    print(await formatter.format(code))
+    print(f"Cached format: {time.perf_counter() - start:.6f}s")
+
+    # Syntax check only, or no formatting at all.
+    print(repr(await formatter.format(code, mode="ast")))
+    print(repr(await formatter.format(code, mode="none")))
+
+    for mode in ("black", "ast"):
+        try:
+            await formatter.format("def broken(:\n    pass\n", mode=mode)
+        except Exception as e:
+            print(f"{mode}: {type(e).__name__}: {e}")
+
+    print(f"Hits: {formatter.hits}, misses: {formatter.misses}")
+
+    formatter.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
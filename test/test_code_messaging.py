@@ -18,6 +18,14 @@ for char in sentence:
     if char in vowels:
         count += 1
 print(f"Vowel Count: {count}")
+
+# Concurrent calls are pipelined and sent to the host in one batch.
+replies = await messaging.gather(*({"index": i} for i in range(10)))
+print("Gathered replies:", len(replies))
+
+# bytes are passed through without a JS conversion.
+reply = await messaging.send({"blob": bytes(range(8))})
+print("Binary round trip:", reply["original"]["blob"])
 '''
 
     # Run the code in Pyodide and get the result.
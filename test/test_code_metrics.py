@@ -0,0 +1,32 @@
+import asyncio
+from agentbox.box.code_exec_box import CodeExecutorBox
+from agentbox.box.metrics import InMemoryMetrics
+
+
+async def main():
+
+    metrics = InMemoryMetrics()
+    code_box = CodeExecutorBox(pool_size=2, metrics=metrics)
+
+    code = """
+import json
+data = [{"n": i, "square": i * i} for i in range(100)]
+print(json.dumps(data[:3]))
+"""
+
+    # The first run pays for the browser launch and Pyodide boot; later
+    # runs reuse the warm page.
+    for i in range(3):
+        result = await code_box.execute(code)
+        print(f"Run {i} timings (ms):", result["timings"])
+        print(f"Run {i} bytes:", result["bytes"])
+
+    await code_box.execute("def broken(:\n    pass")
+
+    # Counters and histograms in the Prometheus text format.
+    print(metrics.render())
+
+    await code_box.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
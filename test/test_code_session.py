@@ -0,0 +1,43 @@
+import asyncio
+from agentbox.box.code_exec_box import CodeExecutorBox
+
+
+async def main():
+
+    code_box = CodeExecutorBox(session_ttl=60)
+
+    session = await code_box.open_session()
+    print("Opened session:", session.session_id)
+
+    steps = [
+        """
+rows = [{"name": "a", "value": 1}, {"name": "b", "value": 2}]
+print(f"Built {len(rows)} rows")
+""",
+        """
+rows.append({"name": "c", "value": 3})
+total = sum(r["value"] for r in rows)
+print(f"Total: {total}")
+""",
+        """
+with open("rows.txt", "w") as f:
+    f.write(str(rows))
+print("Wrote rows.txt")
+""",
+    ]
+
+    # Each step sees the globals left by the previous one.
+    for code in steps:
+        result = await code_box.run_in_session(session.session_id, code)
+        print(result)
+
+    # The session's MemFS persists between steps as well.
+    print("rows.txt:", await session.memfs.read_file("/home/pyodide/rows.txt"))
+
+    await code_box.close_session(session.session_id)
+    print("After close:", await session.run("print(rows)"))
+
+    await code_box.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,36 @@
+import asyncio
+from agentbox.box.code_exec_box import CodeExecutorBox
+
+
+async def main():
+
+    code_box = CodeExecutorBox(timeout=5)
+
+    code = """
+import sys
+import asyncio
+for i in range(5):
+    print(f"step {i}")
+    await asyncio.sleep(0.5)
+print("warning: almost done", file=sys.stderr)
+print("done")
+"""
+    # Chunks arrive while the code is still running.
+    stream = code_box.stream(code)
+    async for name, text in stream:
+        print(f"[{name}] {text!r}")
+    print("Result:", await stream.result())
+
+    # Output written before a timeout is kept in the result.
+    code = """
+print("started")
+while True:
+    pass
+"""
+    result = await code_box.execute(code, on_output=lambda name, text: print(f"[{name}] {text!r}"))
+    print("Timed out result:", result)
+
+    await code_box.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -2,6 +2,7 @@ import json
 import asyncio
 
 from agentbox.box.memfs.memfs import MemFS
+from agentbox.box.pyodide.pyodide_assets import PyodideAssetCache
 
 
 async def main():
@@ -11,8 +12,10 @@ async def main():
         browser = await p.chromium.launch(headless=True)
         page = await browser.new_page()
 
-        # Load Pyodide via CDN; ensure it's attached to window.pyodide
-        await page.goto('data:text/html,<script src="https://cdn.jsdelivr.net/pyodide/v0.23.0/full/pyodide.js"></script>')
+        # Serve Pyodide from the local asset cache; ensure it's attached to window.pyodide
+        assets = PyodideAssetCache()
+        await assets.install(page)
+        await page.goto(f'data:text/html,<script src="{assets.base_url}pyodide.js"></script>')
         await page.evaluate('''async () => {
             window.pyodide = await loadPyodide();
         }''')
@@ -94,6 +97,70 @@ async def main():
 
         await memfs.remove_file(file_path)
 
+        # Binary content round trip, moved in small chunks.
+        binary_path = "/binary.bin"
+        binary_content = bytes(range(256)) * 1000
+        write_ok = await memfs.write_bytes(binary_path, binary_content, chunk_size=64 * 1024)
+        print("Binary write result:", write_ok)
+        read_back = await memfs.read_bytes(binary_path, chunk_size=64 * 1024)
+        print("Binary round trip matches:", read_back == binary_content, len(read_back))
+
+        # Streaming writer and reader.
+        async with memfs.open_write("/stream.bin", chunk_size=1000) as writer:
+            for i in range(10):
+                await writer.write(bytes([i]) * 500)
+        chunk_sizes = [len(chunk) async for chunk in memfs.open_read("/stream.bin", chunk_size=2048)]
+        print("Streamed chunk sizes:", chunk_sizes)
+
+        await memfs.remove_file(binary_path)
+        await memfs.remove_file("/stream.bin")
+
+        # Seed a workspace with many files in a single round trip.
+        batch = memfs.batch().mkdir("/workspace")
+        for i in range(500):
+            batch.write_file(f"/workspace/file_{i}.txt", f"content {i}")
+        results = await batch.run()
+        print("Batch ops:", len(results), "all ok:", all(r["ok"] for r in results))
+
+        # Harvest it back, continuing past the missing file.
+        batch = memfs.batch().read_file("/workspace/file_0.txt").read_file("/workspace/missing.txt")
+        batch.read_file("/workspace/file_499.txt")
+        print("Harvest:", await batch.run(stop_on_error=False))
+
+        # Move the whole workspace out and back in as single archives.
+        archive = await memfs.export_archive("/workspace", format="tar.gz")
+        print("Exported archive bytes:", len(archive))
+        extracted = await memfs.import_archive(archive, "/restored")
+        print("Imported files:", extracted, "sample:", await memfs.read_file("/restored/file_42.txt"))
+
+        zip_archive = await memfs.export_archive("/workspace", format="zip")
+        print("Zip import:", await memfs.import_archive(zip_archive, "/restored_zip"))
+
+        # Walk a large tree a page at a time, with glob filters.
+        batch = memfs.batch().mkdir("/tree").mkdir("/tree/src").mkdir("/tree/src/pkg").mkdir("/tree/build")
+        for i in range(2000):
+            batch.write_file(f"/tree/src/pkg/module_{i}.py", f"x = {i}")
+        batch.write_file("/tree/src/data.csv", "a,b").write_file("/tree/build/out.py", "")
+        await batch.run()
+
+        walked = await memfs.walk_page("/tree", page_size=100)
+        print("First page:", len(walked["entries"]), "more:", walked["cursor"] is not None)
+        walked = await memfs.walk_page("/tree", cursor=walked["cursor"], page_size=100)
+        print("Second page starts at:", walked["entries"][0]["path"])
+
+        python_files = [entry["path"] async for entry in memfs.walk("/tree", include=["*.py"], exclude=["build"])]
+        print("Python files outside build/:", len(python_files))
+        print("Top level:", [entry["path"] async for entry in memfs.walk("/tree", max_depth=1)])
+        print("CSV by path:", [entry["path"] async for entry in memfs.walk("/tree", include=["src/*.csv"])])
+
+        # Cache directory listings; writes through the same object invalidate them.
+        cached = MemFS(page, cache=True)
+        print("Cached listing:", await cached.list_dir("/home/pyodide"))
+        await cached.write_file("notes.txt", "relative to /home/pyodide")
+        print("After relative write:", await cached.list_dir("/home/pyodide"))
+        await cached.remove_file("/home/pyodide/notes.txt")
+        print("After remove:", await cached.list_dir("//home/pyodide/"))
+
         await browser.close()
 
 # Run the example if this module is executed directly.
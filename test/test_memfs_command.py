@@ -1,5 +1,6 @@
 import asyncio
 from agentbox.box.memfs.memfs import MemFS
+from agentbox.box.pyodide.pyodide_assets import PyodideAssetCache
 from agentbox.box.memfs.memfs_command import MemFSCommand
 
 async def main():
@@ -9,8 +10,10 @@ async def main():
         browser = await p.chromium.launch(headless=True)
         page = await browser.new_page()
 
-        # Load Pyodide via CDN; ensure it's attached to window.pyodide
-        await page.goto('data:text/html,<script src="https://cdn.jsdelivr.net/pyodide/v0.23.0/full/pyodide.js"></script>')
+        # Serve Pyodide from the local asset cache; ensure it's attached to window.pyodide
+        assets = PyodideAssetCache()
+        await assets.install(page)
+        await page.goto(f'data:text/html,<script src="{assets.base_url}pyodide.js"></script>')
         await page.evaluate('''async () => {
             window.pyodide = await loadPyodide();
         }''')
@@ -66,12 +69,35 @@ async def main():
 
             "dir /new/folder",
 
+            # Content commands run inside the page.
+            "find / -name '*.txt' -type f",
+
+            "grep -r -i hello /otherfolder",
+
+            "head -n 2 /otherfolder/file.txt",
+
+            "tail -n 2 /otherfolder/file.txt",
+
+            "wc /otherfolder/file.txt",
+
+            "du /",
+
         ]
 
         for cmd in test_commands:
             result = await cmd_exec.command(cmd)
             print(f"{result}: {cmd}")
 
+        # A multi-command script runs in a single browser round trip.
+        script = """
+mkdir /scripted
+'first' > put /scripted/a.txt; 'second' > put /scripted/b.txt
+cp -r /scripted /scripted_copy
+ls -info /scripted_copy
+get /scripted_copy/b.txt
+"""
+        print("Script results:", await cmd_exec.script(script))
+
         await browser.close()
 
 if __name__ == "__main__":
@@ -0,0 +1,59 @@
+import time
+import asyncio
+from agentbox.box.code_exec_box import CodeExecutorBox
+from agentbox.box.message_handlers import MessageHandlerRegistry, KGraphMessageHandler
+
+
+class ExampleGraphService:
+    # Stands in for a KGraphService; lookups are slow and synchronous.
+    def __init__(self):
+        self.calls = 0
+
+    def get_object(self, object_uri, graph_uri=None):
+        self.calls += 1
+        time.sleep(0.2)
+        return {"uri": object_uri, "graph": graph_uri, "name": object_uri.rsplit(":", 1)[-1]}
+
+
+async def main():
+
+    service = ExampleGraphService()
+    registry = MessageHandlerRegistry(cache_size=512, default_ttl=300)
+    registry.register("kgraph", KGraphMessageHandler(service), max_concurrency=4, cacheable=True)
+
+    code_box = CodeExecutorBox(message_handlers=registry)
+
+    code = r'''
+import asyncio
+uris = ["urn:entity:alice", "urn:entity:bob", "urn:entity:alice", "urn:entity:alice"]
+replies = await asyncio.gather(*(
+    messaging.send({"type": "kgraph", "op": "get_object", "args": {"object_uri": uri, "graph_uri": "urn:g"}})
+    for uri in uris
+))
+print([reply["result"]["name"] for reply in replies])
+
+# Messages without a registered type get the default reply.
+print(await messaging.send({"greeting": "hello"}))
+'''
+
+    # The second run is answered from the registry's cache.
+    for i in range(2):
+        start = time.perf_counter()
+        result = await code_box.execute(code)
+        print(f"Run {i} ({time.perf_counter() - start:.2f}s):", result["output"])
+
+    print(f"Backend calls: {service.calls}, cache hits: {registry.hits}, coalesced: {registry.coalesced}")
+
+    # Cancelling the first caller does not cancel the call the others share.
+    message = {"type": "kgraph", "op": "get_object", "args": {"object_uri": "urn:entity:carol"}}
+    first = asyncio.create_task(registry.handle(message))
+    await asyncio.sleep(0.05)
+    second = asyncio.create_task(registry.handle(message))
+    await asyncio.sleep(0.05)
+    first.cancel()
+    print("Follower reply:", (await second)["result"]["name"], "backend calls:", service.calls)
+
+    await code_box.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
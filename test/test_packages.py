@@ -0,0 +1,40 @@
+import asyncio
+from agentbox.box.code_exec_box import CodeExecutorBox
+from agentbox.box.pyodide.pyodide_assets import PyodideAssetCache
+from agentbox.box.pyodide.pyodide_packages import find_imports
+from agentbox.box.pyodide.pyodide_pool import PyodidePool
+
+
+async def main():
+
+    assets = PyodideAssetCache()
+    # Cache the declared packages and their dependencies up front.
+    assets.fill_packages(["numpy"])
+
+    box = CodeExecutorBox(assets=assets, packages=["numpy"])
+
+    code = "import numpy as np\nprint(np.arange(10).sum())"
+    result = await box.execute(code)
+    print(result)
+    print("Boot timings:", {k: v for k, v in result["timings"].items() if k.startswith("boot_")})
+
+    # Undeclared imports are found before the code runs and loaded on demand.
+    code = "import pandas as pd\nprint(pd.Series([1, 2, 3]).mean())"
+    print("Imports:", find_imports(code))
+    result = await box.execute(code)
+    print(result)
+    print("Package loading took", result["timings"].get("packages"), "ms")
+
+    # On a pooled page, pandas and numpy stay imported across the reset.
+    async with PyodidePool(min_size=1, max_size=1, assets=assets) as pool:
+        async with pool.lease() as instance:
+            print("Loaded on demand:", await instance.ensure_packages(code))
+            print(await instance.run(code))
+        async with pool.lease() as instance:
+            print("Preserved:", sorted(instance.preserve_modules))
+            print(await instance.run("import sys\nprint('numpy' in sys.modules, 'pandas' in sys.modules)"))
+
+    await box.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,51 @@
+import time
+import asyncio
+from agentbox.box.code_exec_box import CodeExecutorBox
+from agentbox.box.pyodide.pyodide_pool import PyodidePool
+
+
+async def main():
+
+    async with PyodidePool(min_size=2, max_size=4, max_uses=10) as pool:
+
+        code_box = CodeExecutorBox(pool=pool)
+
+        code = """
+total = sum(range(1000))
+print(f"Total: {total}")
+"""
+        # The first executions lease already warm pages from the pool.
+        for i in range(5):
+            start = time.perf_counter()
+            result = await code_box.run_python_with_pyodide(code)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"Run {i}: {result} ({elapsed:.1f} ms)")
+
+        # Concurrent executions share the pool up to max_size.
+        results = await asyncio.gather(*(code_box.run_python_with_pyodide(code) for _ in range(8)))
+        print("Concurrent results:", results)
+        print("Pool size:", pool.size, "idle:", pool.idle_count)
+
+        # Released pages are reset, so state does not leak between callers.
+        async with pool.lease() as instance:
+            await instance.run("leaked = 42\nimport colorsys\nopen('scratch.txt', 'w').write('x')")
+            report = await instance.reset()
+            print("Reset report:", report)
+            result = await instance.run("import os, sys\nprint('leaked' in globals(), 'colorsys' in sys.modules, os.listdir('.'))")
+            print("After reset:", result)
+
+            # Symlinks are removed rather than followed.
+            await instance.run("import os\nos.makedirs('/tmp/shadow')\nos.symlink('/tmp/shadow', 'colorsys')")
+            report = await instance.reset()
+            result = await instance.run("import os\nprint(os.listdir('.'), os.path.exists('/tmp/shadow'))")
+            print("After symlink reset:", report["ok"], result)
+
+        # Writing into site-packages fails verification, so the pool discards the page.
+        async with pool.lease() as instance:
+            await instance.run("import os, sysconfig\n"
+                               "open(os.path.join(sysconfig.get_paths()['purelib'], 'planted.py'), 'w').write('')")
+            report = await instance.reset()
+            print("Site-packages write:", report["ok"], report["problems"])
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,52 @@
+import asyncio
+import tempfile
+import time
+
+from agentbox.box.code_exec_box import CodeExecutorBox
+from agentbox.box.result_cache import ExecutionResultCache
+
+
+async def main():
+
+    cache = ExecutionResultCache(max_bytes=8 * 1024 * 1024, directory=tempfile.mkdtemp())
+    code_box = CodeExecutorBox(result_cache=cache)
+
+    code = """
+import csv
+with open("/home/pyodide/data.csv") as f:
+    rows = list(csv.DictReader(f))
+total = sum(int(r["value"]) for r in rows)
+with open("/home/pyodide/total.txt", "w") as f:
+    f.write(str(total))
+print(f"Total: {total}")
+"""
+    inputs = {"/home/pyodide/data.csv": "name,value\na,1\nb,2\nc,3\n"}
+
+    # The second run is answered from the cache without executing.
+    for attempt in range(2):
+        start = time.perf_counter()
+        result = await code_box.execute(code, input_files=inputs, output_files=["/home/pyodide/total.txt"])
+        print(f"Run {attempt + 1} ({time.perf_counter() - start:.3f}s):", result)
+
+    # Changing an input changes the key.
+    inputs["/home/pyodide/data.csv"] += "d,4\n"
+    print("Changed input:", await code_box.execute(code, input_files=inputs,
+                                                   output_files=["/home/pyodide/total.txt"]))
+
+    # In a session, inputs are files already in the session's MemFS.
+    session = await code_box.open_session()
+    await session.memfs.write_file("/home/pyodide/data.csv", "name,value\na,10\n")
+    for attempt in range(2):
+        result = await session.run(code, input_paths=["/home/pyodide/data.csv"],
+                                   output_files=["/home/pyodide/total.txt"])
+        print(f"Session run {attempt + 1}:", result)
+
+    # Whitespace inside a string literal is part of the key.
+    print("Distinct keys:", cache.key('print("""a  \n""")') != cache.key('print("""a\n""")'))
+
+    print(f"Hits: {cache.hits}, misses: {cache.misses}, entries: {len(cache)}, bytes: {cache.size_bytes}")
+
+    await code_box.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,27 @@
+import time
+import asyncio
+from agentbox.box.pyodide.pyodide_assets import PyodideAssetCache
+from agentbox.box.pyodide.pyodide_pool import PyodidePool
+
+
+async def main():
+
+    assets = PyodideAssetCache()
+
+    async with PyodidePool(min_size=1, max_size=1, assets=assets, worker=True) as pool:
+
+        async with pool.lease() as instance:
+            print("Interruptible:", instance.interruptible)
+
+            # A spinning loop is interrupted with KeyboardInterrupt on timeout.
+            start = time.perf_counter()
+            result = await instance.run("print('spinning')\nwhile True:\n    pass", timeout=2)
+            print(f"Timed out after {time.perf_counter() - start:.1f}s:", result)
+            print("Broken:", instance.broken)
+
+            # The same instance keeps working without a restart.
+            print(await instance.run("print(sum(range(10)))"))
+            print("MemFS:", await instance.memfs.list_dir("/home/pyodide"))
+
+if __name__ == "__main__":
+    asyncio.run(main())